@@ -0,0 +1,173 @@
+# fake_ollama.py
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Servidor Ollama falso ---
+class FakeOllamaServer:
+    """
+    Servidor HTTP local que imita os endpoints /api/generate (com e sem streaming) e /api/embed
+    do Ollama, para testes e benchmarks.
+
+    Args:
+        latency (float): Tempo (segundos) de cada geração.
+        num_parallel (int): Gerações simultâneas, como OLLAMA_NUM_PARALLEL; as demais esperam na fila.
+        error_rate (float): Fração das requisições respondidas com HTTP 500.
+        invalid_rate (float): Fração das respostas com JSON inválido.
+        seed (int): Semente dos sorteios de erro, para execuções reprodutíveis.
+
+    A pontuação devolvida é derivada do hash do prompt (e varia até 1 ponto entre modelos), portanto é
+    sempre a mesma para o mesmo prompt e o mesmo modelo.
+    Os embeddings são contagens de palavras espalhadas em EMBED_DIMENSIONS posições por hash:
+    textos com as mesmas palavras têm embeddings próximos.
+    """
+
+    EMBED_DIMENSIONS = 256
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.05, num_parallel: int = 4,
+                 error_rate: float = 0.0, invalid_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.invalid_rate = invalid_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._slots = threading.Semaphore(max(1, num_parallel))
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/api/generate"
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            return self._random.random(), self._random.random()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status: int, body: dict):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if self.path == "/api/generate":
+                    server.handle_generate(self, request)
+                elif self.path == "/api/embed":
+                    server.handle_embed(self, request)
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+        return Handler
+
+    def handle_generate(self, handler, request: dict):
+        error_draw, invalid_draw = self._draw()
+        with self._slots:
+            time.sleep(self.latency)
+        if error_draw < self.error_rate:
+            handler._send_json(500, {"error": "erro simulado"})
+            return
+
+        prompt = request.get("prompt", "")
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        # Cada modelo discorda um pouco (-1, 0 ou +1 ponto) da nota "verdadeira" do prompt
+        jitter = hashlib.sha256(f"{request.get('model')}\n{prompt}".encode("utf-8")).digest()[0] % 3 - 1
+        answer = json.dumps({
+            "score": min(10, max(0, digest[0] % 11 + jitter)),
+            "positives": "Preço abaixo do mercado, boa localização",
+            "negatives": "Imóvel ocupado, necessita reformas",
+        }, ensure_ascii=False)
+        if invalid_draw < self.invalid_rate:
+            answer = answer[: len(answer) // 2]
+        prompt_tokens = max(1, len(prompt) // 4)
+        if not request.get("stream", True):
+            handler._send_json(200, {
+                "model": request.get("model"),
+                "response": answer,
+                "done": True,
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": max(1, len(answer) // 4),
+            })
+            return
+
+        # Streaming NDJSON: alguns caracteres por chunk e, no fim, o chunk "done" com as contagens de tokens
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.end_headers()
+        pieces = [answer[i:i + 4] for i in range(0, len(answer), 4)]
+        try:
+            for piece in pieces:
+                handler.wfile.write((json.dumps({"response": piece, "done": False}) + "\n").encode("utf-8"))
+                handler.wfile.flush()
+            # Texto extra depois do objeto JSON, como um modelo que continua gerando
+            handler.wfile.write((json.dumps({"response": "\n", "done": False}) + "\n").encode("utf-8"))
+            handler.wfile.write((json.dumps({
+                "response": "", "done": True, "prompt_eval_count": prompt_tokens, "eval_count": len(pieces) + 1,
+            }) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass # O cliente fechou a conexão assim que recebeu o JSON completo
+
+    def handle_embed(self, handler, request: dict):
+        texts = request.get("input", "")
+        embeddings = []
+        for text in [texts] if isinstance(texts, str) else texts:
+            vector = [0.0] * self.EMBED_DIMENSIONS
+            for word in re.findall(r"\w+", text.lower()):
+                vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.EMBED_DIMENSIONS] += 1.0
+            embeddings.append(vector)
+        handler._send_json(200, {"model": request.get("model"), "embeddings": embeddings})
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor Ollama falso (/api/generate e /api/embed) para testes e benchmarks.")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--num-parallel", type=int, default=4)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--invalid-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    fake = FakeOllamaServer(port=args.port, latency=args.latency, num_parallel=args.num_parallel,
+                            error_rate=args.error_rate, invalid_rate=args.invalid_rate)
+    print(f"Ollama falso ouvindo em {fake.url} (Ctrl+C para sair)")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,212 @@
+# fake_site.py
+import argparse
+import hashlib
+import html
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CITIES = [("São Paulo", "SP"), ("Campinas", "SP"), ("Rio de Janeiro", "RJ"), ("Belo Horizonte", "MG"),
+          ("Curitiba", "PR"), ("Porto Alegre", "RS"), ("Salvador", "BA"), ("Recife", "PE")]
+KINDS = ["Casa", "Apartamento", "Sobrado", "Terreno"]
+FEATURES = ["3 dormitórios, sendo 1 suíte", "2 vagas de garagem", "área de lazer com piscina", "quintal amplo",
+            "próximo ao metrô", "condomínio fechado com portaria 24h", "varanda gourmet", "imóvel desocupado",
+            "aceita FGTS", "escritura registrada", "área construída de 180 m²", "terreno de 300 m²"]
+
+_PAGE_RE = re.compile(r"pagina=(\d+)")
+_DETAIL_RE = re.compile(r"^/imoveis/([^/?#]+)/lote-(\d+)-(\d+)")
+
+# --- Site de leilões falso ---
+class FakeAuctionSite:
+    """
+    Servidor HTTP local que imita o site de leilões (páginas principais e de detalhes com a
+    marcação do megaleiloes), para benchmarks do pipeline sem acessar a rede.
+
+    Args:
+        pages (int): Número de páginas principais de cada categoria.
+        items_per_page (int): Cards por página principal.
+        latency (float): Tempo (segundos) de cada resposta.
+        seed (int): Semente dos textos gerados; o mesmo item tem sempre o mesmo conteúdo.
+        relist_rate (float): Fração dos itens que são o mesmo imóvel anunciado de novo: a posição
+            (página, índice) tem o mesmo conteúdo em todas as categorias, com outro link e número.
+
+    As URLs das categorias são `<base_url>/imoveis/<categoria>?tipo=1&pagina=` (ver `category_url`).
+    As respostas têm ETag; um If-None-Match com o ETag atual recebe 304 (contados em `not_modified`).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, pages: int = 5, items_per_page: int = 24,
+                 latency: float = 0.02, seed: int = 0, relist_rate: float = 0.0):
+        self.pages = pages
+        self.relist_rate = relist_rate
+        self.items_per_page = items_per_page
+        self.latency = latency
+        self.seed = seed
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def category_url(self, category: str) -> str:
+        return f"{self.base_url}/imoveis/{category}?tipo=1&pagina="
+
+    def _item(self, category: str, page: int, index: int) -> dict:
+        content_key = f"{self.seed}-{category}-{page}-{index}"
+        if random.Random(f"relist-{content_key}").random() < self.relist_rate:
+            content_key = f"{self.seed}-relist-{page}-{index}"
+        rng = random.Random(content_key)
+        city, uf = rng.choice(CITIES)
+        kind = rng.choice(KINDS)
+        price = rng.randint(80, 1500) * 1000
+        return {
+            "titulo": f"{kind} {rng.randint(40, 400)} m² - {city}/{uf}",
+            "preco": f"R$ {price:,.2f}".replace(",", "_").replace(".", ",").replace("_", "."),
+            "segundo": f"R$ {price // 2:,.2f}".replace(",", "_").replace(".", ",").replace("_", "."),
+            "localidade": f"{city}, {uf}",
+            "numero": f"X{page:03d}{index:03d}",
+            "link": f"{self.base_url}/imoveis/{category}/lote-{page}-{index}",
+            "data": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025 às 14:00",
+            "vara": f"{rng.randint(1, 40)}ª Vara Cível",
+            "forum": f"Foro Central de {city}",
+            "leiloeiro": rng.choice(["Fernando Cerello", "Marcelo Vieira", "Ana Souza"]),
+            "descricao": [f"{kind} localizado em {city}/{uf}, matrícula nº {rng.randint(1000, 99999)} do Registro de Imóveis."]
+                         + [f"O imóvel possui {feature}." for feature in rng.sample(FEATURES, 4)],
+            "condicoes": ["Pagamento à vista ou parcelado em até 30 vezes, com entrada de 25%.",
+                          f"Comissão do leiloeiro: 5% sobre o valor de arrematação. Débito desta ação: R$ {rng.randint(10, 90)}.000,00."],
+        }
+
+    def listing_page(self, category: str, page: int) -> str:
+        cards = []
+        for index in range(self.items_per_page if 1 <= page <= self.pages else 0):
+            item = {key: html.escape(value) if isinstance(value, str) else value
+                    for key, value in self._item(category, page, index).items()}
+            cards.append(f'''
+  <div class="col-sm-6 col-md-4 col-lg-3"><div class="card open">
+    <a class="card-image lazyload" href="{item["link"]}" data-bg="/foto/{page}-{index}.jpg"></a>
+    <div class="card-content">
+      <div class="card-number">{item["numero"]}</div>
+      <div class="card-status">Aberto para lances</div>
+      <a class="card-title" href="{item["link"]}">{item["titulo"]}</a>
+      <a class="card-locality" href="/imoveis/{category}">{item["localidade"]}</a>
+      <div class="card-price">{item["preco"]}</div>
+      <div class="card-instance-info">
+        <div class="card-first-instance-date"><span class="card-instance-title">1º Leilão</span> {item["data"]}</div>
+        <div class="card-first-instance-value"><span class="card-instance-title">Valor:</span> {item["preco"]}</div>
+        <div class="card-second-instance-value"><span class="card-instance-title">Valor:</span> {item["segundo"]}</div>
+      </div>
+    </div>
+  </div></div>''')
+        return f'''<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>Pesquisa | Mega Leilões</title>
+<script>var filtros = {{"pagina": {page}}};</script></head>
+<body class="search"><header class="header"><nav class="navbar"><a href="/imoveis">Imóveis</a></nav></header>
+<main class="container">
+<div class="summary">Exibindo {len(cards)} de {self.pages * self.items_per_page} resultados &mdash; Página {page} de {self.pages}</div>
+<div class="row cards">{"".join(cards)}
+</div></main>
+<footer class="footer"><p>&copy; Mega Leilões</p></footer></body></html>
+'''
+
+    def detail_page(self, category: str, page: int, index: int) -> str:
+        item = self._item(category, page, index)
+        description = "\n".join(f"<p>{html.escape(line)}</p>" for line in item["descricao"])
+        conditions = "\n".join(f"<p>{html.escape(line)}</p>" for line in item["condicoes"])
+        return f'''<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>{html.escape(item["titulo"])} | Mega Leilões</title></head>
+<body><main class="container batch"><div class="row"><div class="col-md-8">
+  <h1 class="section-header">{html.escape(item["titulo"])}</h1>
+  <div class="tab-content">
+    <div class="tab-pane active" id="tab-description"><div class="content">
+{description}
+    </div></div>
+    <div class="tab-pane" id="tab-contract"><div class="content">
+{conditions}
+    </div></div>
+  </div>
+</div>
+<div class="col-md-4"><div class="batch-info">
+  <div class="locality item"><div class="title">Localização</div><div class="value"> Rua {index + 1}, {page * 10}, {html.escape(item["localidade"])} </div></div>
+  <div class="jurisdiction item"><div class="title">Vara</div><div class="value">{html.escape(item["vara"])}</div></div>
+  <div class="forum item"><div class="title">Fórum</div><div class="value">{html.escape(item["forum"])}</div></div>
+  <div class="author item"><div class="title">Leiloeiro</div><div class="value"><a href="/leiloeiro">{html.escape(item["leiloeiro"])}</a></div></div>
+</div></div></div></main></body></html>
+'''
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.latency)
+                detail = _DETAIL_RE.match(self.path)
+                page = _PAGE_RE.search(self.path)
+                if detail:
+                    body = server.detail_page(detail.group(1), int(detail.group(2)), int(detail.group(3)))
+                elif self.path.startswith("/imoveis/") and page:
+                    category = self.path[len("/imoveis/"):].split("?", 1)[0]
+                    body = server.listing_page(category, int(page.group(1)))
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                etag = f'"{hashlib.sha256(data).hexdigest()[:16]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Site de leilões falso (páginas principais e de detalhes) para benchmarks.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--items-per-page", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--relist-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    site = FakeAuctionSite(port=args.port, pages=args.pages, items_per_page=args.items_per_page, latency=args.latency,
+                           relist_rate=args.relist_rate)
+    print(f"Site falso ouvindo em {site.category_url('casas')}1 (Ctrl+C para sair)")
+    try:
+        site._server.serve_forever()
+    except KeyboardInterrupt:
+        site.stop()
@@ -0,0 +1,113 @@
+# parser_backends.py
+import argparse
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+from modules.extractor import PARSER_PREFERENCE, available_backends, get_backend, total_pages_from_text
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LISTING_FIXTURE = os.path.join(FIXTURES_DIR, "listing_page.html")
+DETAIL_FIXTURE = os.path.join(FIXTURES_DIR, "detail_page.html")
+CARD_CONTAINER_CLASS = "card-content"
+SUMMARY_CLASS = "summary"
+
+# --- Extração de referência (página inteira no html.parser, como o scraper fazia) ---
+def reference_listing(html: str) -> tuple:
+    soup = BeautifulSoup(html, "html.parser")
+    summary_element = soup.find("div", class_=SUMMARY_CLASS)
+    total_pages = total_pages_from_text(summary_element.text.strip()) if summary_element else 1
+    cards = []
+    for card in soup.find_all("div", class_=CARD_CONTAINER_CLASS):
+        name_tag = card.select_one("a.card-title")
+        price_tag = card.select_one("div.card-price")
+        locality_tag_main = card.select_one("a.card-locality")
+        number_tag = card.select_one("div.card-number")
+        first_date_tag = card.select_one(".card-first-instance-date")
+        first_value_tag = card.select_one(".card-first-instance-value")
+        second_value_tag = card.select_one(".card-second-instance-value")
+        cards.append({
+            "titulo": name_tag.text.strip() if name_tag else "Título não encontrado",
+            "preco": price_tag.text.strip() if price_tag else "Preço não encontrado",
+            "localidade_pagina_principal": locality_tag_main.text.strip() if locality_tag_main else "Localidade (principal) não encontrada",
+            "numero_leilao": number_tag.text.strip() if number_tag else "Número do leilão não encontrado",
+            "link_detalhes": name_tag.get('href') if name_tag else "Link não encontrado",
+            "data_leilao": first_date_tag.text.strip() if first_date_tag else None,
+            "preco_primeiro_leilao": first_value_tag.text.strip() if first_value_tag else None,
+            "preco_segundo_leilao": second_value_tag.text.strip() if second_value_tag else None,
+        })
+    return total_pages, cards
+
+def reference_details(html: str) -> dict:
+    soup_details = BeautifulSoup(html, "html.parser")
+    details = {}
+    for field, selector in (("localizacao_detalhada", "div.locality div.value"), ("vara", "div.jurisdiction div.value"),
+                            ("forum", "div.forum div.value"), ("leiloeiro", "div.author div.value")):
+        elem = soup_details.select_one(selector)
+        details[field] = elem.get_text(strip=True) if elem else None
+    for field, selector in (("descricao_completa", "div#tab-description div.content"),
+                            ("condicoes_pagamento", "div#tab-contract div.content")):
+        elem = soup_details.select_one(selector)
+        details[field] = elem.get_text(separator="\n", strip=True) if elem else None
+    return details
+
+# --- Equivalência e benchmark ---
+def _time_per_call(function, html: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(html)
+    return (time.perf_counter() - start) / repeat
+
+def check_equivalence(backend_name: str, listing_html: str, detail_html: str) -> list:
+    """
+    Compara a saída do backend com a extração de referência. Retorna a lista de diferenças (vazia se idênticas).
+    """
+    backend = get_backend(backend_name)
+    differences = []
+    if backend.parse_listing(listing_html, CARD_CONTAINER_CLASS, SUMMARY_CLASS) != reference_listing(listing_html):
+        differences.append("página principal")
+    details = backend.parse_details(detail_html)
+    for field, expected in reference_details(detail_html).items():
+        if expected is not None and details[field] != expected:
+            differences.append(f"detalhes: {field}")
+    return differences
+
+def run_benchmark(backends: list, repeat: int = 50) -> bool:
+    with open(LISTING_FIXTURE, encoding="utf-8") as f:
+        listing_html = f.read()
+    with open(DETAIL_FIXTURE, encoding="utf-8") as f:
+        detail_html = f.read()
+
+    reference_listing_time = _time_per_call(reference_listing, listing_html, repeat)
+    reference_detail_time = _time_per_call(reference_details, detail_html, repeat)
+    print(f"{'parser':<22}{'principal (ms)':>16}{'detalhes (ms)':>16}{'ganho':>8}  equivalente")
+    print(f"{'referência (antes)':<22}{reference_listing_time * 1000:>16.2f}{reference_detail_time * 1000:>16.2f}{'1.0x':>8}  -")
+
+    all_equivalent = True
+    for name in backends:
+        backend = get_backend(name)
+        differences = check_equivalence(name, listing_html, detail_html)
+        all_equivalent &= not differences
+        listing_time = _time_per_call(lambda html: backend.parse_listing(html, CARD_CONTAINER_CLASS, SUMMARY_CLASS),
+                                      listing_html, repeat)
+        detail_time = _time_per_call(backend.parse_details, detail_html, repeat)
+        speedup = (reference_listing_time + reference_detail_time) / (listing_time + detail_time)
+        status = "sim" if not differences else f"NÃO ({', '.join(differences)})"
+        print(f"{name:<22}{listing_time * 1000:>16.2f}{detail_time * 1000:>16.2f}{speedup:>7.1f}x  {status}")
+    return all_equivalent
+
+
+if __name__ == "__main__":
+    # Uso (a partir da raiz do projeto): python -m benchmarks.parser_backends [--backends lxml html.parser]
+    parser = argparse.ArgumentParser(description="Verifica a equivalência e mede a velocidade dos parsers de HTML nas páginas salvas.")
+    parser.add_argument("--backends", nargs="+", choices=PARSER_PREFERENCE, default=None,
+                        help="Parsers a testar (padrão: todos os instalados).")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    backends = args.backends or available_backends()
+    missing = [name for name in PARSER_PREFERENCE if name not in available_backends()]
+    if missing:
+        print(f"Não instalados (ignorados): {', '.join(missing)}.")
+    sys.exit(0 if run_benchmark(backends, args.repeat) else 1)
@@ -0,0 +1,150 @@
+# run_benchmark.py
+import argparse
+import glob
+import json
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.fake_site import FakeAuctionSite
+from modules.metrics import configure_metrics, metrics
+from modules.pipeline import run_pipeline
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+CARD_CONTAINER_CLASS = "card-content"
+SUMMARY_CLASS = "summary"
+# Indicadores comparados entre execuções (maior é melhor, exceto a memória)
+THROUGHPUT_KEYS = ("pages_per_s", "items_per_s", "llm_calls_per_s", "db_rows_per_s")
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return None
+    # ru_maxrss é em KiB no Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+# --- Benchmark do pipeline completo ---
+def run_benchmark(categories: int = 2, pages: int = 5, items_per_page: int = 24, site_latency: float = 0.02,
+                  llm_latency: float = 0.2, num_parallel: int = 4, eval_workers: int = 4, max_workers: int = 8,
+                  requests_per_second: float = None, parser: str = None, relist_rate: float = 0.0,
+                  dedup_method: str = "minhash") -> dict:
+    """
+    Roda o pipeline (scraping -> pré-filtro -> Ollama -> banco) contra o site e o Ollama falsos,
+    em um diretório temporário, e mede a vazão de cada etapa e o pico de memória.
+
+    Returns:
+        dict: Configuração, resultados (pages_per_s, items_per_s, llm_calls_per_s, db_rows_per_s,
+              peak_python_mb, peak_rss_mb), contadores e latências por etapa.
+    """
+    config = {"categories": categories, "pages": pages, "items_per_page": items_per_page,
+              "site_latency": site_latency, "llm_latency": llm_latency, "num_parallel": num_parallel,
+              "eval_workers": eval_workers, "max_workers": max_workers,
+              "requests_per_second": requests_per_second, "parser": parser, "relist_rate": relist_rate,
+              "dedup_method": dedup_method}
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            FakeAuctionSite(pages=pages, items_per_page=items_per_page, latency=site_latency,
+                            relist_rate=relist_rate) as site, \
+            FakeOllamaServer(latency=llm_latency, num_parallel=num_parallel) as ollama:
+        urls = {f"categoria{i}": site.category_url(f"categoria{i}") for i in range(categories)}
+        configure_metrics(True, log_file=None, prometheus_file=None)
+        tracemalloc.start()
+        start = time.perf_counter()
+        stats = run_pipeline(urls, CARD_CONTAINER_CLASS, SUMMARY_CLASS,
+                             output_file=os.path.join(tmp_dir, "raw.jsonl"), db_name=os.path.join(tmp_dir, "bench.db"),
+                             score_threshold=7, eval_workers=eval_workers, time_delay=0, max_workers=max_workers,
+                             requests_per_second=requests_per_second, use_cache=False, ollama_api_url=ollama.url,
+                             parser=parser, dedup_method=dedup_method)
+        elapsed = time.perf_counter() - start
+        _, peak_python = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot = metrics.snapshot()
+
+    counters = snapshot["counters"]
+    pages_fetched = counters.get("listing_pages", 0) + counters.get("detail_pages", 0)
+    results = {
+        "elapsed_s": round(elapsed, 3),
+        "pages_per_s": round(pages_fetched / elapsed, 2),
+        "items_per_s": round(stats["scraped"] / elapsed, 2),
+        "llm_calls_per_s": round(counters.get("llm_calls", 0) / elapsed, 2),
+        "llm_calls_deduplicated": counters.get("llm_calls_deduplicated", 0),
+        "db_rows_per_s": round(counters.get("db_rows_written", 0) / elapsed, 2),
+        "peak_python_mb": round(peak_python / 1024 ** 2, 1),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    return {"timestamp": datetime.now().isoformat(timespec="seconds"), "commit": _git_commit(), "config": config,
+            "results": results, "pipeline": stats, **snapshot}
+
+# --- Resultados salvos ---
+def save_result(result: dict, results_dir: str = RESULTS_DIR) -> str:
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{datetime.now():%Y%m%d_%H%M%S}_{result['commit'] or 'local'}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return path
+
+def load_previous_result(results_dir: str = RESULTS_DIR, config: dict = None, exclude: str = None) -> dict:
+    """
+    Resultado salvo mais recente (com a mesma configuração, se `config` for informada).
+    """
+    for path in sorted(glob.glob(os.path.join(results_dir, "*.json")), reverse=True):
+        if exclude and os.path.abspath(path) == os.path.abspath(exclude):
+            continue
+        with open(path, encoding="utf-8") as f:
+            result = json.load(f)
+        if config is None or result.get("config") == config:
+            return result
+    return None
+
+def print_report(result: dict, previous: dict = None):
+    results = result["results"]
+    print(f"\n{'indicador':<18}{'atual':>12}{'anterior':>12}{'variação':>10}")
+    for key in THROUGHPUT_KEYS + ("llm_calls_deduplicated", "peak_python_mb", "peak_rss_mb", "elapsed_s"):
+        value = results.get(key)
+        old = previous["results"].get(key) if previous else None
+        change = f"{(value - old) / old:+.0%}" if value is not None and old else "-"
+        print(f"{key:<18}{value if value is not None else '-':>12}{old if old is not None else '-':>12}{change:>10}")
+    print("\nLatência por etapa (s):")
+    for name, latency in sorted(result["latencies"].items()):
+        print(f"  {name:<16} n={latency['count']:<6} p50={latency['p50']:.3f} p95={latency['p95']:.3f} max={latency['max']:.3f}")
+
+
+if __name__ == "__main__":
+    # Uso (a partir da raiz do projeto): python -m benchmarks.run_benchmark [--pages 10 --llm-latency 0.5]
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline completo contra um site e um Ollama falsos.")
+    parser.add_argument("--categories", type=int, default=2)
+    parser.add_argument("--pages", type=int, default=5, help="Páginas principais por categoria.")
+    parser.add_argument("--items-per-page", type=int, default=24)
+    parser.add_argument("--site-latency", type=float, default=0.02, help="Latência (s) de cada página do site falso.")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Latência (s) de cada geração do Ollama falso.")
+    parser.add_argument("--num-parallel", type=int, default=4, help="Gerações simultâneas do Ollama falso.")
+    parser.add_argument("--eval-workers", type=int, default=4)
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument("--requests-per-second", type=float, default=None)
+    parser.add_argument("--parser", default=None)
+    parser.add_argument("--relist-rate", type=float, default=0.0, help="Fração de imóveis anunciados de novo em outra categoria.")
+    parser.add_argument("--dedup", default="minhash", help='Detecção de quase-duplicatas: "minhash", "ollama" ou "none".')
+    parser.add_argument("--no-save", action="store_true", help="Não grava o resultado em benchmarks/results.")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.categories, args.pages, args.items_per_page, args.site_latency, args.llm_latency,
+                           args.num_parallel, args.eval_workers, args.max_workers, args.requests_per_second, args.parser,
+                           args.relist_rate, None if args.dedup == "none" else args.dedup)
+    previous = load_previous_result(config=result["config"])
+    print_report(result, previous)
+    if not args.no_save:
+        print(f"\nResultado salvo em '{save_result(result)}'.")
@@ -5,10 +5,27 @@ URLS= {
 }
 CARD_CONTAINER_CLASS = "card-content"
 SUMMARY_CLASS = "summary"
+SCRAP_MAX_WORKERS = 8 # Número de requisições simultâneas do scraper (1 = sequencial)
+SCRAP_REQUESTS_PER_SECOND = 4.0 # Limite de requisições por segundo ao site de leilões
+CRAWL_INCREMENTAL = True # Pula itens já conhecidos e inalterados e retoma cada categoria do último checkpoint
+CRAWL_STATE_DB = "data/crawl_state.db" # Checkpoints por categoria e índice de leilões já conhecidos
+CRAWL_CATEGORY_WORKERS = 3 # Categorias de URLS raspadas ao mesmo tempo, sob o mesmo limite de requisições por segundo
+CRAWL_PROCESSES = 0 # Processos de crawl com fila durável (retomada exata após interrupções); 0 = threads no processo da atualização
+CRAWL_FRONTIER_DB = "data/crawl_frontier.db" # Fila de trabalho dos processos de crawl e limite de taxa comum a eles
+HTTP_CACHE_DIR = "data/http_cache" # Cache das respostas do site (None desativa); páginas de detalhes são revalidadas com ETag/Last-Modified
+HTTP_REPLAY = False # True: raspa só a partir do cache HTTP, sem acessar o site (depuração e testes)
+PARSER_BACKEND = "auto" # Parser de HTML: "selectolax", "lxml", "html.parser" ou "auto" (o mais rápido instalado)
+METRICS_ENABLED = True # Tempos e contadores por etapa; o resumo de cada execução vai para a tabela metricas_execucoes
+METRICS_LOG_FILE = "data/metrics.jsonl" # Log estruturado das execuções (um JSON por linha)
+METRICS_PROMETHEUS_FILE = None # Ex.: "data/metrics.prom" para o textfile collector do Prometheus (None desativa)
 
-JSON_FILE = "data/leiloes_raspados_raw.json" # Nome do arquivo JSON de saída
+JSON_FILE = "data/leiloes_raspados_raw.jsonl" # Base dos arquivos JSONL de saída: um por categoria (ex.: data/leiloes_raspados_raw_casas.jsonl)
 DB_NAME = "data/imoveis_interessantes.db" # Nome do arquivo do banco de dados SQLite
 
 OLLAMA_API_URL = "http://localhost:11434/api/generate" # URL da API do Ollama (ajuste se for diferente)
 OLLAMA_MODEL = "gemma3:27b" # O modelo Ollama que você está usando (ex: llama3, mistral, etc.)
+OLLAMA_SCREENING_MODEL = "gemma3:4b" # Cascata: modelo pequeno que avalia todos os imóveis primeiro (None desativa a cascata)
+CASCADE_MARGIN = 2 # Só notas da triagem a até 2 pontos da fronteira do limiar (5 a 8, com limiar 7) vão para OLLAMA_MODEL
+EVAL_WORKERS = 4 # Máximo de avaliações simultâneas no Ollama (ajuste ao OLLAMA_NUM_PARALLEL do servidor)
+DEDUP_METHOD = "minhash" # Quase-duplicatas (mesmo imóvel anunciado de novo) reaproveitam a avaliação: "minhash", "ollama" (embeddings) ou None
 SCORE_THRESHOLD = 7 # Pontuação mínima para salvar o imóvel no banco de dados
\ No newline at end of file
@@ -1,36 +1,227 @@
+import argparse
+import json
+import os
 import sqlite3
+from datetime import datetime
+
 import pandas as pd
-import re
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# --- Configurações ---
+CAMINHO_BANCO = 'data/imoveis_interessantes_mistral.db' # Banco de dados SQLite exportado
+PASTA_SAIDA = 'data' # Pasta dos arquivos gerados
+ARQUIVO_EXCEL = 'banco_convertido.xlsx' # Uma planilha por tabela
+ARQUIVO_ESTADO = 'data/exportacao_estado.json' # Último id/data_avaliacao exportados de cada tabela (exportação incremental)
+TAMANHO_LOTE = 5000 # Linhas lidas do banco por vez: a memória usada não depende do tamanho da tabela
+FORMATOS = ("xlsx", "csv", "parquet")
+MAX_LINHAS_EXCEL = 1048576 # Limite de linhas de uma planilha do Excel (incluindo o cabeçalho)
+
+# Caracteres de controle que o Excel não aceita
+CARACTERES_ILEGAIS = r"[\x00-\x08\x0B\x0C\x0E-\x1F]"
+# Tipo declarado no SQLite -> tipo no Parquet (o esquema não depende dos valores do primeiro lote)
+TIPOS_PARQUET = {"INTEGER": "int64", "REAL": "float64"}
 
 # Função para remover caracteres ilegais
-def remover_caracteres_ilegais(df):
-    def limpar(texto):
-        if isinstance(texto, str):
-            return re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F]", "", texto)
-        return texto
-    return df.applymap(limpar)
-
-# Caminho para seu banco de dados SQLite
-caminho_banco = 'data/imoveis_interessantes_mistral.db'
-
-# Conectando ao banco
-conn = sqlite3.connect(caminho_banco)
-cursor = conn.cursor()
-
-# Obtendo os nomes das tabelas
-cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-tabelas = [linha[0] for linha in cursor.fetchall()]
-
-# Criando o arquivo Excel com múltiplas planilhas
-with pd.ExcelWriter("data/banco_convertido.xlsx") as writer:
-    for tabela in tabelas:
-        df = pd.read_sql_query(f"SELECT * FROM {tabela}", conn)
-        df = remover_caracteres_ilegais(df)
-        df.to_excel(writer, sheet_name=tabela[:31], index=False)  # Excel aceita máx. 31 caracteres no nome da planilha
-
-# Exportando também para CSV
-for tabela in tabelas:
-    df = pd.read_sql_query(f"SELECT * FROM {tabela}", conn)
-    df.to_csv(f"data/{tabela}.csv", index=False)
-
-conn.close()
+def remover_caracteres_ilegais(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Remove os caracteres ilegais das colunas de texto, uma coluna inteira por vez (operação vetorizada).
+    Colunas que não são de texto ficam como estão.
+    """
+    for coluna in df.columns:
+        if df[coluna].dtype == object and pd.api.types.infer_dtype(df[coluna], skipna=True) == "string":
+            df[coluna] = df[coluna].str.replace(CARACTERES_ILEGAIS, "", regex=True)
+    return df
+
+# --- Seleção das tabelas e das linhas ---
+def listar_tabelas(conn: sqlite3.Connection) -> list:
+    """
+    Tabelas de dados do banco, sem as internas do SQLite, os índices FTS5 e as tabelas auxiliares deles.
+    """
+    linhas = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY rowid").fetchall()
+    virtuais = [nome for nome, sql in linhas if (sql or "").upper().startswith("CREATE VIRTUAL TABLE")]
+    return [nome for nome, _ in linhas if not any(nome == v or nome.startswith(f"{v}_") for v in virtuais)]
+
+def colunas_da_tabela(conn: sqlite3.Connection, tabela: str) -> list:
+    """
+    Pares (coluna, tipo declarado) da tabela.
+    """
+    return [(linha[1], (linha[2] or "").upper()) for linha in conn.execute(f'PRAGMA table_info("{tabela}")')]
+
+def carregar_estado(caminho: str) -> dict:
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def salvar_estado(caminho: str, estado: dict):
+    tmp = f"{caminho}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, caminho)
+
+def consulta_da_tabela(tabela: str, colunas: list, estado_tabela: dict) -> tuple:
+    """
+    SQL e parâmetros da leitura da tabela. Na exportação incremental (com `estado_tabela`), só as
+    linhas novas (id maior que o último exportado) ou alteradas (data_avaliacao a partir da última
+    exportada; as linhas dessa mesma data saem de novo para não perder nenhuma gravada no mesmo segundo).
+    """
+    nomes = {nome for nome, _ in colunas}
+    if not estado_tabela or not {"id", "data_avaliacao"} <= nomes:
+        return f'SELECT * FROM "{tabela}"', ()
+    return (f'SELECT * FROM "{tabela}" WHERE id > ? OR data_avaliacao >= ? ORDER BY id',
+            (estado_tabela.get("ultimo_id", 0), estado_tabela.get("ultima_data_avaliacao", "")))
+
+# --- Saídas (escritas lote a lote) ---
+class SaidaCsv:
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.primeiro_lote = True
+
+    def escrever(self, df: pd.DataFrame):
+        df.to_csv(self.caminho, mode="w" if self.primeiro_lote else "a", header=self.primeiro_lote, index=False)
+        self.primeiro_lote = False
+
+    def fechar(self):
+        pass
+
+class SaidaParquet:
+    def __init__(self, caminho: str, colunas: list):
+        self.caminho = caminho
+        self.esquema = pa.schema([(nome, pa.type_for_alias(TIPOS_PARQUET.get(tipo, "string"))) for nome, tipo in colunas])
+        self.writer = pq.ParquetWriter(caminho, self.esquema)
+
+    def escrever(self, df: pd.DataFrame):
+        self.writer.write_table(pa.Table.from_pandas(df, schema=self.esquema, preserve_index=False))
+
+    def fechar(self):
+        self.writer.close()
+
+class PlanilhaExcel:
+    """
+    Uma planilha do arquivo Excel, escrita linha a linha (o workbook usa constant_memory,
+    então cada linha vai para o disco assim que a seguinte começa).
+    """
+
+    def __init__(self, workbook, tabela: str, colunas: list):
+        self.tabela = tabela
+        self.planilha = workbook.add_worksheet(tabela[:31]) # Excel aceita máx. 31 caracteres no nome da planilha
+        self.planilha.write_row(0, 0, [nome for nome, _ in colunas])
+        self.proxima_linha = 1
+        self.truncada = False
+
+    def escrever(self, df: pd.DataFrame):
+        linhas = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        for linha in linhas:
+            if self.proxima_linha >= MAX_LINHAS_EXCEL:
+                if not self.truncada:
+                    print(f"  > A tabela '{self.tabela}' passou de {MAX_LINHAS_EXCEL} linhas: o restante só vai para CSV/Parquet.")
+                    self.truncada = True
+                return
+            self.planilha.write_row(self.proxima_linha, 0, linha)
+            self.proxima_linha += 1
+
+    def fechar(self):
+        pass
+
+# --- Exportação ---
+def exportar(caminho_banco: str = CAMINHO_BANCO, formatos=FORMATOS, incremental: bool = False, tabelas: list = None,
+             pasta_saida: str = PASTA_SAIDA, arquivo_estado: str = ARQUIVO_ESTADO, tamanho_lote: int = TAMANHO_LOTE) -> dict:
+    """
+    Exporta as tabelas do banco para Excel, CSV e/ou Parquet em uma única leitura de cada tabela,
+    lote a lote. Com `incremental`, só exporta as linhas novas ou alteradas desde a última exportação
+    (para arquivos com a data/hora no nome); tabelas sem as colunas id e data_avaliacao saem completas.
+    Toda exportação atualiza `arquivo_estado`.
+
+    Returns:
+        dict: Número de linhas exportadas por tabela.
+    """
+    formatos = list(formatos)
+    if "xlsx" in formatos and xlsxwriter is None:
+        print("Pacote 'xlsxwriter' não instalado. Exportação para Excel ignorada.")
+        formatos.remove("xlsx")
+    if "parquet" in formatos and pa is None:
+        print("Pacote 'pyarrow' não instalado. Exportação para Parquet ignorada.")
+        formatos.remove("parquet")
+
+    os.makedirs(pasta_saida, exist_ok=True)
+    estado = carregar_estado(arquivo_estado) if incremental else {}
+    sufixo = f"_incremental_{datetime.now():%Y%m%d_%H%M%S}" if incremental else ""
+
+    # Conectando ao banco (somente leitura)
+    conn = sqlite3.connect(f"file:{caminho_banco}?mode=ro", uri=True)
+    workbook = None
+    if "xlsx" in formatos:
+        nome_excel, extensao = os.path.splitext(ARQUIVO_EXCEL)
+        workbook = xlsxwriter.Workbook(os.path.join(pasta_saida, f"{nome_excel}{sufixo}{extensao}"), {"constant_memory": True})
+
+    exportadas = {}
+    try:
+        for tabela in tabelas or listar_tabelas(conn):
+            colunas = colunas_da_tabela(conn, tabela)
+            nomes = [nome for nome, _ in colunas]
+            saidas = []
+            if workbook is not None:
+                saidas.append(PlanilhaExcel(workbook, tabela, colunas))
+            if "csv" in formatos:
+                saidas.append(SaidaCsv(os.path.join(pasta_saida, f"{tabela}{sufixo}.csv")))
+            if "parquet" in formatos:
+                saidas.append(SaidaParquet(os.path.join(pasta_saida, f"{tabela}{sufixo}.parquet"), colunas))
+
+            sql, parametros = consulta_da_tabela(tabela, colunas, estado.get(tabela))
+            total = 0
+            ultimo_id, ultima_data = None, None
+            # Uma única leitura da tabela, em lotes; cada lote vai para todas as saídas
+            for lote in pd.read_sql_query(sql, conn, params=parametros, chunksize=tamanho_lote):
+                lote = remover_caracteres_ilegais(lote)
+                for saida in saidas:
+                    saida.escrever(lote)
+                total += len(lote)
+                if "id" in nomes and not lote.empty:
+                    ultimo_id = max(ultimo_id or 0, int(lote["id"].max()))
+                if "data_avaliacao" in nomes and lote["data_avaliacao"].notna().any():
+                    ultima_data = max(ultima_data or "", lote["data_avaliacao"].max())
+            if total == 0 and "csv" in formatos:
+                # Tabela vazia (ou sem novidades): o CSV ainda sai com o cabeçalho
+                SaidaCsv(os.path.join(pasta_saida, f"{tabela}{sufixo}.csv")).escrever(pd.DataFrame(columns=nomes))
+            for saida in saidas:
+                saida.fechar()
+
+            exportadas[tabela] = total
+            print(f"Tabela '{tabela}': {total} linhas exportadas ({', '.join(formatos)}).")
+            if ultimo_id is not None or ultima_data is not None:
+                anterior = estado.get(tabela, {})
+                estado[tabela] = {
+                    "ultimo_id": max(ultimo_id or 0, anterior.get("ultimo_id", 0)),
+                    "ultima_data_avaliacao": max(ultima_data or "", anterior.get("ultima_data_avaliacao", "")),
+                }
+    finally:
+        if workbook is not None:
+            workbook.close()
+        conn.close()
+
+    # O estado é sempre gravado, para que a próxima exportação incremental parta desta
+    salvar_estado(arquivo_estado, {**carregar_estado(arquivo_estado), **estado})
+    return exportadas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta as tabelas do banco SQLite para Excel, CSV e Parquet.")
+    parser.add_argument("--banco", default=CAMINHO_BANCO, help="Caminho do banco SQLite.")
+    parser.add_argument("--formatos", nargs="+", choices=FORMATOS, default=list(FORMATOS))
+    parser.add_argument("--tabelas", nargs="+", default=None, help="Tabelas a exportar (padrão: todas).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Exporta só as linhas novas ou alteradas desde a última exportação.")
+    parser.add_argument("--pasta-saida", default=PASTA_SAIDA)
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE)
+    args = parser.parse_args()
+    exportar(args.banco, args.formatos, args.incremental, args.tabelas, args.pasta_saida, tamanho_lote=args.tamanho_lote)
@@ -1,64 +1,46 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
-from configs import *
 from modules import *
-
-# Função que roda o scraping e salva no banco
-def rodar_scraper_e_processar():
-    for classification in URLS:
-        run_scrap(
-            base_url=URLS[classification], 
-            card_container_class=CARD_CONTAINER_CLASS,
-            summary_class=SUMMARY_CLASS,
-            output_file=JSON_FILE,
-            time_delay=0.15
-        )
-
-        process_and_save_data(
-            input_json_file=JSON_FILE,
-            db_name=DB_NAME,
-            score_threshold=7    
-        )
+from configs import * # Depois de modules: as configurações daqui valem sobre os padrões dos módulos
+from modules.viewer import render_analytics, render_refresh_panel, render_viewer
+
+# Parâmetros da atualização (scraping e avaliação), que roda em um processo separado (modules/jobs.py)
+def parametros_da_atualizacao() -> dict:
+    # Categorias raspadas em paralelo; scraping, avaliação e gravação também: cada imóvel
+    # (uma única vez, mesmo se listado em mais de uma categoria) é avaliado assim que é raspado
+    return dict(
+        urls=URLS,
+        card_container_class=CARD_CONTAINER_CLASS,
+        summary_class=SUMMARY_CLASS,
+        output_file=JSON_FILE,
+        db_name=DB_NAME,
+        score_threshold=SCORE_THRESHOLD,
+        eval_workers=EVAL_WORKERS,
+        time_delay=0.15,
+        max_workers=SCRAP_MAX_WORKERS,
+        requests_per_second=SCRAP_REQUESTS_PER_SECOND,
+        incremental=CRAWL_INCREMENTAL,
+        state_db=CRAWL_STATE_DB,
+        parser=PARSER_BACKEND,
+        http_cache_dir=HTTP_CACHE_DIR,
+        replay=HTTP_REPLAY,
+        category_workers=CRAWL_CATEGORY_WORKERS,
+        crawl_processes=CRAWL_PROCESSES,
+        frontier_db=CRAWL_FRONTIER_DB,
+        dedup_method=DEDUP_METHOD,
+        ollama_model=OLLAMA_MODEL,
+        ollama_api_url=OLLAMA_API_URL,
+        screening_model=OLLAMA_SCREENING_MODEL,
+        cascade_margin=CASCADE_MARGIN,
+        metrics=dict(enabled=METRICS_ENABLED, log_file=METRICS_LOG_FILE, prometheus_file=METRICS_PROMETHEUS_FILE)
+    )
 
 st.title("Imóveis em Leilão - Visualizador")
 
-# 🔥 Botão para executar o scraper
-if st.button("🔄 Atualizar Dados (Rodar Scraper)"):
-    with st.spinner("Executando scraping e atualizando banco de dados..."):
-        rodar_scraper_e_processar()
-    st.success("Dados atualizados com sucesso!")
-
-# Conectar ao banco atualizado
-conn = sqlite3.connect(DB_NAME)
-df = pd.read_sql("SELECT * FROM imoveis", conn)
-
-# Contagem de imóveis por cidade
-contagem = df['localidade_pagina_principal'].value_counts().to_dict()
-
-# Gerar lista de opções com quantidade
-opcoes = [f"{cidade} ({contagem[cidade]})" for cidade in sorted(contagem.keys())]
-
-# Selectbox
-cidade_selecionada = st.selectbox("Selecione a cidade:", opcoes)
-
-# Extrair cidade
-cidade = cidade_selecionada.split(' (')[0]
+# 🔥 Botão para executar o scraper em segundo plano: a página continua respondendo e mostra o progresso
+render_refresh_panel(DB_NAME, parametros_da_atualizacao())
 
-# Filtrar
-df_filtrado = df[df['localidade_pagina_principal'] == cidade]
+# Preços, pontuações e quantidades por UF, cidade, leiloeiro e fórum, lidos das tabelas de agregados
+render_analytics(DB_NAME)
 
-# Mostrar cards
-for _, row in df_filtrado.iterrows():
-    st.subheader(row['titulo'])
-    st.markdown(f"**Preço:** {row['preco']}")
-    st.markdown(f"**Localização:** {row['localizacao_detalhada']}")
-    st.markdown(f"**Leiloeiro:** {row['leiloeiro']}")
-    st.markdown(f"[🔗 Link para o leilão]({row['link_detalhes']})")
-    with st.expander("📝 Descrição completa"):
-        st.write(row['descricao_completa'])
-    with st.expander("✅ Pontos Positivos"):
-        st.write(row['pontos_positivos'])
-    with st.expander("⚠️ Pontos Negativos"):
-        st.write(row['pontos_negativos'])
-    st.divider()
+# Filtros, paginação e cards: as consultas são feitas em SQL e ficam em cache até o banco mudar
+render_viewer(DB_NAME, SCORE_THRESHOLD)
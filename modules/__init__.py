@@ -1,2 +1,3 @@
 from .processor import *
-from .scrapper import *
\ No newline at end of file
+from .scrapper import *
+from .pipeline import *
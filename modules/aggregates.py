@@ -0,0 +1,178 @@
+# aggregates.py
+import sqlite3
+
+# --- Configurações ---
+# Faixas de preço (preco_valor) dos histogramas: faixa i vai de PRICE_BUCKET_EDGES[i - 1] (inclusive) a PRICE_BUCKET_EDGES[i]
+PRICE_BUCKET_EDGES = (50_000, 100_000, 200_000, 300_000, 500_000, 750_000, 1_000_000, 1_500_000, 2_000_000, 3_000_000, 5_000_000)
+# Agrupamentos mantidos: dimensão -> chave do imóvel ({r} é "new", "old" ou "imoveis"); '' = não informado
+AGGREGATE_DIMENSIONS = {
+    "total": "''",
+    "uf": "COALESCE({r}.uf, '')",
+    "cidade": "CASE WHEN {r}.cidade IS NULL THEN '' ELSE {r}.cidade || '/' || COALESCE({r}.uf, '') END",
+    "leiloeiro": "COALESCE(TRIM({r}.leiloeiro), '')",
+    "forum": "COALESCE(TRIM({r}.forum), '')",
+}
+# Período (aaaa-mm): mês do 1º leilão ou, sem data do leilão, mês em que o imóvel foi gravado pela primeira vez
+# (`data_inclusao`, que uma reavaliação não altera, ao contrário de `data_avaliacao`)
+PERIOD_SQL = "COALESCE(substr({r}.data_leilao, 1, 7), substr({r}.data_inclusao, 1, 7), '')"
+# Colunas que mudam os agregados de um imóvel (o trigger de UPDATE só trabalha quando o valor de uma delas muda)
+AGGREGATED_COLUMNS = ("cidade", "uf", "leiloeiro", "forum", "preco_valor", "pontuacao_ollama", "data_leilao", "data_inclusao")
+
+def _price_bucket_sql(r: str) -> str:
+    cases = " ".join(f"WHEN {r}.preco_valor < {edge} THEN {i}" for i, edge in enumerate(PRICE_BUCKET_EDGES))
+    return f"CASE WHEN {r}.preco_valor IS NULL THEN NULL {cases} ELSE {len(PRICE_BUCKET_EDGES)} END"
+
+def _histograms(r: str) -> dict:
+    # Métrica -> faixa do imóvel (NULL: o imóvel não entra no histograma)
+    return {"preco": _price_bucket_sql(r), "pontuacao": f"{r}.pontuacao_ollama"}
+
+def price_bucket_label(bucket: int) -> str:
+    """
+    Rótulo da faixa de preço: "até R$ 50 mil", "R$ 50 mil a 100 mil", ..., "R$ 5 mi ou mais".
+    """
+    def brl(value: int) -> str:
+        return f"{value / 1_000_000:g} mi" if value >= 1_000_000 else f"{value // 1000} mil"
+    if bucket == 0:
+        return f"até R$ {brl(PRICE_BUCKET_EDGES[0])}"
+    if bucket >= len(PRICE_BUCKET_EDGES):
+        return f"R$ {brl(PRICE_BUCKET_EDGES[-1])} ou mais"
+    return f"R$ {brl(PRICE_BUCKET_EDGES[bucket - 1])} a {brl(PRICE_BUCKET_EDGES[bucket])}"
+
+# --- SQL dos triggers ---
+def _add_statements(r: str) -> list:
+    statements = []
+    for dimension, key_sql in AGGREGATE_DIMENSIONS.items():
+        key, period = key_sql.format(r=r), PERIOD_SQL.format(r=r)
+        statements.append(f'''
+            INSERT INTO agregados_imoveis VALUES (
+                '{dimension}', {key}, {period}, 1,
+                {r}.preco_valor IS NOT NULL, COALESCE({r}.preco_valor, 0), {r}.preco_valor, {r}.preco_valor,
+                {r}.pontuacao_ollama IS NOT NULL, COALESCE({r}.pontuacao_ollama, 0), {r}.pontuacao_ollama, {r}.pontuacao_ollama
+            ) ON CONFLICT (dimensao, chave, periodo) DO UPDATE SET
+                quantidade = quantidade + 1,
+                quantidade_preco = quantidade_preco + excluded.quantidade_preco,
+                soma_preco = soma_preco + excluded.soma_preco,
+                min_preco = COALESCE(MIN(min_preco, excluded.min_preco), min_preco, excluded.min_preco),
+                max_preco = COALESCE(MAX(max_preco, excluded.max_preco), max_preco, excluded.max_preco),
+                quantidade_pontuacao = quantidade_pontuacao + excluded.quantidade_pontuacao,
+                soma_pontuacao = soma_pontuacao + excluded.soma_pontuacao,
+                min_pontuacao = COALESCE(MIN(min_pontuacao, excluded.min_pontuacao), min_pontuacao, excluded.min_pontuacao),
+                max_pontuacao = COALESCE(MAX(max_pontuacao, excluded.max_pontuacao), max_pontuacao, excluded.max_pontuacao);''')
+        for metric, bucket in _histograms(r).items():
+            statements.append(f'''
+            INSERT INTO agregados_histograma
+                SELECT '{dimension}', {key}, {period}, '{metric}', {bucket}, 1 WHERE {bucket} IS NOT NULL
+                ON CONFLICT (dimensao, chave, periodo, metrica, faixa) DO UPDATE SET quantidade = quantidade + 1;''')
+    return statements
+
+def _remove_statements(r: str) -> list:
+    statements = []
+    for dimension, key_sql in AGGREGATE_DIMENSIONS.items():
+        key, period = key_sql.format(r=r), PERIOD_SQL.format(r=r)
+        group = f"dimensao = '{dimension}' AND chave = {key} AND periodo = {period}"
+        same_group = f"{key_sql.format(r='imoveis')} = {key} AND {PERIOD_SQL.format(r='imoveis')} = {period}"
+        statements.append(f'''
+            UPDATE agregados_imoveis SET
+                quantidade = quantidade - 1,
+                quantidade_preco = quantidade_preco - ({r}.preco_valor IS NOT NULL),
+                soma_preco = soma_preco - COALESCE({r}.preco_valor, 0),
+                quantidade_pontuacao = quantidade_pontuacao - ({r}.pontuacao_ollama IS NOT NULL),
+                soma_pontuacao = soma_pontuacao - COALESCE({r}.pontuacao_ollama, 0)
+            WHERE {group};''')
+        # Mínimo e máximo não se desfazem: recalculados (pelo índice do período) só se o valor removido era um deles
+        statements.append(f'''
+            UPDATE agregados_imoveis SET
+                min_preco = (SELECT MIN(preco_valor) FROM imoveis WHERE {same_group}),
+                max_preco = (SELECT MAX(preco_valor) FROM imoveis WHERE {same_group}),
+                min_pontuacao = (SELECT MIN(pontuacao_ollama) FROM imoveis WHERE {same_group}),
+                max_pontuacao = (SELECT MAX(pontuacao_ollama) FROM imoveis WHERE {same_group})
+            WHERE {group} AND ({r}.preco_valor IN (min_preco, max_preco) OR {r}.pontuacao_ollama IN (min_pontuacao, max_pontuacao));''')
+        statements.append(f"DELETE FROM agregados_imoveis WHERE {group} AND quantidade <= 0;")
+        for metric, bucket in _histograms(r).items():
+            statements.append(f'''
+            UPDATE agregados_histograma SET quantidade = quantidade - 1
+            WHERE {group} AND metrica = '{metric}' AND faixa = {bucket};''')
+        statements.append(f"DELETE FROM agregados_histograma WHERE {group} AND quantidade <= 0;")
+    return statements
+
+# --- Tabelas de agregados ---
+def create_aggregates(conn: sqlite3.Connection):
+    """
+    Tabelas `agregados_imoveis` (quantidade, soma, mínimo e máximo do preço e da pontuação) e
+    `agregados_histograma` (quantidade por faixa de preço e por pontuação), por dimensão
+    (AGGREGATE_DIMENSIONS), chave e mês, mantidas por triggers a cada INSERT, UPDATE e DELETE
+    em `imoveis` e preenchidas com os registros existentes.
+
+    As consultas do visualizador leem só essas tabelas: o custo depende do número de
+    chaves e meses, não do número de imóveis.
+
+    Cria também a coluna `data_inclusao` de `imoveis` (usada no período), preenchida nos registros
+    existentes com a data da avaliação; os novos a recebem na primeira gravação (processor._UPSERT_SQL).
+    """
+    if "data_inclusao" not in {row[1] for row in conn.execute("PRAGMA table_info(imoveis)")}:
+        conn.execute("ALTER TABLE imoveis ADD COLUMN data_inclusao TEXT")
+    conn.execute("UPDATE imoveis SET data_inclusao = COALESCE(data_avaliacao, CURRENT_TIMESTAMP) WHERE data_inclusao IS NULL")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS agregados_imoveis (
+            dimensao TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            periodo TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            quantidade_preco INTEGER NOT NULL,
+            soma_preco REAL NOT NULL,
+            min_preco REAL,
+            max_preco REAL,
+            quantidade_pontuacao INTEGER NOT NULL,
+            soma_pontuacao REAL NOT NULL,
+            min_pontuacao INTEGER,
+            max_pontuacao INTEGER,
+            PRIMARY KEY (dimensao, chave, periodo)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS agregados_histograma (
+            dimensao TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            periodo TEXT NOT NULL,
+            metrica TEXT NOT NULL,
+            faixa INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            PRIMARY KEY (dimensao, chave, periodo, metrica, faixa)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_imoveis_periodo ON imoveis ({PERIOD_SQL.replace('{r}.', '')})")
+    # Reavaliação (upsert) que não muda nenhuma coluna agregada: o trigger de UPDATE não faz nada
+    changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in AGGREGATED_COLUMNS)
+    # Um comando por execute (sem executescript, que faria COMMIT no meio da migração; ver data_menager.migrate_database)
+    for name, event, condition, statements in (("insert", "INSERT", "", _add_statements("new")),
+                                               ("delete", "DELETE", "", _remove_statements("old")),
+                                               ("update", f"UPDATE OF {', '.join(AGGREGATED_COLUMNS)}", f" WHEN {changed}",
+                                                _remove_statements("old") + _add_statements("new"))):
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS agregados_{name} AFTER {event} ON imoveis{condition} BEGIN
+            {"".join(statements)}
+        END
+        ''')
+    rebuild_aggregates(conn)
+
+def rebuild_aggregates(conn: sqlite3.Connection):
+    """
+    Recalcula os agregados do zero a partir de `imoveis` (preenchimento inicial ou correção).
+    """
+    conn.execute("DELETE FROM agregados_imoveis")
+    conn.execute("DELETE FROM agregados_histograma")
+    for dimension, key_sql in AGGREGATE_DIMENSIONS.items():
+        key, period = key_sql.format(r="imoveis"), PERIOD_SQL.format(r="imoveis")
+        conn.execute(f'''
+            INSERT INTO agregados_imoveis
+            SELECT '{dimension}', {key}, {period}, COUNT(*),
+                   COUNT(preco_valor), COALESCE(SUM(preco_valor), 0), MIN(preco_valor), MAX(preco_valor),
+                   COUNT(pontuacao_ollama), COALESCE(SUM(pontuacao_ollama), 0), MIN(pontuacao_ollama), MAX(pontuacao_ollama)
+            FROM imoveis GROUP BY 2, 3
+        ''')
+        for metric, bucket in _histograms("imoveis").items():
+            conn.execute(f'''
+                INSERT INTO agregados_histograma
+                SELECT '{dimension}', {key}, {period}, '{metric}', {bucket}, COUNT(*)
+                FROM imoveis WHERE {bucket} IS NOT NULL GROUP BY 2, 3, 5
+            ''')
@@ -0,0 +1,164 @@
+# cascade_report.py
+import argparse
+import json
+import sqlite3
+
+from .data_menager import migrate_database
+from .eval_cache import EvaluationCache
+from .evaluator import CASCADE_MARGIN, OLLAMA_MAX_WORKERS, OllamaEvaluationPool, uncertainty_band
+from .processor import SCORE_THRESHOLD, resolve_model
+
+# --- Configurações ---
+CALIBRATION_SAMPLE_SIZE = 100 # Imóveis do banco reavaliados pelo modelo de triagem na calibração
+
+def load_calibration_sample(db_name: str, sample_size: int = CALIBRATION_SAMPLE_SIZE, model: str = None) -> list:
+    """
+    Amostra aleatória de imóveis avaliados por `model` (coluna `modelo_avaliacao`; None: por qualquer
+    modelo), sem as rejeições do pré-filtro e sem quase-duplicatas (que repetem a avaliação de outro
+    imóvel). Avaliações sem modelo registrado (anteriores à cascata) só entram com `model` None: podem
+    ser de outro modelo, então servem só para reavaliar (`rescore`).
+    """
+    model_filter, params = ("AND modelo_avaliacao = ?", (model, sample_size)) if model else ("", (sample_size,))
+    conn = sqlite3.connect(db_name)
+    conn.row_factory = sqlite3.Row
+    try:
+        migrate_database(conn)
+        rows = conn.execute(f'''
+            SELECT * FROM imoveis
+            WHERE pontuacao_ollama IS NOT NULL AND NOT descartado_prefiltro
+              AND duplicata_de IS NULL {model_filter}
+            ORDER BY RANDOM() LIMIT ?
+        ''', params).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+def _last_full_model_latency(db_name: str) -> float:
+    # Latência média por chamada da última execução sem cascata (todas as chamadas ao modelo grande)
+    conn = sqlite3.connect(db_name)
+    try:
+        rows = conn.execute("SELECT metricas_json FROM metricas_execucoes ORDER BY id DESC").fetchall()
+    except sqlite3.Error:
+        rows = []
+    finally:
+        conn.close()
+    for (metrics_json,) in rows:
+        recorded = json.loads(metrics_json or "{}")
+        latency = recorded.get("latencies", {}).get("llm_call")
+        if latency and latency["count"] and not recorded.get("counters", {}).get("llm_screened"):
+            return latency["mean"]
+    return None
+
+# --- Calibração da cascata ---
+def calibrate_cascade(db_name: str, screening_model: str, model: str = None, score_threshold: int = SCORE_THRESHOLD,
+                      cascade_margin: int = CASCADE_MARGIN, sample_size: int = CALIBRATION_SAMPLE_SIZE,
+                      rescore: bool = False, api_url: str = None, workers: int = OLLAMA_MAX_WORKERS,
+                      use_cache: bool = True, full_seconds_per_call: float = None) -> dict:
+    """
+    Avalia uma amostra do banco com o modelo de triagem e compara com a nota do modelo grande
+    (a gravada no banco ou, com `rescore`, uma nova avaliação de `model`), simulando a cascata
+    com a faixa de incerteza de `cascade_margin` pontos em torno de `score_threshold`.
+
+    O custo de cada modelo é o tempo médio por chamada medido nesta calibração; sem `rescore`,
+    o do modelo grande vem de `full_seconds_per_call` ou da última execução sem cascata
+    registrada em `metricas_execucoes`.
+
+    Returns:
+        dict: Tamanho da amostra, concordância entre os modelos (nota exata, +-1 ponto e decisão
+              acima/abaixo do limiar), taxa de escalonamento, concordância e imóveis interessantes
+              perdidos pela cascata e o tempo de GPU economizado (estimado).
+    """
+    model = resolve_model(model)
+    # Com `rescore`, a nota de referência é refeita por `model`: vale qualquer avaliação do banco
+    sample = load_calibration_sample(db_name, sample_size, None if rescore else model)
+    if not sample:
+        print(f"Nenhum imóvel avaliado por '{model}' em '{db_name}' para calibrar a cascata (use --rescore para reavaliar a amostra).")
+        return None
+    band = uncertainty_band(score_threshold, cascade_margin)
+    cache = EvaluationCache(db_name) if use_cache else None
+    print(f"Calibrando a cascata com {len(sample)} imóveis de '{db_name}' (triagem: '{screening_model}', faixa {band[0]} a {band[1]})...")
+    with OllamaEvaluationPool(max_workers=workers, model=screening_model, api_url=api_url, cache=cache) as screening_pool:
+        screening = [evaluation for _, evaluation in screening_pool.map(sample)]
+    full_model = None
+    if rescore:
+        with OllamaEvaluationPool(max_workers=workers, model=model, api_url=api_url, cache=cache) as full_pool:
+            reference = [evaluation for _, evaluation in full_pool.map(sample)]
+        full_model = full_pool.model_stats[full_pool.model]
+    else:
+        reference = [{"score": record["pontuacao_ollama"]} for record in sample]
+    if cache is not None:
+        cache.close()
+
+    pairs = [(small["score"], full["score"]) for small, full in zip(screening, reference)
+             if not small.get("failed") and not full.get("failed")]
+    if not pairs:
+        print("Nenhuma avaliação válida na amostra.")
+        return None
+    n = len(pairs)
+    escalated = [band[0] <= small <= band[1] for small, _ in pairs]
+    cascade_scores = [full if escalate else small for (small, full), escalate in zip(pairs, escalated)]
+    interesting = [full >= score_threshold for _, full in pairs]
+
+    # Custo por chamada: só as chamadas de fato feitas (as do cache não são medidas)
+    screening_stats = screening_pool.model_stats[screening_pool.model]
+    small_seconds = screening_stats["seconds"] / screening_stats["calls"] if screening_stats["calls"] else None
+    if full_model is not None and full_model["calls"]:
+        full_seconds = full_model["seconds"] / full_model["calls"]
+    else:
+        full_seconds = full_seconds_per_call or _last_full_model_latency(db_name)
+    escalation_rate = sum(escalated) / n
+    compute_saved = None
+    if small_seconds is not None and full_seconds:
+        compute_saved = 1 - (small_seconds + escalation_rate * full_seconds) / full_seconds
+
+    return {
+        "sample_size": n,
+        "band": band,
+        "exact_agreement": sum(small == full for small, full in pairs) / n,
+        "within_one_agreement": sum(abs(small - full) <= 1 for small, full in pairs) / n,
+        "mean_abs_error": sum(abs(small - full) for small, full in pairs) / n,
+        "screening_decision_agreement": sum((small >= score_threshold) == ref for (small, _), ref in zip(pairs, interesting)) / n,
+        "escalation_rate": escalation_rate,
+        "cascade_decision_agreement": sum((score >= score_threshold) == ref for score, ref in zip(cascade_scores, interesting)) / n,
+        "cascade_missed_interesting": sum(ref and score < score_threshold for score, ref in zip(cascade_scores, interesting)),
+        "interesting": sum(interesting),
+        "screening_seconds_per_call": small_seconds,
+        "full_seconds_per_call": full_seconds,
+        "compute_saved": compute_saved,
+    }
+
+def print_calibration_report(report: dict):
+    if report is None:
+        return
+    print(f"\nCalibração da cascata ({report['sample_size']} imóveis, faixa de incerteza {report['band'][0]} a {report['band'][1]}):")
+    print(f"  Concordância com o modelo grande: nota exata {report['exact_agreement']:.0%}, "
+          f"+-1 ponto {report['within_one_agreement']:.0%}, erro médio {report['mean_abs_error']:.2f} pontos.")
+    print(f"  Decisão (acima/abaixo do limiar): só a triagem {report['screening_decision_agreement']:.0%}, "
+          f"cascata {report['cascade_decision_agreement']:.0%}.")
+    print(f"  Escalados para o modelo grande: {report['escalation_rate']:.0%}. Imóveis interessantes perdidos pela "
+          f"cascata: {report['cascade_missed_interesting']} de {report['interesting']}.")
+    if report["compute_saved"] is None:
+        print(f"  Tempo de GPU economizado: sem medição da latência dos dois modelos; chamadas ao modelo grande "
+              f"evitadas: {1 - report['escalation_rate']:.0%}.")
+    else:
+        print(f"  Tempo de GPU economizado: {report['compute_saved']:.0%} (triagem {report['screening_seconds_per_call']:.2f}s "
+              f"e modelo grande {report['full_seconds_per_call']:.2f}s por chamada).")
+
+
+if __name__ == "__main__":
+    # Uso (a partir da raiz do projeto): python -m modules.cascade_report data/imoveis_interessantes.db gemma3:4b
+    parser = argparse.ArgumentParser(description="Calibra a cascata de modelos (triagem -> modelo grande) com o banco existente.")
+    parser.add_argument("db_name")
+    parser.add_argument("screening_model", help="Modelo pequeno de triagem.")
+    parser.add_argument("--model", default=None, help="Modelo grande (padrão: OLLAMA_MODEL de configs.py).")
+    parser.add_argument("--threshold", type=int, default=SCORE_THRESHOLD)
+    parser.add_argument("--margin", type=int, default=CASCADE_MARGIN)
+    parser.add_argument("--sample", type=int, default=CALIBRATION_SAMPLE_SIZE)
+    parser.add_argument("--rescore", action="store_true", help="Reavalia a amostra com o modelo grande em vez de usar a nota do banco.")
+    parser.add_argument("--api-url", default=None)
+    parser.add_argument("--full-seconds-per-call", type=float, default=None,
+                        help="Latência por chamada do modelo grande, se não for medida.")
+    args = parser.parse_args()
+    print_calibration_report(calibrate_cascade(args.db_name, args.screening_model, args.model, args.threshold, args.margin,
+                                               args.sample, args.rescore, args.api_url,
+                                               full_seconds_per_call=args.full_seconds_per_call))
@@ -0,0 +1,151 @@
+# crawl_state.py
+import sqlite3
+import threading
+
+from .extractor import _default_details
+
+# --- Configurações ---
+CRAWL_STATE_DB = "data/crawl_state.db" # Checkpoints por categoria e índice de leilões já conhecidos
+
+def link_key(link: str) -> str:
+    """
+    Normaliza o link de detalhes removendo a query string (parâmetros utm_*),
+    que pode variar entre raspagens do mesmo leilão.
+    """
+    return (link or "").split("?", 1)[0].rstrip("/")
+
+def has_details(record: dict) -> bool:
+    """
+    Indica se o registro tem os detalhes da página do leilão: com todos os campos nos valores
+    padrão ("Não encontrada"), a página de detalhes falhou e o item precisa ser visitado de novo.
+    """
+    return any(record.get(field) != default for field, default in _default_details().items())
+
+# --- Estado do crawl incremental ---
+class CrawlState:
+    """
+    Guarda, em um banco SQLite próprio, o checkpoint de cada categoria (próxima
+    página a raspar) e o índice de leilões conhecidos (link, número e preço).
+
+    O índice permite pular a página de detalhes de cards que não mudaram desde a
+    última raspagem e parar a paginação quando uma página só tem itens conhecidos.
+    """
+
+    def __init__(self, state_db: str = CRAWL_STATE_DB):
+        self.state_db = state_db
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(state_db, check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+                categoria TEXT PRIMARY KEY,
+                proxima_pagina INTEGER NOT NULL DEFAULT 1,
+                total_paginas INTEGER,
+                concluido INTEGER NOT NULL DEFAULT 0,
+                atualizado_em TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE IF NOT EXISTS leiloes_conhecidos (
+                link_chave TEXT PRIMARY KEY,
+                numero_leilao TEXT,
+                preco TEXT,
+                atualizado_em TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS idx_leiloes_conhecidos_numero ON leiloes_conhecidos (numero_leilao);
+        ''')
+        self.conn.commit()
+
+    # --- Índice de leilões conhecidos ---
+    def remember(self, records):
+        """
+        Registra (ou atualiza) os campos da listagem dos itens informados. Itens sem os detalhes
+        (ver `has_details`) não são registrados, para que o crawl incremental os visite de novo.
+        """
+        rows = (
+            (link_key(r.get("link_detalhes")), r.get("numero_leilao"), r.get("preco"))
+            for r in records
+            if r.get("link_detalhes") and r.get("link_detalhes") != "Link não encontrado" and has_details(r)
+        )
+        with self._lock:
+            self.conn.executemany('''
+                INSERT INTO leiloes_conhecidos (link_chave, numero_leilao, preco) VALUES (?, ?, ?)
+                ON CONFLICT(link_chave) DO UPDATE SET
+                    numero_leilao = excluded.numero_leilao,
+                    preco = excluded.preco,
+                    atualizado_em = CURRENT_TIMESTAMP
+            ''', rows)
+            self.conn.commit()
+
+    def seed_from_db(self, db_name: str) -> int:
+        """
+        Acrescenta ao índice os imóveis já gravados na tabela `imoveis` do banco principal.
+        """
+        try:
+            conn = sqlite3.connect(db_name)
+            try:
+                conn.row_factory = sqlite3.Row
+                columns = ("link_detalhes", "numero_leilao", "preco") + tuple(_default_details())
+                rows = [dict(row) for row in conn.execute(f"SELECT {', '.join(columns)} FROM imoveis")]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return 0
+        # Não sobrescreve o preço já observado na listagem por um valor possivelmente antigo do banco
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO leiloes_conhecidos (link_chave, numero_leilao, preco) VALUES (?, ?, ?)",
+                [(link_key(row["link_detalhes"]), row["numero_leilao"], row["preco"])
+                 for row in rows if row["link_detalhes"] and has_details(row)],
+            )
+            self.conn.commit()
+        return len(rows)
+
+    def is_unchanged(self, card: dict) -> bool:
+        """
+        Indica se o card já é conhecido (pelo link ou pelo número do leilão) com o
+        mesmo preço e o mesmo número, dispensando uma nova visita à página de detalhes.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT numero_leilao, preco FROM leiloes_conhecidos WHERE link_chave = ?",
+                (link_key(card.get("link_detalhes")),),
+            ).fetchone()
+            if row is None:
+                row = self.conn.execute(
+                    "SELECT numero_leilao, preco FROM leiloes_conhecidos WHERE numero_leilao = ? LIMIT 1",
+                    (card.get("numero_leilao"),),
+                ).fetchone()
+        return row is not None and row[0] == card.get("numero_leilao") and row[1] == card.get("preco")
+
+    # --- Checkpoints por categoria ---
+    def start_page(self, category: str) -> int:
+        """
+        Página onde a raspagem da categoria deve começar: a seguinte à última página
+        salva se a execução anterior foi interrompida, ou 1 se ela terminou.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT proxima_pagina, concluido FROM crawl_checkpoints WHERE categoria = ?", (category,)
+            ).fetchone()
+        if row is None or row[1]:
+            return 1
+        return row[0]
+
+    def save_checkpoint(self, category: str, next_page: int, total_pages: int, completed: bool = False):
+        with self._lock:
+            self.conn.execute('''
+                INSERT INTO crawl_checkpoints (categoria, proxima_pagina, total_paginas, concluido) VALUES (?, ?, ?, ?)
+                ON CONFLICT(categoria) DO UPDATE SET
+                    proxima_pagina = excluded.proxima_pagina,
+                    total_paginas = excluded.total_paginas,
+                    concluido = excluded.concluido,
+                    atualizado_em = CURRENT_TIMESTAMP
+            ''', (category, next_page, total_pages, int(completed)))
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,479 @@
+# data_menager.py
+import functools
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+from .aggregates import create_aggregates
+
+# --- Configurações ---
+DB_NAME = "data/imoveis_interessantes_mistral.db"
+EDITAL_UTC_OFFSET = timedelta(hours=-3) # Fuso dos horários dos editais (horário de Brasília)
+
+_BRL_PRICE_RE = re.compile(r"R\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{1,2})?|\d+(?:,\d{1,2})?)")
+# "São Paulo, SP" / "Serra - ES" / "Campinas/SP"
+_CITY_UF_RE = re.compile(r"^\s*(?P<cidade>[^,/]+?)\s*(?:,|/|\s-\s)\s*(?P<uf>[A-Za-z]{2})\s*$")
+_DATE_RE = re.compile(r"(\d{2})/(\d{2})/(\d{4})")
+# Trechos do edital: "o 1º Leilão terá início no dia 02/06/2025 ..." e, se houver, o valor de cada leilão
+_FIRST_AUCTION_DATE_RE = re.compile(r"1[ºo°]\s*(?:leil[ãa]o|pra[çc]a)[^\n]{0,80}?(\d{2}/\d{2}/\d{4})", re.IGNORECASE)
+_FIRST_AUCTION_PRICE_RE = re.compile(r"1[ºo°]\s*(?:leil[ãa]o|pra[çc]a)\s*:?\s*(R\$\s*[\d.,]+)", re.IGNORECASE)
+_SECOND_AUCTION_PRICE_RE = re.compile(r"2[ºo°]\s*(?:leil[ãa]o|pra[çc]a)\s*:?\s*(R\$\s*[\d.,]+)", re.IGNORECASE)
+# Regra do 2º leilão no edital, sem o valor: "o 2º Leilão, que terá início no dia 05/06/2025 às 16:31 h [...]
+# onde serão aceitos lances com no mínimo 50% (cinquenta por cento) do valor da avaliação"
+_SECOND_AUCTION_RULE_RE = re.compile(r"2[ºo°]\s*(?:leil[ãa]o|pra[çc]a),?\s+que\s+ter[áa]\s+in[íi]cio\s+no\s+dia\s+(\d{2}/\d{2}/\d{4})"
+                                     r"(?:\s+[àa]s\s+(\d{1,2}:\d{2}))?[^%]{0,160}?no\s+m[íi]nimo\s+(\d{1,3}(?:,\d+)?)\s*%",
+                                     re.IGNORECASE)
+# Segmento da categoria no link de detalhes: /imoveis/<categoria>/...
+_CATEGORY_RE = re.compile(r"/imoveis/([^/?#]+)/")
+# Segmento da categoria na URL de busca de configs.URLS: /imoveis/<categoria>?...
+_URL_CATEGORY_RE = re.compile(r"/imoveis/([^/?#]+)")
+
+# --- Normalização dos campos ---
+def parse_brl_price(text: str) -> float:
+    """
+    Converte um valor em reais ("R$ 123.456,78") para float. Retorna None se não houver valor.
+    """
+    if not text:
+        return None
+    match = _BRL_PRICE_RE.search(text)
+    if not match:
+        return None
+    return float(match.group(1).replace(".", "").replace(",", "."))
+
+def parse_city_uf(text: str) -> tuple:
+    """
+    Separa "São Paulo, SP" em ("São Paulo", "SP"). Retorna (None, None) se o texto não tiver esse formato.
+    """
+    match = _CITY_UF_RE.match(text or "")
+    if not match:
+        return None, None
+    return match.group("cidade").strip(), match.group("uf").upper()
+
+def parse_date(text: str) -> str:
+    """
+    Converte a primeira data "dd/mm/aaaa" do texto para o formato ISO ("aaaa-mm-dd"), que ordena corretamente no SQL.
+    """
+    match = _DATE_RE.search(text or "")
+    if not match:
+        return None
+    day, month, year = match.groups()
+    return f"{year}-{month}-{day}"
+
+def auction_prices_from_rule(text: str, price: float, observed_at: str) -> tuple:
+    """
+    Preços (1º leilão, 2º leilão) deduzidos da regra do 2º leilão no edital (início e lance mínimo em %
+    da avaliação), para editais que não trazem os valores. O preço do anúncio é o lance mínimo do leilão
+    em andamento quando foi lido (`observed_at`, "aaaa-mm-dd hh:mm:ss" em UTC, como o CURRENT_TIMESTAMP
+    do SQLite): antes do início do 2º leilão, é o do 1º (a avaliação atualizada) e o do 2º é a porcentagem
+    dele; depois, é o do 2º e o do 1º é ele dividido pela porcentagem. Retorna (None, None) sem a regra.
+    """
+    match = _SECOND_AUCTION_RULE_RE.search(text or "")
+    if not match or not price or not observed_at:
+        return None, None
+    try:
+        observed = datetime.strptime(observed_at[:19], "%Y-%m-%d %H:%M:%S")
+        second_start = datetime.strptime(f"{match.group(1)} {match.group(2) or '00:00'}", "%d/%m/%Y %H:%M") - EDITAL_UTC_OFFSET
+    except ValueError:
+        return None, None
+    ratio = float(match.group(3).replace(",", ".")) / 100
+    if not 0 < ratio <= 1:
+        return None, None
+    if observed < second_start:
+        return price, round(price * ratio, 2)
+    return round(price / ratio, 2), price
+
+def normalize_property(property_data: dict, observed_at: str = None) -> dict:
+    """
+    Colunas normalizadas do imóvel: preço atual e preços do 1º/2º leilão em número,
+    cidade/UF separados e data do 1º leilão em ISO. Usa os campos do card quando o
+    scraper os encontrou e, senão, procura no texto do edital. Se o edital só traz a regra
+    do 2º leilão, os preços são deduzidos do preço do anúncio lido em `observed_at`
+    (ver auction_prices_from_rule); sem `observed_at`, ficam vazios.
+    """
+    text = f"{property_data.get('descricao_completa') or ''}\n{property_data.get('condicoes_pagamento') or ''}"
+    price = parse_brl_price(property_data.get("preco"))
+
+    first_price = parse_brl_price(property_data.get("preco_primeiro_leilao"))
+    if first_price is None:
+        match = _FIRST_AUCTION_PRICE_RE.search(text)
+        first_price = parse_brl_price(match.group(1)) if match else None
+    second_price = parse_brl_price(property_data.get("preco_segundo_leilao"))
+    if second_price is None:
+        match = _SECOND_AUCTION_PRICE_RE.search(text)
+        second_price = parse_brl_price(match.group(1)) if match else None
+    if first_price is None and second_price is None:
+        first_price, second_price = auction_prices_from_rule(text, price, observed_at)
+
+    auction_date = parse_date(property_data.get("data_leilao"))
+    if auction_date is None:
+        match = _FIRST_AUCTION_DATE_RE.search(text)
+        auction_date = parse_date(match.group(1)) if match else None
+
+    city, uf = parse_city_uf(property_data.get("localidade_pagina_principal"))
+    return {
+        "preco_valor": price,
+        "preco_primeiro_leilao": first_price,
+        "preco_segundo_leilao": second_price,
+        "cidade": city,
+        "uf": uf,
+        "data_leilao": auction_date,
+    }
+
+@functools.lru_cache(maxsize=1)
+def category_segments() -> dict:
+    """
+    Segmento do link de cada categoria de configs.URLS -> chave da categoria ("terrenos-e-lotes" -> "terrenos").
+    Vazio se configs.py não puder ser importado (fora da raiz do projeto).
+    """
+    try:
+        from configs import URLS
+    except ImportError:
+        return {}
+    segments = {}
+    for category, url in URLS.items():
+        match = _URL_CATEGORY_RE.search(url)
+        if match:
+            segments[match.group(1)] = category
+    return segments
+
+def record_category(record: dict) -> str:
+    """
+    Categoria do imóvel: a da raspagem (chave de configs.URLS) ou, em registros antigos, a obtida
+    do segmento da categoria no link de detalhes: a chave de configs.URLS com esse segmento
+    ("terrenos-e-lotes" -> "terrenos") ou, se nenhuma URL o usa, o próprio segmento.
+    """
+    category = record.get("categoria")
+    if category:
+        return category
+    match = _CATEGORY_RE.search(record.get("link_detalhes") or "")
+    if not match:
+        return None
+    return category_segments().get(match.group(1), match.group(1))
+
+NORMALIZED_COLUMNS = {
+    "preco_valor": "REAL",
+    "preco_primeiro_leilao": "REAL",
+    "preco_segundo_leilao": "REAL",
+    "cidade": "TEXT",
+    "uf": "TEXT",
+    "data_leilao": "TEXT",
+}
+
+# --- Migrações do esquema ---
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def _migration_1_normalized_columns(conn: sqlite3.Connection):
+    """
+    Colunas numéricas de preço, cidade/UF e data do leilão, com índices, preenchidas
+    a partir dos registros já existentes.
+    """
+    existing = _columns(conn, "imoveis")
+    for column, column_type in NORMALIZED_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE imoveis ADD COLUMN {column} {column_type}")
+    for name, columns in (("pontuacao", "pontuacao_ollama"), ("preco_valor", "preco_valor"),
+                          ("preco_primeiro", "preco_primeiro_leilao"), ("preco_segundo", "preco_segundo_leilao"),
+                          ("uf_cidade", "uf, cidade"), ("data_leilao", "data_leilao")):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_imoveis_{name} ON imoveis ({columns})")
+    backfill_normalized_columns(conn)
+
+FTS_COLUMNS = ("descricao_completa", "condicoes_pagamento", "localizacao_detalhada", "pontos_positivos", "pontos_negativos")
+
+def _migration_2_full_text_search(conn: sqlite3.Connection):
+    """
+    Índice FTS5 `imoveis_fts` sobre os textos longos e as notas da LLM, mantido por triggers.
+    """
+    columns = ", ".join(FTS_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+    # Tabela de conteúdo externo: o texto fica só em `imoveis`; remove_diacritics faz "imovel" achar "imóvel"
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS imoveis_fts USING fts5(
+            {columns}, content='imoveis', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS imoveis_fts_insert AFTER INSERT ON imoveis BEGIN
+            INSERT INTO imoveis_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS imoveis_fts_delete AFTER DELETE ON imoveis BEGIN
+            INSERT INTO imoveis_fts (imoveis_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS imoveis_fts_update AFTER UPDATE OF {columns} ON imoveis BEGIN
+            INSERT INTO imoveis_fts (imoveis_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO imoveis_fts (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    conn.execute("INSERT INTO imoveis_fts (imoveis_fts) VALUES ('rebuild')")
+
+def _migration_3_run_metrics(conn: sqlite3.Connection):
+    """
+    Tabela `metricas_execucoes`: um resumo por execução do pipeline, com as métricas por etapa (ver metrics.py).
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS metricas_execucoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            iniciado_em TEXT NOT NULL,
+            duracao_s REAL,
+            itens_vistos INTEGER,
+            itens_pulados INTEGER,
+            itens_avaliados INTEGER,
+            itens_salvos INTEGER,
+            erros INTEGER,
+            metricas_json TEXT
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_metricas_execucoes_iniciado_em ON metricas_execucoes (iniciado_em)")
+
+def _migration_4_category(conn: sqlite3.Connection):
+    """
+    Coluna `categoria`, com índice, preenchida a partir do link de detalhes dos registros existentes.
+    """
+    if "categoria" not in _columns(conn, "imoveis"):
+        conn.execute("ALTER TABLE imoveis ADD COLUMN categoria TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_imoveis_categoria ON imoveis (categoria, pontuacao_ollama)")
+    cursor = conn.execute("SELECT id, link_detalhes FROM imoveis WHERE categoria IS NULL")
+    while True:
+        rows = cursor.fetchmany(500)
+        if not rows:
+            break
+        conn.executemany("UPDATE imoveis SET categoria = ? WHERE id = ?",
+                         [(record_category({"link_detalhes": link}), row_id) for row_id, link in rows])
+
+def _migration_5_near_duplicates(conn: sqlite3.Connection):
+    """
+    Colunas `duplicata_de` (link do imóvel cuja avaliação foi reaproveitada) e `similaridade_duplicata`,
+    que ligam as quase-duplicatas ao representante do grupo (ver near_duplicates.py).
+    """
+    columns = _columns(conn, "imoveis")
+    if "duplicata_de" not in columns:
+        conn.execute("ALTER TABLE imoveis ADD COLUMN duplicata_de TEXT")
+    if "similaridade_duplicata" not in columns:
+        conn.execute("ALTER TABLE imoveis ADD COLUMN similaridade_duplicata REAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_imoveis_duplicata_de ON imoveis (duplicata_de)")
+
+def _migration_6_cascade_scores(conn: sqlite3.Connection):
+    """
+    Nota de cada nível da cascata de modelos (ver evaluator.OllamaEvaluationPool): `pontuacao_triagem`
+    (modelo pequeno), `pontuacao_modelo_grande` (só dos imóveis reavaliados) e `modelo_avaliacao`,
+    o modelo que deu a nota final (`pontuacao_ollama`).
+    """
+    columns = _columns(conn, "imoveis")
+    for column, column_type in (("pontuacao_triagem", "INTEGER"), ("pontuacao_modelo_grande", "INTEGER"),
+                                ("modelo_avaliacao", "TEXT")):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE imoveis ADD COLUMN {column} {column_type}")
+
+def _migration_7_aggregates(conn: sqlite3.Connection):
+    """
+    Tabelas de agregados por cidade, UF, leiloeiro e fórum ao longo do tempo, mantidas por triggers (ver aggregates.py).
+    """
+    create_aggregates(conn)
+
+PREFILTER_MARKER = "Pré-filtro: " # Prefixo de pontos_negativos das rejeições do pré-filtro gravadas antes da migração 8
+
+def _migration_8_prefilter_rejections(conn: sqlite3.Connection):
+    """
+    Colunas `descartado_prefiltro` e `motivo_descarte` para os imóveis rejeitados pelo pré-filtro
+    (sem avaliação da LLM). As rejeições antigas, gravadas com nota 0 e o motivo em `pontos_negativos`,
+    passam a ter `pontuacao_ollama` NULL: não entram nas médias, histogramas e filtros por nota.
+    """
+    columns = _columns(conn, "imoveis")
+    if "descartado_prefiltro" not in columns:
+        conn.execute("ALTER TABLE imoveis ADD COLUMN descartado_prefiltro INTEGER NOT NULL DEFAULT 0")
+    if "motivo_descarte" not in columns:
+        conn.execute("ALTER TABLE imoveis ADD COLUMN motivo_descarte TEXT")
+    conn.execute('''
+        UPDATE imoveis SET
+            descartado_prefiltro = 1,
+            motivo_descarte = substr(pontos_negativos, ?),
+            pontuacao_ollama = NULL,
+            pontos_positivos = NULL,
+            pontos_negativos = NULL
+        WHERE pontos_negativos LIKE ? || '%'
+    ''', (len(PREFILTER_MARKER) + 1, PREFILTER_MARKER))
+
+def _migration_9_category_keys(conn: sqlite3.Connection):
+    """
+    Categorias preenchidas pela migração 4 com o segmento do link ("terrenos-e-lotes") passam a usar
+    a chave de configs.URLS ("terrenos"), como os imóveis gravados pela raspagem.
+    """
+    conn.executemany("UPDATE imoveis SET categoria = ? WHERE categoria = ?",
+                     [(category, segment) for segment, category in category_segments().items() if category != segment])
+
+def _migration_10_prompt_version(conn: sqlite3.Connection):
+    """
+    Coluna `versao_prompt`: a versão do prompt (prompts.PROMPT_VERSION) da avaliação da LLM. As quase-duplicatas
+    só reaproveitam avaliações gravadas do mesmo modelo e da versão atual do prompt (ver near_duplicates.py).
+    """
+    if "versao_prompt" not in _columns(conn, "imoveis"):
+        conn.execute("ALTER TABLE imoveis ADD COLUMN versao_prompt TEXT")
+
+def _migration_11_aggregate_period(conn: sqlite3.Connection):
+    """
+    O período dos agregados de um imóvel sem data do leilão passa a ser o mês da primeira gravação
+    (`data_inclusao`), não o da última avaliação: uma reavaliação não muda mais o imóvel de mês.
+    Os triggers e o índice do período são recriados e os agregados, recalculados.
+    """
+    for name in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS agregados_{name}")
+    conn.execute("DROP INDEX IF EXISTS idx_imoveis_periodo")
+    create_aggregates(conn)
+
+def _migration_12_auction_prices(conn: sqlite3.Connection):
+    """
+    Preenche os preços do 1º/2º leilão ainda vazios com os deduzidos da regra do 2º leilão no edital
+    (ver auction_prices_from_rule). Os já preenchidos (ex.: pelos valores do card) não mudam. Registros
+    antigos cujo edital não traz nem os valores nem a regra continuam sem esses preços (NULL).
+    """
+    cursor = conn.execute('''
+        SELECT id, preco, descricao_completa, condicoes_pagamento, data_avaliacao FROM imoveis
+        WHERE preco_primeiro_leilao IS NULL AND preco_segundo_leilao IS NULL
+    ''')
+    while True:
+        rows = cursor.fetchmany(500)
+        if not rows:
+            break
+        params = []
+        for row_id, price, description, conditions, evaluated_at in rows:
+            first_price, second_price = auction_prices_from_rule(f"{description or ''}\n{conditions or ''}",
+                                                                 parse_brl_price(price), evaluated_at)
+            if first_price is not None:
+                params.append((first_price, second_price, row_id))
+        conn.executemany("UPDATE imoveis SET preco_primeiro_leilao = ?, preco_segundo_leilao = ? WHERE id = ?", params)
+
+# Cada migração é aplicada uma única vez, na ordem; PRAGMA user_version guarda a última aplicada
+MIGRATIONS = [
+    _migration_1_normalized_columns,
+    _migration_2_full_text_search,
+    _migration_3_run_metrics,
+    _migration_4_category,
+    _migration_5_near_duplicates,
+    _migration_6_cascade_scores,
+    _migration_7_aggregates,
+    _migration_8_prefilter_rejections,
+    _migration_9_category_keys,
+    _migration_10_prompt_version,
+    _migration_11_aggregate_period,
+    _migration_12_auction_prices,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def backfill_normalized_columns(conn: sqlite3.Connection) -> int:
+    """
+    Recalcula as colunas normalizadas de todos os imóveis a partir dos campos de texto (a data da
+    avaliação é o momento em que o preço foi lido; ver normalize_property). Retorna o número de registros atualizados.
+    """
+    source_columns = ("preco", "localidade_pagina_principal", "descricao_completa", "condicoes_pagamento")
+    cursor = conn.execute(f"SELECT id, {', '.join(source_columns)}, data_avaliacao FROM imoveis")
+    assignments = ", ".join(f"{column} = ?" for column in NORMALIZED_COLUMNS)
+    updated = 0
+    while True:
+        rows = cursor.fetchmany(500)
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            normalized = normalize_property(dict(zip(source_columns, row[1:-1])), observed_at=row[-1])
+            params.append(tuple(normalized[column] for column in NORMALIZED_COLUMNS) + (row[0],))
+        conn.executemany(f"UPDATE imoveis SET {assignments} WHERE id = ?", params)
+        updated += len(params)
+    return updated
+
+def create_properties_table(conn: sqlite3.Connection):
+    """
+    Tabela `imoveis` no formato original (versão 0 do esquema); as colunas novas vêm das migrações.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS imoveis (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            titulo TEXT,
+            preco TEXT,
+            localidade_pagina_principal TEXT,
+            numero_leilao TEXT,
+            link_detalhes TEXT UNIQUE, 
+            localizacao_detalhada TEXT,
+            vara TEXT,
+            forum TEXT,
+            leiloeiro TEXT,
+            descricao_completa TEXT,
+            condicoes_pagamento TEXT,
+            pontuacao_ollama INTEGER, 
+            pontos_positivos TEXT,     -- Nova coluna
+            pontos_negativos TEXT,    -- Nova coluna
+            data_avaliacao TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+def schema_version(db_name: str) -> int:
+    """
+    Versão do esquema do banco (PRAGMA user_version), lida sem abrir o banco para escrita.
+    Retorna None se o arquivo não existir ou não for um banco SQLite.
+    """
+    try:
+        conn = sqlite3.connect(f"file:{db_name}?mode=ro", uri=True)
+        try:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+def ensure_schema(db_name: str) -> int:
+    """
+    Cria a tabela `imoveis`, se faltar, e aplica as migrações pendentes. Para quem só lê o banco
+    (o visualizador) e pode recebê-lo de uma versão anterior do projeto. Retorna a versão do esquema.
+    """
+    conn = sqlite3.connect(db_name)
+    try:
+        create_properties_table(conn)
+        return migrate_database(conn)
+    finally:
+        conn.close()
+
+def migrate_database(conn: sqlite3.Connection) -> int:
+    """
+    Aplica as migrações pendentes, cada uma em sua transação (BEGIN IMMEDIATE ... COMMIT), que
+    também grava o PRAGMA user_version: uma migração que falha é desfeita por inteiro e o banco
+    continua na versão anterior. Por isso as migrações executam um comando por vez (conn.execute):
+    o executescript faria COMMIT no meio delas. Retorna a versão final do esquema.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version
+    isolation_level = conn.isolation_level
+    conn.commit()
+    conn.isolation_level = None # Transações explícitas: o sqlite3 não abre nem confirma nenhuma por conta própria
+    try:
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Relida com a trava de escrita: outro processo pode ter migrado o banco enquanto esperávamos
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version >= SCHEMA_VERSION:
+                    conn.execute("ROLLBACK")
+                    return version
+                MIGRATIONS[version](conn)
+                conn.execute(f"PRAGMA user_version = {version + 1}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            print(f"Banco de dados migrado para a versão {version + 1} do esquema.")
+    finally:
+        conn.isolation_level = isolation_level
+
+
+if __name__ == "__main__":
+    # Uso: python -m modules.data_menager [banco.db]
+    from .processor import setup_database
+
+    setup_database(sys.argv[1] if len(sys.argv) > 1 else DB_NAME)
@@ -0,0 +1,168 @@
+# eval_cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from .metrics import log, metrics
+
+# --- Configurações ---
+EVAL_CACHE_MAX_ENTRIES = 50000 # Máximo de avaliações guardadas; as menos usadas recentemente são descartadas
+EVAL_CACHE_BUSY_TIMEOUT = 30 # Segundos de espera quando outra conexão (ex.: o PropertyWriter) está gravando no banco
+EVAL_CACHE_TOUCH_BATCH = 500 # Usos (usado_em) acumulados em memória antes de serem gravados de uma vez
+
+def make_cache_key(prompt_fields: dict, model: str, prompt_version: str) -> str:
+    """
+    Chave do cache: hash dos campos do imóvel enviados no prompt, do modelo e da versão do prompt.
+    """
+    content = json.dumps(prompt_fields, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(f"{model}\x00{prompt_version}\x00{content}".encode("utf-8")).hexdigest()
+
+# --- Cache persistente de avaliações do Ollama ---
+class EvaluationCache:
+    """
+    Cache das avaliações do Ollama na tabela `avaliacoes_cache`, no mesmo banco da tabela `imoveis`.
+
+    Um imóvel cujo conteúdo enviado no prompt não mudou reaproveita a pontuação e os pontos
+    positivos/negativos já calculados pelo mesmo modelo e versão de prompt, sem chamar a LLM.
+    Pode ser usado por várias threads ao mesmo tempo.
+
+    Um acerto não grava nada no banco: o horário de uso fica em memória e vai para `usado_em`
+    em lote (a cada EVAL_CACHE_TOUCH_BATCH usos, em `evict` e em `close`). Um erro do SQLite
+    (ex.: "database is locked") é registrado e tratado como falta no cache: a avaliação continua.
+    """
+
+    def __init__(self, db_name: str, max_entries: int = EVAL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._touched = {} # chave -> horário do último uso ainda não gravado
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_name, timeout=EVAL_CACHE_BUSY_TIMEOUT, check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS avaliacoes_cache (
+                chave TEXT PRIMARY KEY,
+                modelo TEXT NOT NULL,
+                versao_prompt TEXT NOT NULL,
+                pontuacao_ollama INTEGER,
+                pontos_positivos TEXT,
+                pontos_negativos TEXT,
+                criado_em TEXT DEFAULT CURRENT_TIMESTAMP,
+                usado_em TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS idx_avaliacoes_cache_modelo ON avaliacoes_cache (modelo, versao_prompt);
+            CREATE INDEX IF NOT EXISTS idx_avaliacoes_cache_usado_em ON avaliacoes_cache (usado_em);
+        ''')
+        self.conn.commit()
+
+    def _error(self, action: str, error: sqlite3.Error):
+        self.errors += 1
+        metrics.count("eval_cache_errors")
+        log(f"  > Erro no cache de avaliações ao {action}: {error}. Seguindo sem o cache.")
+
+    def get(self, key: str) -> dict:
+        """
+        Retorna a avaliação guardada para a chave (marcada com "cached": True), ou None se não houver.
+        """
+        with self._lock:
+            try:
+                row = self.conn.execute(
+                    "SELECT pontuacao_ollama, pontos_positivos, pontos_negativos FROM avaliacoes_cache WHERE chave = ?",
+                    (key,),
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._error("ler", e)
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Mesmo formato do CURRENT_TIMESTAMP do SQLite (UTC)
+            self._touched[key] = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+            if len(self._touched) >= EVAL_CACHE_TOUCH_BATCH:
+                self._flush_touched()
+        return {"score": row[0], "positives": row[1], "negatives": row[2], "cached": True}
+
+    def _flush_touched(self):
+        # Chamado com self._lock
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        try:
+            with self.conn:
+                self.conn.executemany("UPDATE avaliacoes_cache SET usado_em = ? WHERE chave = ?",
+                                      [(used_at, key) for key, used_at in touched.items()])
+        except sqlite3.Error as e:
+            self._error("gravar os usos", e)
+
+    def put(self, key: str, model: str, prompt_version: str, evaluation_results: dict):
+        with self._lock:
+            try:
+                with self.conn:
+                    self.conn.execute('''
+                        INSERT OR REPLACE INTO avaliacoes_cache (
+                            chave, modelo, versao_prompt, pontuacao_ollama, pontos_positivos, pontos_negativos
+                        ) VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (key, model, prompt_version, evaluation_results.get("score"),
+                          evaluation_results.get("positives"), evaluation_results.get("negatives")))
+            except sqlite3.Error as e:
+                self._error("gravar", e)
+
+    def invalidate(self, model: str = None, prompt_version: str = None) -> int:
+        """
+        Remove as avaliações do modelo e/ou da versão de prompt informados (ambos omitidos: limpa tudo).
+        Retorna o número de entradas removidas.
+        """
+        conditions, params = [], []
+        if model is not None:
+            conditions.append("modelo = ?")
+            params.append(model)
+        if prompt_version is not None:
+            conditions.append("versao_prompt = ?")
+            params.append(prompt_version)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            deleted = self.conn.execute(f"DELETE FROM avaliacoes_cache{where}", params).rowcount
+            self.conn.commit()
+        return deleted
+
+    def invalidate_stale(self, model: str, prompt_version: str) -> int:
+        """
+        Remove as avaliações feitas por outro modelo ou outra versão de prompt que não os atuais.
+        """
+        with self._lock:
+            deleted = self.conn.execute(
+                "DELETE FROM avaliacoes_cache WHERE modelo != ? OR versao_prompt != ?", (model, prompt_version)
+            ).rowcount
+            self.conn.commit()
+        return deleted
+
+    def evict(self, max_entries: int = None) -> int:
+        """
+        Mantém no máximo `max_entries` avaliações, descartando as usadas há mais tempo.
+        """
+        max_entries = self.max_entries if max_entries is None else max_entries
+        with self._lock:
+            self._flush_touched()
+            deleted = self.conn.execute('''
+                DELETE FROM avaliacoes_cache WHERE chave IN (
+                    SELECT chave FROM avaliacoes_cache ORDER BY usado_em DESC, rowid DESC LIMIT -1 OFFSET ?
+                )
+            ''', (max_entries,)).rowcount
+            self.conn.commit()
+        return deleted
+
+    def close(self):
+        try:
+            self.evict()
+        except sqlite3.Error as e:
+            self._error("descartar avaliações antigas", e)
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,260 @@
+# evaluator.py
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .eval_cache import EvaluationCache
+from .metrics import log, metrics
+from .near_duplicates import NearDuplicateIndex
+from .processor import (DEFAULT_EVALUATION, OLLAMA_API_URL, OllamaResponseError,
+                        lookup_cached_evaluation, request_ollama_evaluation, resolve_model)
+from .prompts import PROMPT_VERSION
+
+# --- Configurações ---
+OLLAMA_MAX_WORKERS = 4 # Máximo de avaliações simultâneas (use o mesmo valor de OLLAMA_NUM_PARALLEL no servidor)
+OLLAMA_TIMEOUT = 250 # Timeout (segundos) de cada chamada ao Ollama
+OLLAMA_MAX_RETRIES = 3 # Novas tentativas por imóvel em caso de erro, timeout ou resposta inválida
+OLLAMA_RETRY_BACKOFF = 2.0 # Espera (segundos) antes da primeira nova tentativa; dobra a cada tentativa
+LATENCY_TOLERANCE = 2.0 # Latência acima de (tolerância x latência base) indica servidor saturado
+CASCADE_MARGIN = 2 # Cascata: notas da triagem a até 2 pontos da fronteira do limiar (5 a 8, com limiar 7) vão para o modelo grande
+
+def uncertainty_band(score_threshold: int, margin: int = CASCADE_MARGIN) -> tuple:
+    """
+    Faixa (mínima, máxima) de notas da triagem reavaliadas pelo modelo grande: `margin` notas de
+    cada lado da fronteira entre `score_threshold` - 1 e `score_threshold`.
+    """
+    return score_threshold - margin, score_threshold + margin - 1
+
+# --- Controle adaptativo de concorrência ---
+class AdaptiveConcurrencyLimiter:
+    """
+    Limita o número de chamadas simultâneas ao Ollama, ajustando o limite pelo
+    comportamento observado (AIMD):
+
+    - sucesso com latência próxima da latência base: o limite cresce (+1 a cada `limite` sucessos);
+    - latência acima de `latency_tolerance` x a latência base: o limite diminui 10%;
+    - erro ou timeout: o limite cai pela metade.
+
+    A latência base é a menor média móvel de latência observada, ou seja, a latência
+    do servidor quando não está saturado.
+    """
+
+    def __init__(self, min_limit: int = 1, max_limit: int = OLLAMA_MAX_WORKERS, initial_limit: int = None,
+                 latency_tolerance: float = LATENCY_TOLERANCE):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(initial_limit or self.min_limit)
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.avg_latency = None
+        self.base_latency = None
+        self.error_rate = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float = None, success: bool = True):
+        with self._condition:
+            self.in_flight -= 1
+            self.error_rate = 0.9 * self.error_rate + 0.1 * (0.0 if success else 1.0)
+            if not success:
+                self.limit = max(self.min_limit, self.limit / 2)
+            elif latency is not None:
+                self.avg_latency = latency if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * latency
+                self.base_latency = self.avg_latency if self.base_latency is None else min(self.base_latency, self.avg_latency)
+                if self.avg_latency <= self.base_latency * self.latency_tolerance:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                else:
+                    self.limit = max(self.min_limit, self.limit * 0.9)
+            self._condition.notify_all()
+
+# --- Pool de avaliação ---
+class OllamaEvaluationPool:
+    """
+    Avalia imóveis em paralelo no Ollama, com timeout por requisição, novas tentativas
+    com backoff exponencial e concorrência adaptativa (AdaptiveConcurrencyLimiter).
+
+    `evaluate` pode ser chamado por várias threads ao mesmo tempo (como no pipeline);
+    `map` usa o pool de threads próprio e devolve os resultados na ordem de entrada.
+    Aponte `api_url` para um servidor falso (benchmarks/fake_ollama.py) para testes.
+    Com `screening_model`, a avaliação é uma cascata: um modelo pequeno avalia todos os imóveis e
+    só os de nota perto do limiar (`escalation_band`, ver uncertainty_band) vão para `model`.
+    Com `dedup_index`, imóveis quase idênticos a um já avaliado (o mesmo imóvel anunciado de novo)
+    reaproveitam a avaliação dele em vez de chamar o modelo (ver near_duplicates.py).
+    """
+
+    def __init__(self, max_workers: int = OLLAMA_MAX_WORKERS, min_workers: int = 1, model: str = None,
+                 api_url: str = None, timeout: float = OLLAMA_TIMEOUT, max_retries: int = OLLAMA_MAX_RETRIES,
+                 retry_backoff: float = OLLAMA_RETRY_BACKOFF, cache: EvaluationCache = None,
+                 dedup_index: NearDuplicateIndex = None, screening_model: str = None, escalation_band: tuple = None):
+        self.max_workers = max(1, max_workers)
+        self.model = resolve_model(model)
+        self.screening_model = screening_model
+        self.escalation_band = escalation_band
+        self.api_url = api_url or OLLAMA_API_URL
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.cache = cache
+        self.dedup_index = dedup_index
+        self.limiter = AdaptiveConcurrencyLimiter(min_limit=min_workers, max_limit=self.max_workers)
+        # Os modelos têm latências diferentes: cada um tem o seu controle de concorrência
+        self.limiters = {self.model: self.limiter}
+        if screening_model:
+            self.limiters[screening_model] = AdaptiveConcurrencyLimiter(min_limit=min_workers, max_limit=self.max_workers)
+        self.stats = {"calls": 0, "cached": 0, "deduplicated": 0, "retries": 0, "failures": 0, "prompt_tokens": 0,
+                      "completion_tokens": 0, "screened": 0, "escalated": 0}
+        # Chamadas bem-sucedidas e segundos gastos por modelo (o custo de cada nível da cascata)
+        self.model_stats = {model_name: {"calls": 0, "seconds": 0.0} for model_name in self.limiters}
+        self._stats_lock = threading.Lock()
+        self._executor = None
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def evaluate(self, property_data: dict) -> dict:
+        """
+        Avalia um imóvel (ou reutiliza o cache ou a avaliação de uma quase-duplicata). Retorna a
+        avaliação padrão de erro se todas as tentativas falharem.
+        """
+        if self.dedup_index is None:
+            return self._evaluate(property_data)
+
+        # Só avaliações gravadas pelos modelos deste pool (os dois níveis da cascata) são reaproveitadas
+        models = tuple(model for model in (self.model, self.screening_model) if model)
+        reused_results, claim = self.dedup_index.claim(property_data, models=models)
+        if reused_results is not None:
+            self._count("deduplicated")
+            metrics.count("llm_calls_deduplicated")
+            return reused_results
+        evaluation_results = None
+        try:
+            evaluation_results = self._evaluate(property_data)
+            return evaluation_results
+        finally:
+            # Libera as quase-duplicatas que esperam por esta avaliação (inclusive se ela falhou)
+            self.dedup_index.resolve(claim, evaluation_results)
+
+    def _evaluate(self, property_data: dict) -> dict:
+        """
+        Sem `screening_model`, avalia com `model`. Com ele (cascata), o modelo de triagem avalia
+        primeiro e só as notas dentro de `escalation_band` (mínima, máxima), perto do limiar, ou as
+        triagens que falharam vão para `model`. A avaliação leva 'model' (o modelo da nota final),
+        'screening_score' e 'full_score' (a nota de cada nível, ou None se ele não avaliou).
+        """
+        if not self.screening_model:
+            return {**self._evaluate_with(property_data, self.model), "model": self.model}
+
+        screening = self._evaluate_with(property_data, self.screening_model)
+        screening_score = None if screening.get("failed") else screening["score"]
+        low, high = self.escalation_band
+        if screening_score is not None and not low <= screening_score <= high:
+            self._count("screened")
+            metrics.count("llm_screened")
+            return {**screening, "model": self.screening_model, "screening_score": screening_score, "full_score": None}
+
+        self._count("escalated")
+        metrics.count("llm_escalated")
+        log(f"  > Triagem de '{property_data.get('titulo')}' {'falhou' if screening_score is None else f'na faixa de incerteza ({screening_score}/10)'}: "
+            f"reavaliando com '{self.model}'.")
+        full = self._evaluate_with(property_data, self.model)
+        return {**full, "model": self.model, "screening_score": screening_score,
+                "full_score": None if full.get("failed") else full["score"]}
+
+    def _evaluate_with(self, property_data: dict, model: str) -> dict:
+        cache_key, cached_results = lookup_cached_evaluation(self.cache, property_data, model)
+        if cached_results is not None:
+            self._count("cached")
+            return cached_results
+        return self._request_evaluation(property_data, cache_key, model)
+
+    def _request_evaluation(self, property_data: dict, cache_key: str, model: str) -> dict:
+        limiter = self.limiters[model]
+        title = property_data.get('titulo')
+        log(f"  > Avaliando imóvel '{title}' com Ollama ({model})...")
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+                time.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+            limiter.acquire()
+            start = time.perf_counter()
+            try:
+                self._count("calls")
+                evaluation_results = request_ollama_evaluation(property_data, model=model,
+                                                               api_url=self.api_url, timeout=self.timeout)
+            except OllamaResponseError as e:
+                # O servidor respondeu normalmente: a latência vale, mas a resposta não
+                limiter.release(time.perf_counter() - start, success=True)
+                log(f"  > {e} (tentativa {attempt + 1}/{self.max_retries + 1}).")
+            except requests.exceptions.RequestException as e:
+                limiter.release(success=False)
+                log(f"  > Erro ao chamar a API do Ollama para '{title}': {e} (tentativa {attempt + 1}/{self.max_retries + 1}).")
+            else:
+                latency = time.perf_counter() - start
+                limiter.release(latency, success=True)
+                self._count("prompt_tokens", evaluation_results["prompt_tokens"])
+                self._count("completion_tokens", evaluation_results["completion_tokens"])
+                with self._stats_lock:
+                    self.model_stats[model]["calls"] += 1
+                    self.model_stats[model]["seconds"] += latency
+                log(f"  > Avaliação do Ollama ({model}) para '{title}': Pontuação: {evaluation_results['score']}/10 "
+                    f"({evaluation_results['prompt_tokens']} tokens de prompt, {evaluation_results['completion_tokens']} de resposta).")
+                if self.cache is not None:
+                    self.cache.put(cache_key, model, PROMPT_VERSION, evaluation_results)
+                return evaluation_results
+
+        self._count("failures")
+        log(f"  > Não foi possível avaliar '{title}' com '{model}' após {self.max_retries + 1} tentativas. Retornando padrão.")
+        return dict(DEFAULT_EVALUATION)
+
+    def map(self, records):
+        """
+        Avalia os registros em paralelo e devolve pares (registro, avaliação) na ordem de entrada.
+        Mantém no máximo 2 x max_workers registros em andamento, para usar memória constante.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ollama")
+        pending = deque()
+        for record in records:
+            pending.append((record, self._executor.submit(self.evaluate, record)))
+            if len(pending) >= 2 * self.max_workers:
+                record, future = pending.popleft()
+                yield record, future.result()
+        while pending:
+            record, future = pending.popleft()
+            yield record, future.result()
+
+    def summary(self) -> str:
+        avg_latency = f"{self.limiter.avg_latency:.2f}s" if self.limiter.avg_latency is not None else "n/d"
+        return (f"Ollama: {self.stats['calls']} chamadas, {self.stats['cached']} do cache, "
+                f"{self.stats['deduplicated']} reaproveitadas de quase-duplicatas, "
+                f"{self.stats['retries']} novas tentativas, {self.stats['failures']} falhas, "
+                f"{self.stats['prompt_tokens']} tokens de prompt e {self.stats['completion_tokens']} de resposta. "
+                f"Concorrência final: {int(self.limiter.limit)}/{self.max_workers}, latência média: {avg_latency}."
+                + (self.cascade_summary() if self.screening_model else ""))
+
+    def cascade_summary(self) -> str:
+        screening, full = self.model_stats[self.screening_model], self.model_stats[self.model]
+        low, high = self.escalation_band
+        return (f"\nCascata: {self.stats['screened']} decididas pela triagem ('{self.screening_model}', {screening['calls']} chamadas, "
+                f"{screening['seconds']:.1f}s), {self.stats['escalated']} com nota de {low} a {high} (ou triagem com falha) "
+                f"reavaliadas por '{self.model}' ({full['calls']} chamadas, {full['seconds']:.1f}s).")
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
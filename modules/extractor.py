@@ -0,0 +1,305 @@
+# extractor.py
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxHTMLParser
+except ImportError:
+    SelectolaxHTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# --- Configurações ---
+PARSER_BACKEND = "auto" # "selectolax", "lxml", "html.parser" ou "auto" (o mais rápido instalado)
+PARSER_PREFERENCE = ("selectolax", "lxml", "html.parser")
+
+# Únicos trechos das páginas de detalhes lidos pelo scraper (por classe ou id do div)
+DETAIL_CLASSES = ("locality", "jurisdiction", "forum", "author")
+DETAIL_IDS = ("tab-description", "tab-contract")
+# Elementos cujo texto o BeautifulSoup não inclui em .text/get_text()
+_NON_TEXT_TAGS = {"script", "style", "template"}
+_SIMPLE_SELECTOR_RE = re.compile(r"([a-zA-Z][\w-]*)?((?:[.#][\w-]+)*)$")
+
+# --- Extração dos campos (independente do parser) ---
+def _default_details() -> dict:
+    return {
+        "localizacao_detalhada": "Não encontrada",
+        "vara": "Não encontrada",
+        "forum": "Não encontrado",
+        "leiloeiro": "Não encontrado",
+        "descricao_completa": "Não encontrada",
+        "condicoes_pagamento": "Não encontradas"
+    }
+
+def total_pages_from_text(summary_text: str) -> int:
+    match = re.search(r'Página \d+ de (\d+)', summary_text)
+    if match:
+        return int(match.group(1))
+    return 1
+
+def extract_card(backend, card) -> dict:
+    """
+    Extrai os campos de um card de leilão da página principal.
+    """
+    name_tag = backend.select_one(card, "a.card-title")
+    price_tag = backend.select_one(card, "div.card-price")
+    locality_tag_main = backend.select_one(card, "a.card-locality") # Localidade da página principal
+    number_tag = backend.select_one(card, "div.card-number")
+    # Datas e valores do 1º e 2º leilão (nem todo card tem); normalizados em data_menager.normalize_property
+    first_date_tag = backend.select_one(card, ".card-first-instance-date")
+    first_value_tag = backend.select_one(card, ".card-first-instance-value")
+    second_value_tag = backend.select_one(card, ".card-second-instance-value")
+
+    return {
+        "titulo": backend.text(name_tag).strip() if name_tag is not None else "Título não encontrado",
+        "preco": backend.text(price_tag).strip() if price_tag is not None else "Preço não encontrado",
+        # Usar a localidade da página principal aqui, a detalhada virá do scrap_description_page
+        "localidade_pagina_principal": backend.text(locality_tag_main).strip() if locality_tag_main is not None else "Localidade (principal) não encontrada", # Para diferenciar da detalhada
+        "numero_leilao": backend.text(number_tag).strip() if number_tag is not None else "Número do leilão não encontrado",
+        "link_detalhes": backend.attr(name_tag, "href") if name_tag is not None else "Link não encontrado",
+        "data_leilao": backend.text(first_date_tag).strip() if first_date_tag is not None else None,
+        "preco_primeiro_leilao": backend.text(first_value_tag).strip() if first_value_tag is not None else None,
+        "preco_segundo_leilao": backend.text(second_value_tag).strip() if second_value_tag is not None else None,
+    }
+
+# Campo -> (seletor, separador do texto: None = texto contínuo, "\n" = um bloco por linha)
+_DETAIL_FIELDS = {
+    "localizacao_detalhada": ("div.locality div.value", None),
+    "vara": ("div.jurisdiction div.value", None),
+    "forum": ("div.forum div.value", None),
+    "leiloeiro": ("div.author div.value", None),
+    # Conteúdo dentro de div#tab-description div.content
+    "descricao_completa": ("div#tab-description div.content", "\n"),
+    # Note que div#tab-contract também tem a classe 'tab-pane'
+    "condicoes_pagamento": ("div#tab-contract div.content", "\n"),
+}
+
+def extract_details(backend, root) -> dict:
+    """
+    Extrai os detalhes de um leilão da página de descrição já parseada.
+    Campos ausentes mantêm os valores padrão ("Não encontrada"/"Não encontrado").
+    """
+    details = _default_details()
+    for field, (selector, separator) in _DETAIL_FIELDS.items():
+        element = backend.select_one(root, selector)
+        if element is not None:
+            details[field] = backend.get_text(element, separator or "")
+    return details
+
+# --- Backends ---
+class ParserBackend:
+    """
+    Interface comum aos parsers. Cada backend só precisa saber parsear o HTML e
+    buscar elementos/texto; a extração dos campos é a mesma para todos, o que
+    garante dicionários idênticos qualquer que seja o parser.
+    """
+
+    name = None
+
+    def parse(self, html: str, classes=(), ids=()):
+        """Parseia o HTML. `classes`/`ids` indicam os únicos divs necessários (o backend pode ignorar o resto)."""
+        raise NotImplementedError
+
+    def find_all(self, root, tag: str, class_name: str) -> list:
+        raise NotImplementedError
+
+    def select_one(self, node, selector: str):
+        raise NotImplementedError
+
+    def text(self, node) -> str:
+        """Equivalente a `Tag.text` do BeautifulSoup: todo o texto do elemento, concatenado."""
+        raise NotImplementedError
+
+    def get_text(self, node, separator: str = "") -> str:
+        """Equivalente a `Tag.get_text(separator=separator, strip=True)`."""
+        return separator.join(piece.strip() for piece in self._texts(node) if piece.strip())
+
+    def attr(self, node, name: str):
+        raise NotImplementedError
+
+    def _texts(self, node):
+        raise NotImplementedError
+
+    def parse_listing(self, html: str, card_container_class: str, summary_class: str) -> tuple:
+        """
+        Página principal: retorna (total de páginas, lista com os campos de cada card).
+        """
+        root = self.parse(html, classes=(card_container_class, summary_class))
+        summary_element = self.find_all(root, "div", summary_class)
+        total_pages = total_pages_from_text(self.text(summary_element[0]).strip()) if summary_element else 1
+        cards = [extract_card(self, card) for card in self.find_all(root, "div", card_container_class)]
+        return total_pages, cards
+
+    def parse_details(self, html: str) -> dict:
+        return extract_details(self, self.parse(html, classes=DETAIL_CLASSES, ids=DETAIL_IDS))
+
+class _SubtreeStrainer(SoupStrainer):
+    """
+    Só deixa o BeautifulSoup criar os divs com as classes ou ids pedidos (e o que está dentro deles).
+    """
+
+    def __init__(self, classes, ids):
+        super().__init__()
+        self.classes = set(classes)
+        self.ids = set(ids)
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        attrs = attrs or {}
+        if name != "div":
+            return False
+        class_value = attrs.get("class") or ""
+        classes = class_value.split() if isinstance(class_value, str) else class_value
+        return attrs.get("id") in self.ids or not self.classes.isdisjoint(classes)
+
+    def allow_string_creation(self, string: str) -> bool:
+        return False
+
+class BeautifulSoupBackend(ParserBackend):
+    """
+    BeautifulSoup com "html.parser" (sem dependências extras). Com bs4 >= 4.13, só os
+    subtrees necessários viram objetos Python (o restante da página é descartado ao parsear).
+    """
+
+    name = "html.parser"
+    # A API de SoupStrainer usada pelo _SubtreeStrainer existe a partir do bs4 4.13
+    supports_subtrees = hasattr(SoupStrainer, "allow_tag_creation")
+
+    def parse(self, html: str, classes=(), ids=()):
+        parse_only = _SubtreeStrainer(classes, ids) if self.supports_subtrees and (classes or ids) else None
+        return BeautifulSoup(html, "html.parser", parse_only=parse_only)
+
+    def find_all(self, root, tag: str, class_name: str) -> list:
+        return root.find_all(tag, class_=class_name)
+
+    def select_one(self, node, selector: str):
+        return node.select_one(selector)
+
+    def text(self, node) -> str:
+        return node.text
+
+    def get_text(self, node, separator: str = "") -> str:
+        return node.get_text(separator=separator, strip=True)
+
+    def attr(self, node, name: str):
+        return node.get(name)
+
+class SelectolaxBackend(ParserBackend):
+    """
+    selectolax com o parser lexbor (em C, seletores CSS nativos). Parseia a página inteira, bem mais
+    rápido que o html.parser parseando só os subtrees.
+    """
+
+    name = "selectolax"
+
+    def parse(self, html: str, classes=(), ids=()):
+        return SelectolaxHTMLParser(html)
+
+    def find_all(self, root, tag: str, class_name: str) -> list:
+        return root.css(f"{tag}.{class_name}")
+
+    def select_one(self, node, selector: str):
+        return node.css_first(selector)
+
+    def _texts(self, node):
+        for child in node.traverse(include_text=True):
+            if child.tag == "-text" and child.parent is not None and child.parent.tag not in _NON_TEXT_TAGS:
+                yield child.text_content
+
+    def text(self, node) -> str:
+        return "".join(self._texts(node))
+
+    def attr(self, node, name: str):
+        return node.attributes.get(name)
+
+def _css_to_xpath(selector: str) -> str:
+    """
+    Converte os seletores simples usados aqui ("div#tab-description div.content", ".card-price")
+    para XPath, sem depender do pacote cssselect.
+    """
+    steps = []
+    for compound in selector.split():
+        match = _SIMPLE_SELECTOR_RE.match(compound)
+        if not match:
+            raise ValueError(f"Seletor não suportado: '{selector}'")
+        tag, qualifiers = match.groups()
+        conditions = []
+        for kind, value in re.findall(r"([.#])([\w-]+)", qualifiers):
+            if kind == "#":
+                conditions.append(f"@id='{value}'")
+            else:
+                conditions.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {value} ')")
+        steps.append((tag or "*") + "".join(f"[{condition}]" for condition in conditions))
+    return ".//" + "//".join(steps)
+
+class LxmlBackend(ParserBackend):
+    """
+    lxml.html (libxml2, em C). Os seletores são traduzidos para XPath e compilados uma vez.
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        self._xpaths = {}
+
+    def parse(self, html: str, classes=(), ids=()):
+        return lxml.html.document_fromstring(html)
+
+    def _xpath(self, selector: str):
+        if selector not in self._xpaths:
+            self._xpaths[selector] = lxml.etree.XPath(_css_to_xpath(selector))
+        return self._xpaths[selector]
+
+    def find_all(self, root, tag: str, class_name: str) -> list:
+        return self._xpath(f"{tag}.{class_name}")(root)
+
+    def select_one(self, node, selector: str):
+        matches = self._xpath(selector)(node)
+        return matches[0] if matches else None
+
+    def _texts(self, node):
+        if node.text and node.tag not in _NON_TEXT_TAGS:
+            yield node.text
+        for child in node:
+            # Comentários têm `tag` não textual: o conteúdo é ignorado, mas o texto após eles (tail) não
+            if isinstance(child.tag, str) and child.tag not in _NON_TEXT_TAGS:
+                yield from self._texts(child)
+            if child.tail:
+                yield child.tail
+
+    def text(self, node) -> str:
+        return "".join(self._texts(node))
+
+    def attr(self, node, name: str):
+        return node.get(name)
+
+_BACKENDS = {
+    "selectolax": (SelectolaxBackend, SelectolaxHTMLParser is not None),
+    "lxml": (LxmlBackend, lxml is not None),
+    "html.parser": (BeautifulSoupBackend, True),
+}
+_instances = {}
+
+def available_backends() -> list:
+    return [name for name in PARSER_PREFERENCE if _BACKENDS[name][1]]
+
+def get_backend(name: str = None) -> ParserBackend:
+    """
+    Backend de parsing pelo nome ("auto": o primeiro instalado de PARSER_PREFERENCE).
+    Se o backend pedido não estiver instalado, usa o html.parser.
+    """
+    name = name or PARSER_BACKEND
+    if name == "auto":
+        name = available_backends()[0]
+    if name not in _BACKENDS:
+        raise ValueError(f"Parser desconhecido: '{name}'. Use um de {', '.join(PARSER_PREFERENCE)} ou 'auto'.")
+    if name not in _instances:
+        backend_class, installed = _BACKENDS[name]
+        if not installed:
+            print(f"Parser '{name}' não está instalado. Usando 'html.parser'.")
+            backend_class = BeautifulSoupBackend
+        _instances[name] = backend_class()
+    return _instances[name]
@@ -0,0 +1,152 @@
+# fetcher.py
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from .http_cache import HttpCache
+from .metrics import log, metrics
+
+# --- Configurações ---
+DEFAULT_MAX_WORKERS = 8 # Número máximo de requisições simultâneas
+DEFAULT_TIMEOUT = 30.0 # Timeout (segundos) de cada requisição HTTP
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; AI_Leilao/1.0)"}
+
+# --- Limitador de taxa (token bucket) por host ---
+class TokenBucketRateLimiter:
+    """
+    Limitador de taxa do tipo token bucket, com um balde independente por host.
+
+    Cada requisição consome um token do balde do host de destino. Os tokens são
+    repostos continuamente a `rate` tokens por segundo, até o limite de `burst`.
+    É seguro para uso por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("A taxa do limitador deve ser maior que zero.")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._buckets = {} # host -> (tokens disponíveis, instante da última reposição)
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str):
+        """
+        Bloqueia até que haja um token disponível para o host informado.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (float(self.burst), now))
+                tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+                if tokens >= 1.0:
+                    self._buckets[host] = (tokens - 1.0, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1.0 - tokens) / self.rate
+            time.sleep(wait)
+
+class CacheMissError(httpx.HTTPError):
+    """
+    No modo replay, a URL pedida não está no cache.
+    """
+
+# --- Cliente HTTP compartilhado ---
+class Fetcher:
+    """
+    Cliente HTTP com pool de conexões keep-alive (httpx) e limite de taxa por host.
+
+    Uma única instância deve ser compartilhada por todas as threads de um scraping,
+    para que as conexões sejam reaproveitadas e o limite de taxa seja global.
+
+    Com `cache_dir`, as respostas ficam em um HttpCache: as ainda válidas (TTL) não vão ao
+    site e as vencidas são revalidadas com ETag/Last-Modified. Com `replay=True`, todas as
+    respostas vêm do cache, sem nenhum acesso à rede (URLs ausentes lançam CacheMissError).
+
+    `rate_limiter` substitui o TokenBucketRateLimiter criado a partir de `requests_per_second`:
+    qualquer objeto com `acquire(host)` (ex.: frontier.SharedRateLimiter, comum a vários processos).
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, requests_per_second: float = None,
+                 burst: int = 1, timeout: float = DEFAULT_TIMEOUT, cache_dir: str = None, replay: bool = False,
+                 rate_limiter=None):
+        self.max_workers = max(1, max_workers)
+        if rate_limiter is None and requests_per_second:
+            rate_limiter = TokenBucketRateLimiter(requests_per_second, burst)
+        self.rate_limiter = rate_limiter
+        if replay and not cache_dir:
+            raise ValueError("O modo replay precisa de um diretório de cache (cache_dir).")
+        self.replay = replay
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+        self.client = httpx.Client(
+            headers=DEFAULT_HEADERS,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_workers, max_keepalive_connections=self.max_workers),
+        )
+
+    def get_text(self, url: str, ttl: float = None) -> str:
+        """
+        Faz um GET respeitando o limite de taxa do host e retorna o corpo como texto.
+        `ttl` substitui o TTL do cache para esta URL (0: sempre revalidar).
+        Lança httpx.HTTPError em caso de falha de rede ou status de erro.
+        """
+        entry = self.cache.lookup(url) if self.cache is not None else None
+        if entry is not None and (self.replay or self.cache.is_fresh(entry, ttl)):
+            text = self.cache.read(entry)
+            if text is not None:
+                metrics.count("http_cache_hits")
+                return text
+            entry = None # Corpo descartado do disco: a URL é tratada como ausente do cache
+        if self.replay:
+            metrics.count("http_errors")
+            raise CacheMissError(f"'{url}' não está no cache (modo replay).")
+
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = self._request(url, headers)
+        if response.status_code == 304 and entry is not None:
+            text = self.cache.read(entry, revalidated=True)
+            if text is not None:
+                metrics.count("http_revalidated")
+                return text
+            # O corpo foi apagado depois da consulta ao índice: baixa de novo, sem requisição condicional
+            response = self._request(url, {})
+        metrics.count("http_bytes", len(response.content))
+        if self.cache is not None:
+            self.cache.store(url, response.content, response.encoding, response.headers.get("ETag"),
+                             response.headers.get("Last-Modified"))
+        return response.text
+
+    def _request(self, url: str, headers: dict) -> httpx.Response:
+        # GET sob o limite de taxa; status de erro lançam httpx.HTTPStatusError (304 só é aceito em requisição condicional)
+        if self.rate_limiter:
+            self.rate_limiter.acquire(urlsplit(url).netloc)
+        try:
+            with metrics.timer("http_fetch"):
+                response = self.client.get(url, headers=headers)
+            metrics.count("http_requests")
+            if response.status_code != 304 or not headers:
+                response.raise_for_status()
+        except httpx.HTTPError:
+            metrics.count("http_errors")
+            raise
+        return response
+
+    def close(self):
+        self.client.close()
+        if self.cache is not None:
+            log(self.cache.summary())
+            # No replay nada é descartado: as respostas gravadas devem continuar reproduzíveis
+            self.cache.close(evict=not self.replay)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
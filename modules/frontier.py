@@ -0,0 +1,540 @@
+# frontier.py
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .crawl_state import CRAWL_STATE_DB, CrawlState
+from .extractor import _default_details, get_backend
+from .fetcher import DEFAULT_MAX_WORKERS, Fetcher
+from .raw_store import RawStore, category_output_file, iter_records
+from .scrapper import CARD_CONTAINER_CLASS, LISTING_CACHE_TTL, SUMMARY_CLASS, URL_BASE
+
+# --- Configurações ---
+FRONTIER_DB = "data/crawl_frontier.db" # Fila de trabalho do crawl (páginas principais e de detalhes) e limite de taxa comum
+FRONTIER_PROCESSES = 4 # Processos de crawl que dividem a fila
+FRONTIER_LEASE_TIMEOUT = 120 # Segundos que um item fica reservado para um processo; depois disso, volta para a fila
+FRONTIER_MAX_ATTEMPTS = 3 # Tentativas de cada URL antes de ela ser marcada como "falhou"
+FRONTIER_RETRY_DELAY = 30 # Segundos de espera antes de tentar de novo uma URL que falhou (multiplicados pela tentativa)
+FRONTIER_POLL_INTERVAL = 0.5 # Segundos entre as consultas à fila quando não há item disponível
+FRONTIER_RESULT_BATCH = 100 # Itens raspados lidos da fila por vez pelo processo coordenador
+
+LISTING, DETAILS = "listagem", "detalhes"
+PENDING, LEASED, DONE, FAILED = "pendente", "em_andamento", "concluido", "falhou"
+# Coluna `consumido` dos itens raspados: não lido, gravado pelo consumidor, entregue e ainda não gravado
+UNREAD, CONSUMED, DELIVERED = 0, 1, 2
+
+def worker_id() -> str:
+    """
+    Identificador do processo de crawl ("host:pid"), gravado em cada item reservado.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+def _connect(frontier_db: str) -> sqlite3.Connection:
+    directory = os.path.dirname(frontier_db)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Autocommit: as transações são abertas explicitamente com BEGIN IMMEDIATE
+    conn = sqlite3.connect(frontier_db, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+# --- Fila de trabalho durável ---
+class Frontier:
+    """
+    Fronteira do crawl em um banco SQLite: cada página principal e cada página de detalhes é uma
+    linha da tabela `fronteira`, com status (pendente, em_andamento, concluido, falhou), prazo da
+    reserva (lease), processo que a reservou e número de tentativas.
+
+    Vários processos (ou máquinas com o banco em um disco compartilhado que suporte travas do SQLite)
+    reservam itens com `claim`, que é atômico (BEGIN IMMEDIATE): um item nunca é entregue a dois
+    processos ao mesmo tempo. Um processo que morre deixa seus itens reservados até o lease vencer;
+    então eles voltam para a fila (ou, após FRONTIER_MAX_ATTEMPTS tentativas, ficam como "falhou").
+    Como tudo fica no banco, uma execução interrompida é retomada exatamente de onde parou.
+
+    Os itens raspados (páginas de detalhes concluídas ou desistidas) ficam na própria fila: o processo
+    coordenador os lê com `results` e os marca como entregues (`mark_delivered`), e quem os grava os
+    marca com `mark_consumed` depois de gravá-los. Os entregues e não gravados (execução interrompida
+    entre a raspagem e a gravação) voltam a ser lidos quando a execução é retomada.
+    """
+
+    def __init__(self, frontier_db: str = FRONTIER_DB, lease_timeout: float = FRONTIER_LEASE_TIMEOUT,
+                 max_attempts: int = FRONTIER_MAX_ATTEMPTS, retry_delay: float = FRONTIER_RETRY_DELAY):
+        self.frontier_db = frontier_db
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self.conn = _connect(frontier_db)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS fronteira (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                tipo TEXT NOT NULL,
+                categoria TEXT,
+                pagina INTEGER,
+                dados_json TEXT,
+                status TEXT NOT NULL DEFAULT 'pendente',
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                disponivel_em REAL NOT NULL DEFAULT 0,
+                lease_ate REAL,
+                worker TEXT,
+                erro TEXT,
+                resultado_json TEXT,
+                consumido INTEGER NOT NULL DEFAULT 0,
+                atualizado_em REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_fronteira_status ON fronteira (status, disponivel_em);
+            CREATE INDEX IF NOT EXISTS idx_fronteira_resultados ON fronteira (consumido, status, tipo);
+            CREATE TABLE IF NOT EXISTS fronteira_taxa (
+                host TEXT PRIMARY KEY,
+                proximo REAL NOT NULL
+            );
+        ''')
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE trava o banco para escrita já no início: ler e reservar é atômico entre processos
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, entries) -> int:
+        # Uma URL já presente (inclusive a de um imóvel listado em outra categoria) não é duplicada
+        cursor = conn.executemany('''
+            INSERT OR IGNORE INTO fronteira (url, tipo, categoria, pagina, dados_json, atualizado_em)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(e["url"], e["tipo"], e.get("categoria"), e.get("pagina"),
+               json.dumps(e["dados"], ensure_ascii=False) if e.get("dados") is not None else None, time.time())
+              for e in entries])
+        return cursor.rowcount
+
+    def seed(self, urls: dict, fresh: bool = False) -> bool:
+        """
+        Prepara a fila para as categorias de `urls` (categoria -> URL base, terminada em "pagina=").
+        Se a fila tiver itens pendentes, reservados ou raspados e não gravados de uma execução anterior, ela é retomada;
+        senão (ou com `fresh`), a fila é esvaziada e recebe a página 1 de cada categoria.
+        Retorna True se uma execução anterior foi retomada.
+        """
+        with self._transaction() as conn:
+            unfinished = conn.execute("SELECT COUNT(*) FROM fronteira WHERE status IN (?, ?)", (PENDING, LEASED)).fetchone()[0]
+            unread = conn.execute("SELECT COUNT(*) FROM fronteira WHERE consumido != ? AND status IN (?, ?) AND tipo = ?",
+                                  (CONSUMED, DONE, FAILED, DETAILS)).fetchone()[0]
+            if (unfinished or unread) and not fresh:
+                # Entregues na execução anterior, mas não gravados: são entregues de novo
+                conn.execute("UPDATE fronteira SET consumido = ? WHERE consumido = ?", (UNREAD, DELIVERED))
+                return True
+            conn.execute("DELETE FROM fronteira")
+            self._insert(conn, [{"url": f"{base_url}1", "tipo": LISTING, "categoria": category, "pagina": 1,
+                                 "dados": {"base_url": base_url}} for category, base_url in urls.items()])
+        return False
+
+    def release_dead_leases(self) -> int:
+        """
+        Devolve à fila, sem esperar o lease vencer, os itens reservados por processos deste host que
+        não existem mais (ex.: a execução anterior foi morta). Retorna o número de itens devolvidos.
+        """
+        host = socket.gethostname()
+        with self._transaction() as conn:
+            dead = []
+            for (worker,) in conn.execute("SELECT DISTINCT worker FROM fronteira WHERE status = ?", (LEASED,)).fetchall():
+                worker_host, _, pid = (worker or "").rpartition(":")
+                if worker_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+                    dead.append(worker)
+            released = 0
+            for worker in dead:
+                released += conn.execute("UPDATE fronteira SET status = ?, lease_ate = NULL, worker = NULL WHERE status = ? AND worker = ?",
+                                         (PENDING, LEASED, worker)).rowcount
+        return released
+
+    def claim(self, worker: str, limit: int = 1) -> list:
+        """
+        Reserva até `limit` itens disponíveis (pendentes ou com o lease vencido), páginas principais
+        primeiro, por FRONTIER_LEASE_TIMEOUT segundos. Retorna dicionários com id, url, tipo, categoria,
+        pagina, dados e tentativas (já contando esta).
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # Leases vencidos: o processo morreu ou travou; sem tentativas restantes, a URL é desistida
+            conn.execute("UPDATE fronteira SET status = ?, erro = 'Lease vencido', atualizado_em = ? WHERE status = ? AND lease_ate < ? AND tentativas >= ?",
+                         (FAILED, now, LEASED, now, self.max_attempts))
+            rows = conn.execute('''
+                SELECT id, url, tipo, categoria, pagina, dados_json, tentativas FROM fronteira
+                WHERE (status = ? AND disponivel_em <= ?) OR (status = ? AND lease_ate < ?)
+                ORDER BY tipo = ? DESC, id
+                LIMIT ?
+            ''', (PENDING, now, LEASED, now, LISTING, limit)).fetchall()
+            conn.executemany("UPDATE fronteira SET status = ?, tentativas = tentativas + 1, lease_ate = ?, worker = ?, atualizado_em = ? WHERE id = ?",
+                             [(LEASED, now + self.lease_timeout, worker, now, row[0]) for row in rows])
+        return [{"id": item_id, "url": url, "tipo": kind, "categoria": category, "pagina": page,
+                 "dados": json.loads(data) if data else None, "tentativas": attempts + 1}
+                for item_id, url, kind, category, page, data, attempts in rows]
+
+    def complete(self, item_id: int, worker: str, new_entries=(), result: dict = None) -> bool:
+        """
+        Conclui o item e enfileira as URLs descobertas nele, na mesma transação. Se o lease do
+        processo venceu e o item foi reservado por outro, nada é gravado e retorna False.
+        """
+        with self._transaction() as conn:
+            updated = conn.execute('''
+                UPDATE fronteira SET status = ?, resultado_json = ?, lease_ate = NULL, erro = NULL, atualizado_em = ?
+                WHERE id = ? AND status = ? AND worker = ?
+            ''', (DONE, json.dumps(result, ensure_ascii=False) if result is not None else None, time.time(),
+                  item_id, LEASED, worker)).rowcount
+            if updated:
+                self._insert(conn, new_entries)
+        return bool(updated)
+
+    def fail(self, item_id: int, worker: str, error: str) -> str:
+        """
+        Registra a falha do item: ele volta para a fila após FRONTIER_RETRY_DELAY * tentativas segundos
+        ou, sem tentativas restantes, fica como "falhou". Retorna o novo status.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT tentativas FROM fronteira WHERE id = ? AND status = ? AND worker = ?",
+                               (item_id, LEASED, worker)).fetchone()
+            if row is None:
+                return None
+            status = FAILED if row[0] >= self.max_attempts else PENDING
+            conn.execute('''
+                UPDATE fronteira SET status = ?, erro = ?, lease_ate = NULL, worker = NULL, disponivel_em = ?, atualizado_em = ?
+                WHERE id = ?
+            ''', (status, error, now + self.retry_delay * row[0], now, item_id))
+        return status
+
+    def results(self, limit: int = FRONTIER_RESULT_BATCH) -> list:
+        """
+        Pares (id, item raspado) das páginas de detalhes concluídas e ainda não lidas, na ordem em que
+        foram enfileiradas. Uma página de detalhes desistida (FRONTIER_MAX_ATTEMPTS falhas) é entregue
+        como no scraper em threads: o card da listagem com os detalhes padrão ("Não encontrada").
+        """
+        with self._lock:
+            rows = self.conn.execute('''
+                SELECT id, status, categoria, dados_json, resultado_json FROM fronteira
+                WHERE consumido = ? AND status IN (?, ?) AND tipo = ?
+                ORDER BY id LIMIT ?
+            ''', (UNREAD, DONE, FAILED, DETAILS, limit)).fetchall()
+        results = []
+        for item_id, status, category, data, result in rows:
+            if status == DONE:
+                record = json.loads(result)
+            else:
+                record = {**json.loads(data), **_default_details()}
+                if category:
+                    record["categoria"] = category
+            results.append((item_id, record))
+        return results
+
+    def mark_delivered(self, item_id: int):
+        """
+        Marca o item raspado como entregue: ele não é mais devolvido por `results` nesta execução.
+        """
+        with self._transaction() as conn:
+            conn.execute("UPDATE fronteira SET consumido = ? WHERE id = ? AND consumido = ?", (DELIVERED, item_id, UNREAD))
+
+    def mark_consumed(self, links) -> list:
+        """
+        Marca como gravados os itens raspados com esses links de detalhes: não são entregues de novo,
+        nem ao retomar a execução. Retorna os itens cuja página de detalhes foi obtida (os desistidos
+        não entram no índice de conhecidos do crawl incremental e são visitados de novo na próxima execução).
+        """
+        fetched = []
+        with self._transaction() as conn:
+            for link in links:
+                row = conn.execute("SELECT id, status, resultado_json FROM fronteira WHERE url = ? AND tipo = ? AND consumido != ?",
+                                   (link, DETAILS, CONSUMED)).fetchone()
+                if row is None:
+                    continue
+                item_id, status, result = row
+                conn.execute("UPDATE fronteira SET consumido = ? WHERE id = ?", (CONSUMED, item_id))
+                if status == DONE:
+                    fetched.append(json.loads(result))
+        return fetched
+
+    def unfinished(self) -> int:
+        """
+        Número de itens pendentes ou reservados (0: o crawl terminou).
+        """
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM fronteira WHERE status IN (?, ?)", (PENDING, LEASED)).fetchone()[0]
+
+    def listing_progress(self) -> dict:
+        """
+        Categoria -> (páginas principais concluídas ou desistidas, total de páginas conhecido).
+        """
+        with self._lock:
+            rows = self.conn.execute('''
+                SELECT categoria, SUM(status IN (?, ?)), COUNT(*),
+                       MAX(CASE WHEN pagina = 1 THEN json_extract(resultado_json, '$.total_pages') END)
+                FROM fronteira WHERE tipo = ? GROUP BY categoria
+            ''', (DONE, FAILED, LISTING)).fetchall()
+        return {category: (done, max(queued, total or 0)) for category, done, queued, total in rows}
+
+    def counts(self) -> dict:
+        """
+        (tipo, status) -> número de itens.
+        """
+        with self._lock:
+            rows = self.conn.execute("SELECT tipo, status, COUNT(*) FROM fronteira GROUP BY tipo, status").fetchall()
+        return {(kind, status): n for kind, status, n in rows}
+
+    def summary(self) -> str:
+        counts = self.counts()
+        parts = [f"{kind}: " + ", ".join(f"{n} {status}" for (k, status), n in sorted(counts.items()) if k == kind)
+                 for kind in (LISTING, DETAILS) if any(k == kind for k, _ in counts)]
+        return f"Fila do crawl ('{self.frontier_db}'): " + ("; ".join(parts) or "vazia") + "."
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# --- Limite de taxa comum a vários processos ---
+class SharedRateLimiter:
+    """
+    Limite de requisições por segundo por host comum a todos os processos que usam o mesmo
+    banco da fila: cada requisição reserva, na tabela `fronteira_taxa`, o próximo horário livre
+    do host (espaçados de 1 / `rate` segundos) e espera até ele. Usado como `rate_limiter` do Fetcher.
+    """
+
+    def __init__(self, frontier_db: str, rate: float):
+        if rate <= 0:
+            raise ValueError("A taxa do limitador deve ser maior que zero.")
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self.conn = _connect(frontier_db)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS fronteira_taxa (host TEXT PRIMARY KEY, proximo REAL NOT NULL)")
+
+    def acquire(self, host: str):
+        """
+        Bloqueia até o horário reservado para esta requisição ao host informado.
+        """
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT proximo FROM fronteira_taxa WHERE host = ?", (host,)).fetchone()
+                slot = max(time.time(), row[0] if row else 0.0)
+                self.conn.execute("INSERT OR REPLACE INTO fronteira_taxa (host, proximo) VALUES (?, ?)", (host, slot + self.interval))
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+        time.sleep(max(0.0, slot - time.time()))
+
+    def close(self):
+        self.conn.close()
+
+# --- Processo de crawl ---
+def crawl_worker(frontier_db: str = FRONTIER_DB, card_container_class: str = CARD_CONTAINER_CLASS,
+                 summary_class: str = SUMMARY_CLASS, max_workers: int = DEFAULT_MAX_WORKERS,
+                 requests_per_second: float = None, incremental: bool = False, state_db: str = CRAWL_STATE_DB,
+                 parser: str = None, http_cache_dir: str = None, replay: bool = False, stop_event=None) -> int:
+    """
+    Laço de um processo de crawl: reserva itens da fila (até `max_workers` por vez, processados em
+    paralelo), baixa e interpreta cada página e a conclui, enfileirando as URLs descobertas.
+
+    - Página principal: a página 1 enfileira as páginas 2..N da categoria (no crawl incremental, cada
+      página enfileira só a seguinte, e apenas se teve algum item novo ou alterado); todas enfileiram
+      as páginas de detalhes dos seus cards (no crawl incremental, só dos cards novos ou alterados).
+    - Página de detalhes: o card da listagem combinado com os detalhes (e a categoria) é o resultado do item.
+
+    Uma falha (rede, status de erro, HTML inesperado) devolve o item à fila para nova tentativa.
+    O processo termina quando não há mais itens pendentes nem reservados ou quando `stop_event`
+    é acionado (o que estiver em andamento é concluído). O limite de `requests_per_second`
+    vale para todos os processos juntos (SharedRateLimiter). Retorna o número de itens concluídos.
+    """
+    me = worker_id()
+    frontier = Frontier(frontier_db)
+    rate_limiter = SharedRateLimiter(frontier_db, requests_per_second) if requests_per_second else None
+    crawl_state = CrawlState(state_db) if incremental else None
+    backend = get_backend(parser)
+    completed = 0
+
+    def process(item: dict) -> bool:
+        try:
+            if item["tipo"] == LISTING:
+                html = fetcher.get_text(item["url"], ttl=LISTING_CACHE_TTL)
+                total_pages, cards = backend.parse_listing(html, card_container_class, summary_class)
+                page, base_url = item["pagina"], item["dados"]["base_url"]
+                new_cards = [card for card in cards if crawl_state is None or not crawl_state.is_unchanged(card)]
+                if crawl_state is not None:
+                    next_pages = [page + 1] if new_cards and page < total_pages else []
+                else:
+                    next_pages = range(2, total_pages + 1) if page == 1 else []
+                entries = [{"url": f"{base_url}{next_page}", "tipo": LISTING, "categoria": item["categoria"],
+                            "pagina": next_page, "dados": {"base_url": base_url}} for next_page in next_pages]
+                entries += [{"url": card["link_detalhes"], "tipo": DETAILS, "categoria": item["categoria"],
+                             "pagina": page, "dados": card}
+                            for card in new_cards if card.get("link_detalhes") not in (None, "", "Link não encontrado")]
+                print(f"[{me}] Página {page} de '{item['categoria']}': {len(cards)} cards, {len(new_cards)} novos ou alterados.")
+                return frontier.complete(item["id"], me, entries, {"total_pages": total_pages, "cards": len(cards)})
+            html = fetcher.get_text(item["url"])
+            record = {**item["dados"], **backend.parse_details(html)}
+            if item["categoria"]:
+                record["categoria"] = item["categoria"]
+            return frontier.complete(item["id"], me, result=record)
+        except Exception as e:
+            status = frontier.fail(item["id"], me, f"{type(e).__name__}: {e}")
+            print(f"[{me}] Erro em {item['url']} (tentativa {item['tentativas']}): {e}. Item {status or 'já reservado por outro processo'}.")
+            return False
+
+    try:
+        with Fetcher(max_workers=max_workers, cache_dir=http_cache_dir, replay=replay, rate_limiter=rate_limiter) as fetcher, \
+                ThreadPoolExecutor(max_workers=fetcher.max_workers, thread_name_prefix="crawl-worker") as executor:
+            while stop_event is None or not stop_event.is_set():
+                items = frontier.claim(me, limit=fetcher.max_workers)
+                if not items:
+                    # Itens reservados por outros processos ainda podem enfileirar novas URLs
+                    if not frontier.unfinished():
+                        break
+                    time.sleep(FRONTIER_POLL_INTERVAL)
+                    continue
+                completed += sum(executor.map(process, items))
+    finally:
+        if crawl_state is not None:
+            crawl_state.close()
+        if rate_limiter is not None:
+            rate_limiter.close()
+        frontier.close()
+    print(f"[{me}] Processo de crawl encerrado: {completed} itens concluídos.")
+    return completed
+
+# --- Coordenação dos processos ---
+def crawl_with_workers(urls: dict, card_container_class: str, summary_class: str, output_file: str,
+                       processes: int = FRONTIER_PROCESSES, frontier_db: str = FRONTIER_DB, fresh: bool = False,
+                       time_delay: float = 1.5, max_workers: int = 1, requests_per_second: float = None,
+                       incremental: bool = False, state_db: str = CRAWL_STATE_DB, db_name: str = None,
+                       parser: str = None, http_cache_dir: str = None, replay: bool = False,
+                       stop_event=None, on_progress=None):
+    """
+    Raspa as categorias de `urls` com `processes` processos de crawl (crawl_worker) que dividem a
+    fila durável `frontier_db`, devolvendo (gerador) cada item assim que é raspado. Os itens são
+    gravados só por este processo, no JSONL da categoria (raw_store.category_output_file). Uma página
+    de detalhes desistida após FRONTIER_MAX_ATTEMPTS falhas é devolvida com os detalhes padrão, como
+    no scraper em threads.
+
+    Quem consome os itens deve marcá-los com Frontier.mark_consumed depois de gravá-los (o pipeline
+    o faz após o commit do PropertyWriter) e, no crawl incremental, lembrar no CrawlState os itens
+    que ela retorna. Se a execução anterior foi interrompida (Ctrl+C, queda do processo ou da máquina),
+    ela é retomada: páginas já concluídas não são baixadas de novo e os itens raspados e ainda não
+    gravados são entregues primeiro. `fresh` descarta a fila anterior e recomeça do zero.
+    Os demais parâmetros são os de scrapper.scrap_items; `max_workers` é o número de requisições
+    simultâneas de cada processo, e `requests_per_second` o limite de todos os processos juntos.
+
+    `stop_event` (threading.Event) encerra os processos após o que estiver em andamento; `on_progress`
+    é chamado com Frontier.listing_progress() a cada leitura da fila. Se o consumidor parar de iterar,
+    os processos também são encerrados, e o que ficou na fila é retomado na próxima execução.
+    """
+    if requests_per_second is None and time_delay > 0:
+        requests_per_second = 1.0 / time_delay
+    frontier = Frontier(frontier_db)
+    if frontier.seed(urls, fresh=fresh):
+        released = frontier.release_dead_leases()
+        print(f"Retomando o crawl interrompido ({frontier.unfinished()} itens na fila, {released} reservas de processos encerrados devolvidas).")
+
+    if incremental:
+        # O índice de conhecidos é lido pelos processos; só o coordenador o atualiza
+        with CrawlState(state_db) as crawl_state:
+            for category in urls:
+                crawl_state.remember(iter_records(category_output_file(output_file, category)))
+            if db_name:
+                crawl_state.seed_from_db(db_name)
+
+    context = multiprocessing.get_context("spawn") # Sem fork: o processo pai pode ter threads em andamento
+    workers_stop = context.Event()
+    worker_args = dict(frontier_db=frontier_db, card_container_class=card_container_class, summary_class=summary_class,
+                       max_workers=max_workers, requests_per_second=requests_per_second, incremental=incremental,
+                       state_db=state_db, parser=parser, http_cache_dir=http_cache_dir, replay=replay,
+                       stop_event=workers_stop)
+    workers = [context.Process(target=crawl_worker, kwargs=worker_args, name=f"crawl-worker-{i}", daemon=True)
+               for i in range(max(1, processes))]
+    for worker in workers:
+        worker.start()
+    print(f"{len(workers)} processos de crawl iniciados (fila em '{frontier_db}').")
+
+    raw_stores = {}
+    total = 0
+    crashed = set()
+    try:
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                workers_stop.set()
+            alive = any(worker.is_alive() for worker in workers)
+            # Um processo que morreu no meio de um item: suas reservas voltam à fila sem esperar o lease
+            newly_crashed = {worker.name for worker in workers if worker.exitcode} - crashed
+            if newly_crashed:
+                crashed |= newly_crashed
+                print(f"Processos de crawl encerrados com erro: {', '.join(sorted(newly_crashed))}. "
+                      f"{frontier.release_dead_leases()} itens devolvidos à fila.")
+            records = frontier.results()
+            if on_progress is not None:
+                on_progress(frontier.listing_progress())
+            for item_id, record in records:
+                category = record.get("categoria")
+                if category not in raw_stores:
+                    raw_stores[category] = RawStore(category_output_file(output_file, category) if category else output_file)
+                raw_stores[category].append(record)
+                # Entregue só depois de gravado no JSONL: uma queda entre as duas etapas no máximo repete a linha
+                frontier.mark_delivered(item_id)
+                total += 1
+                yield record
+            if not records:
+                if not alive:
+                    break
+                time.sleep(FRONTIER_POLL_INTERVAL)
+    finally:
+        workers_stop.set()
+        for worker in workers:
+            worker.join()
+        for raw_store in raw_stores.values():
+            raw_store.close()
+        print(frontier.summary())
+        frontier.close()
+    print(f"\nCrawl com {len(workers)} processos concluído: {total} itens raspados.")
+
+
+if __name__ == "__main__":
+    # Processo de crawl avulso (ex.: em outra máquina com acesso ao banco da fila), a partir da raiz do projeto:
+    #   python -m modules.frontier --seed    (prepara a fila com a URL padrão e roda um processo)
+    #   python -m modules.frontier           (só processa a fila existente)
+    parser = argparse.ArgumentParser(description="Processa a fila durável do crawl.")
+    parser.add_argument("--frontier-db", default=FRONTIER_DB)
+    parser.add_argument("--seed", action="store_true", help="Prepara a fila com URL_BASE se ela estiver vazia ou concluída.")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--requests-per-second", type=float, default=None)
+    parser.add_argument("--http-cache-dir", default=None)
+    args = parser.parse_args()
+    if args.seed:
+        with Frontier(args.frontier_db) as frontier:
+            frontier.seed({"leiloes": URL_BASE})
+    crawl_worker(args.frontier_db, max_workers=args.max_workers, requests_per_second=args.requests_per_second,
+                 http_cache_dir=args.http_cache_dir)
+    with Frontier(args.frontier_db) as frontier:
+        print(frontier.summary())
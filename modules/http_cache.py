@@ -0,0 +1,163 @@
+# http_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# --- Configurações ---
+HTTP_CACHE_DIR = "data/http_cache" # Diretório do cache de respostas HTTP do scraper
+HTTP_CACHE_TTL = 12 * 3600 # Segundos em que uma resposta é usada sem consultar o site
+HTTP_CACHE_MAX_AGE = 30 * 24 * 3600 # Respostas não revalidadas há mais tempo que isso são descartadas
+HTTP_CACHE_MAX_BYTES = 1024 ** 3 # Tamanho máximo dos corpos guardados; os usados há mais tempo são descartados
+
+# --- Cache de respostas HTTP em disco ---
+class HttpCache:
+    """
+    Cache em disco das respostas do scraper, endereçado por conteúdo: o corpo de cada resposta
+    fica em `objects/<sha256 do corpo>` (corpos iguais são guardados uma única vez) e o índice
+    SQLite `index.db` liga cada URL ao seu corpo, com ETag, Last-Modified e as datas de validação e uso.
+
+    Uma resposta validada há menos de `ttl` segundos é usada sem ir ao site; depois disso, o
+    Fetcher faz uma requisição condicional (If-None-Match / If-Modified-Since) e, se o site
+    responder 304, reaproveita o corpo guardado. Pode ser usado por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, cache_dir: str = HTTP_CACHE_DIR, ttl: float = HTTP_CACHE_TTL,
+                 max_age: float = HTTP_CACHE_MAX_AGE, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.stats = {"fresh": 0, "revalidated": 0, "stored": 0, "misses": 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.db"), check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS respostas (
+                url TEXT PRIMARY KEY,
+                corpo_sha256 TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                validado_em REAL NOT NULL,
+                usado_em REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_respostas_usado_em ON respostas (usado_em);
+            CREATE INDEX IF NOT EXISTS idx_respostas_corpo ON respostas (corpo_sha256);
+        ''')
+        self.conn.commit()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, "objects", digest[:2], digest)
+
+    def lookup(self, url: str) -> dict:
+        """
+        Entrada do cache para a URL (com a idade, em segundos, desde a última validação), ou None.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT corpo_sha256, encoding, etag, last_modified, validado_em FROM respostas WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+        digest, encoding, etag, last_modified, validated_at = row
+        return {"url": url, "digest": digest, "encoding": encoding, "etag": etag, "last_modified": last_modified,
+                "age": time.time() - validated_at}
+
+    def is_fresh(self, entry: dict, ttl: float = None) -> bool:
+        return entry["age"] < (self.ttl if ttl is None else ttl)
+
+    def read(self, entry: dict, revalidated: bool = False) -> str:
+        """
+        Corpo da entrada como texto. Marca a entrada como usada (e como validada agora, se `revalidated`).
+        Se o corpo não está mais no disco (apagado por outro processo ao descartar respostas), a
+        entrada sai do índice e o retorno é None: é uma ausência do cache.
+        """
+        try:
+            with open(self._object_path(entry["digest"]), "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self.conn.execute("DELETE FROM respostas WHERE url = ? AND corpo_sha256 = ?", (entry["url"], entry["digest"]))
+                self.conn.commit()
+                self.stats["misses"] += 1
+            return None
+        now = time.time()
+        with self._lock:
+            if revalidated:
+                self.conn.execute("UPDATE respostas SET usado_em = ?, validado_em = ? WHERE url = ?", (now, now, entry["url"]))
+            else:
+                self.conn.execute("UPDATE respostas SET usado_em = ? WHERE url = ?", (now, entry["url"]))
+            self.conn.commit()
+            self.stats["revalidated" if revalidated else "fresh"] += 1
+        return content.decode(entry["encoding"] or "utf-8", errors="replace")
+
+    def store(self, url: str, content: bytes, encoding: str = None, etag: str = None, last_modified: str = None):
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO respostas (
+                    url, corpo_sha256, tamanho, encoding, etag, last_modified, validado_em, usado_em
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, digest, len(content), encoding, etag, last_modified, now, now))
+            self.conn.commit()
+            self.stats["stored"] += 1
+
+    def evict(self, max_bytes: int = None, max_age: float = None) -> int:
+        """
+        Descarta as respostas não validadas há mais de `max_age` segundos e, se o total passar de
+        `max_bytes`, as usadas há mais tempo. Os corpos sem nenhuma URL apontando para eles são apagados.
+        Retorna o número de respostas descartadas.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            removed = self.conn.execute(
+                "SELECT url, corpo_sha256 FROM respostas WHERE validado_em < ?", (time.time() - max_age,)
+            ).fetchall()
+            removed_urls = {url for url, _ in removed}
+            total = self.conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas WHERE validado_em >= ?",
+                                      (time.time() - max_age,)).fetchone()[0]
+            if total > max_bytes:
+                for url, digest, size in self.conn.execute("SELECT url, corpo_sha256, tamanho FROM respostas ORDER BY usado_em"):
+                    if total <= max_bytes:
+                        break
+                    if url not in removed_urls:
+                        removed.append((url, digest))
+                        removed_urls.add(url)
+                        total -= size
+            self.conn.executemany("DELETE FROM respostas WHERE url = ?", [(url,) for url in removed_urls])
+            self.conn.commit()
+            for digest in {digest for _, digest in removed}:
+                if self.conn.execute("SELECT 1 FROM respostas WHERE corpo_sha256 = ? LIMIT 1", (digest,)).fetchone() is None:
+                    try:
+                        os.remove(self._object_path(digest))
+                    except FileNotFoundError:
+                        pass
+        return len(removed)
+
+    def summary(self) -> str:
+        return (f"Cache HTTP: {self.stats['fresh']} respostas do cache, {self.stats['revalidated']} revalidadas (304), "
+                f"{self.stats['stored']} baixadas e guardadas, {self.stats['misses']} ausentes.")
+
+    def close(self, evict: bool = True):
+        if evict:
+            self.evict()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,222 @@
+# jobs.py
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+# --- Configurações ---
+JOB_LOG_DIR = "data/jobs" # Saída (prints) de cada atualização rodada em segundo plano
+JOB_STALE_AFTER = 300 # Segundos sem sinal de vida após os quais uma atualização é considerada interrompida
+ACTIVE_STATUSES = ("pendente", "executando")
+
+class JobAlreadyRunningError(RuntimeError):
+    """
+    Já existe uma atualização pendente ou em execução no banco.
+    """
+
+# --- Estado das atualizações no banco ---
+class JobStore:
+    """
+    Estado e progresso das atualizações em segundo plano na tabela `jobs_atualizacao`, no mesmo
+    banco da tabela `imoveis` (em modo WAL, então o visualizador lê enquanto a atualização grava).
+
+    Um índice único parcial garante que no máximo uma atualização esteja pendente ou em execução:
+    é a trava contra execuções duplicadas, mesmo com várias abas ou sessões do Streamlit. Uma
+    atualização sem sinal de vida há mais de JOB_STALE_AFTER segundos (processo morto) é
+    marcada como interrompida e deixa de travar as próximas.
+    """
+
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+        self.conn = sqlite3.connect(db_name, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(f'''
+            CREATE TABLE IF NOT EXISTS jobs_atualizacao (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                status TEXT NOT NULL,
+                pid INTEGER,
+                parametros_json TEXT,
+                arquivo_log TEXT,
+                criado_em REAL NOT NULL,
+                iniciado_em REAL,
+                atualizado_em REAL NOT NULL,
+                concluido_em REAL,
+                paginas_concluidas INTEGER NOT NULL DEFAULT 0,
+                paginas_total INTEGER NOT NULL DEFAULT 0,
+                itens_raspados INTEGER NOT NULL DEFAULT 0,
+                itens_avaliados INTEGER NOT NULL DEFAULT 0,
+                itens_gravados INTEGER NOT NULL DEFAULT 0,
+                erros INTEGER NOT NULL DEFAULT 0,
+                progresso REAL,
+                eta_s REAL,
+                cancelar INTEGER NOT NULL DEFAULT 0,
+                mensagem TEXT
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_atualizacao_ativo
+                ON jobs_atualizacao ((status IN {ACTIVE_STATUSES})) WHERE status IN {ACTIVE_STATUSES};
+        ''')
+        self.conn.commit()
+
+    def _mark_stale(self, now: float):
+        self.conn.execute(f'''
+            UPDATE jobs_atualizacao SET status = 'interrompido', concluido_em = ?,
+                mensagem = 'Sem sinal de vida do processo há mais de {JOB_STALE_AFTER} s.'
+            WHERE status IN {ACTIVE_STATUSES} AND atualizado_em < ?
+        ''', (now, now - JOB_STALE_AFTER))
+
+    def create(self, params: dict) -> int:
+        """
+        Registra uma nova atualização pendente e retorna o seu id.
+        Lança JobAlreadyRunningError se outra estiver pendente ou em execução.
+        """
+        now = time.time()
+        try:
+            with self.conn:
+                self._mark_stale(now)
+                cursor = self.conn.execute('''
+                    INSERT INTO jobs_atualizacao (status, parametros_json, criado_em, atualizado_em)
+                    VALUES ('pendente', ?, ?, ?)
+                ''', (json.dumps(params, ensure_ascii=False), now, now))
+        except sqlite3.IntegrityError:
+            active = self.active()
+            description = f"A atualização {active['id']} já está {active['status']}." if active else "Já há uma atualização em andamento."
+            raise JobAlreadyRunningError(description) from None
+        return cursor.lastrowid
+
+    def update(self, job_id: int, **fields):
+        """
+        Atualiza as colunas informadas; `atualizado_em` (o sinal de vida) é sempre renovado.
+        """
+        fields["atualizado_em"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self.conn:
+            self.conn.execute(f"UPDATE jobs_atualizacao SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: int) -> dict:
+        row = self.conn.execute("SELECT * FROM jobs_atualizacao WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def latest(self) -> dict:
+        with self.conn:
+            self._mark_stale(time.time())
+        row = self.conn.execute("SELECT * FROM jobs_atualizacao ORDER BY id DESC LIMIT 1").fetchone()
+        return dict(row) if row else None
+
+    def active(self) -> dict:
+        row = self.conn.execute(
+            f"SELECT * FROM jobs_atualizacao WHERE status IN {ACTIVE_STATUSES} ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        return dict(row) if row else None
+
+    def request_cancel(self, job_id: int):
+        with self.conn:
+            self.conn.execute("UPDATE jobs_atualizacao SET cancelar = 1 WHERE id = ?", (job_id,))
+
+    def cancel_requested(self, job_id: int) -> bool:
+        row = self.conn.execute("SELECT cancelar FROM jobs_atualizacao WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def estimate_progress(progress: dict, elapsed: float) -> tuple:
+    """
+    Fração concluída (0 a 1) e segundos restantes estimados, a partir dos contadores do pipeline.
+    O total de itens é estimado pelas páginas principais (categorias ainda não iniciadas contam como
+    a média das iniciadas) e pelos itens por página vistos até agora. (None, None) enquanto não há dados.
+    """
+    pages_done = progress.get("pages_done", 0)
+    started = progress.get("categories_started", 0)
+    if not pages_done or not started:
+        return None, None
+    seen = progress["scraped"] + progress["duplicates"]
+    estimated_pages = progress["pages_total"] * progress["categories_total"] / started
+    estimated_items = max(seen, estimated_pages * seen / pages_done)
+    processed = progress["evaluated"] + progress["prefiltered"] + progress["duplicates"]
+    if not processed or not estimated_items:
+        return 0.0, None
+    fraction = min(1.0, processed / estimated_items)
+    return fraction, max(0.0, estimated_items - processed) * elapsed / processed
+
+# --- Execução em segundo plano ---
+def _detached_process_options() -> dict:
+    # O processo da atualização não deve morrer junto com a sessão (ou o processo) do Streamlit
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS}
+    return {"start_new_session": True}
+
+def start_refresh_job(db_name: str, params: dict, log_dir: str = JOB_LOG_DIR) -> int:
+    """
+    Inicia a atualização (run_pipeline com `params`) em um processo separado e retorna o id do job.
+    A chamada volta imediatamente; o progresso fica na tabela `jobs_atualizacao`.
+    `params` pode ter a chave "metrics", com os argumentos de metrics.configure_metrics.
+    Lança JobAlreadyRunningError se já houver uma atualização em andamento.
+    """
+    with JobStore(db_name) as store:
+        job_id = store.create(params)
+        os.makedirs(log_dir, exist_ok=True)
+        log_file = os.path.join(log_dir, f"atualizacao_{job_id}.log")
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = {**os.environ, "PYTHONUNBUFFERED": "1",
+               "PYTHONPATH": os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")]))}
+        try:
+            with open(log_file, "ab") as log:
+                process = subprocess.Popen([sys.executable, "-m", "modules.jobs", db_name, str(job_id)],
+                                           stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                           cwd=os.getcwd(), env=env, **_detached_process_options())
+        except OSError as e:
+            store.update(job_id, status="falhou", concluido_em=time.time(), mensagem=f"Erro ao iniciar o processo: {e}")
+            raise
+        store.update(job_id, pid=process.pid, arquivo_log=log_file)
+    print(f"Atualização {job_id} iniciada em segundo plano (PID {process.pid}, log em '{log_file}').")
+    return job_id
+
+def run_job(db_name: str, job_id: int) -> dict:
+    """
+    Executa a atualização registrada (chamada no processo separado), gravando o progresso no banco.
+    """
+    # Import local: o pipeline (e o scraper) só são carregados no processo da atualização
+    from .metrics import configure_metrics
+    from .pipeline import run_pipeline
+
+    store = JobStore(db_name)
+    params = json.loads(store.get(job_id)["parametros_json"])
+    metrics_config = params.pop("metrics", None)
+    if metrics_config:
+        configure_metrics(**metrics_config)
+    start_time = time.monotonic()
+    store.update(job_id, status="executando", pid=os.getpid(), iniciado_em=time.time())
+
+    def on_progress(progress: dict) -> bool:
+        fraction, eta = estimate_progress(progress, time.monotonic() - start_time)
+        store.update(job_id, paginas_concluidas=progress["pages_done"], paginas_total=progress["pages_total"],
+                     itens_raspados=progress["scraped"], itens_avaliados=progress["evaluated"] + progress["prefiltered"],
+                     itens_gravados=progress["stored"], erros=progress["errors"], progresso=fraction, eta_s=eta)
+        return not store.cancel_requested(job_id)
+
+    try:
+        stats = run_pipeline(**params, progress_callback=on_progress)
+    except BaseException as e:
+        store.update(job_id, status="falhou", concluido_em=time.time(), mensagem=f"{type(e).__name__}: {e}")
+        store.close()
+        raise
+    cancelled = store.cancel_requested(job_id)
+    store.update(job_id, status="cancelado" if cancelled else "concluido", concluido_em=time.time(),
+                 progresso=None if cancelled else 1.0, eta_s=0,
+                 mensagem=f"{stats['stored']} avaliações gravadas, {stats['saved']} com pontuação >= {params.get('score_threshold')}.")
+    store.close()
+    return stats
+
+
+if __name__ == "__main__":
+    # Uso (feito por start_refresh_job): python -m modules.jobs <banco.db> <id do job>
+    run_job(sys.argv[1], int(sys.argv[2]))
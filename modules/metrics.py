@@ -0,0 +1,239 @@
+# metrics.py
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Configurações ---
+METRICS_ENABLED = True # Desativado, timers e contadores viram chamadas vazias (custo desprezível)
+METRICS_LOG_FILE = "data/metrics.jsonl" # Log estruturado: um resumo JSON por execução
+METRICS_PROMETHEUS_FILE = None # Ex.: "data/metrics.prom" (formato texto do Prometheus, para o textfile collector)
+# Limites (segundos) dos buckets dos histogramas de latência
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+# --- Histograma de latências ---
+class Histogram:
+    """
+    Histograma cumulativo de latências com buckets fixos, como os do Prometheus.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, limit in enumerate(self.buckets):
+            if value <= limit:
+                self.bucket_counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """
+        Quantil aproximado (limite superior do bucket onde ele cai).
+        """
+        if not self.count:
+            return None
+        target = q * self.count
+        accumulated = 0
+        for limit, bucket_count in zip(self.buckets, self.bucket_counts):
+            accumulated += bucket_count
+            if accumulated >= target:
+                return min(limit, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": self.min,
+            "max": self.max,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+# --- Registro de métricas ---
+class MetricsRegistry:
+    """
+    Contadores e histogramas de latência por etapa (http_fetch, parse_listing, parse_details,
+    llm_call, db_write...). Pode ser usado por várias threads ao mesmo tempo.
+
+    Uso:
+        with metrics.timer("llm_call"):
+            ...
+        metrics.count("llm_json_errors")
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started_at = time.time()
+
+    def count(self, name: str, amount: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, name: str):
+        """
+        Context manager que mede a duração do bloco no histograma `name`.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timer(name)
+
+    @contextmanager
+    def _timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "latencies": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            }
+
+    def to_prometheus(self, prefix: str = "ai_leilao") -> str:
+        """
+        Métricas no formato texto de exposição do Prometheus.
+        """
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {value}")
+            for name, histogram in sorted(self.histograms.items()):
+                metric = f"{prefix}_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                accumulated = 0
+                for limit, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                    accumulated += bucket_count
+                    lines.append(f'{metric}_bucket{{le="{limit}"}} {accumulated}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum {histogram.sum}")
+                lines.append(f"{metric}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """
+        Grava as métricas em `path` de forma atômica (para o textfile collector do node_exporter).
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+# Registro global, usado pelo scraper, pelo avaliador e pelo gravador
+metrics = MetricsRegistry()
+
+def configure_metrics(enabled: bool = METRICS_ENABLED, log_file: str = METRICS_LOG_FILE,
+                      prometheus_file: str = METRICS_PROMETHEUS_FILE):
+    global METRICS_LOG_FILE, METRICS_PROMETHEUS_FILE
+    metrics.enabled = enabled
+    METRICS_LOG_FILE = log_file
+    METRICS_PROMETHEUS_FILE = prometheus_file
+
+# --- Log no console ---
+_log_lock = threading.Lock()
+
+def log(message: str):
+    """
+    Imprime uma linha inteira de uma vez. O print() escreve o texto e a quebra de linha
+    separadamente, e as linhas de threads concorrentes (avaliadores, gravador) saíam emendadas.
+    """
+    with _log_lock:
+        sys.stdout.write(f"{message}\n")
+
+# --- Resumo por execução ---
+def record_run(db_name: str, run_type: str, summary: dict, duration: float) -> dict:
+    """
+    Registra o resumo de uma execução (itens vistos, pulados, avaliados, salvos, erros) com as
+    métricas por etapa na tabela `metricas_execucoes` do banco e no log estruturado, e atualiza
+    o arquivo do Prometheus, se configurado. Não faz nada com as métricas desativadas.
+    """
+    if not metrics.enabled:
+        return None
+    record = {
+        "tipo": run_type,
+        "iniciado_em": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(metrics.started_at)),
+        "duracao_s": round(duration, 3),
+        "resumo": summary,
+        **metrics.snapshot(),
+    }
+    if db_name:
+        try:
+            conn = sqlite3.connect(db_name)
+            with conn:
+                conn.execute('''
+                    INSERT INTO metricas_execucoes (
+                        tipo, iniciado_em, duracao_s, itens_vistos, itens_pulados, itens_avaliados,
+                        itens_salvos, erros, metricas_json
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (run_type, record["iniciado_em"], record["duracao_s"], summary.get("seen"), summary.get("skipped"),
+                      summary.get("evaluated"), summary.get("saved"), summary.get("errors"),
+                      json.dumps({"counters": record["counters"], "latencies": record["latencies"]}, ensure_ascii=False)))
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar as métricas da execução no DB: {e}")
+    if METRICS_LOG_FILE:
+        directory = os.path.dirname(METRICS_LOG_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(METRICS_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    if METRICS_PROMETHEUS_FILE:
+        metrics.write_prometheus(METRICS_PROMETHEUS_FILE)
+    return record
+
+def format_latencies(snapshot: dict) -> str:
+    """
+    Resumo legível do tempo gasto em cada etapa.
+    """
+    parts = []
+    for name, latency in sorted(snapshot["latencies"].items(), key=lambda item: -item[1]["sum"]):
+        parts.append(f"{name}: {latency['count']}x, total {latency['sum']:.1f}s, p50 {latency['p50']:.3f}s, p95 {latency['p95']:.3f}s")
+    return "Tempo por etapa: " + ("; ".join(parts) if parts else "n/d") + "."
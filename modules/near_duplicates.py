@@ -0,0 +1,357 @@
+# near_duplicates.py
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+import zlib
+
+import requests
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .crawl_state import link_key
+from .data_menager import parse_brl_price
+from .metrics import log
+from .processor import OLLAMA_API_URL
+from .prompts import PROMPT_VERSION
+
+# --- Configurações ---
+DEDUP_METHOD = "minhash" # "minhash" (assinatura local, sem rede) ou "ollama" (embeddings do Ollama)
+DEDUP_THRESHOLDS = {"minhash": 0.8, "ollama": 0.95} # Similaridade mínima para reutilizar a avaliação
+DEDUP_MIN_CHARS = 200 # Textos mais curtos que isso não são comparados (pouca informação para decidir)
+DEDUP_PRICE_TOLERANCE = 0.01 # Diferença relativa máxima de preço para reutilizar (o preço muda a avaliação, ex.: 2º leilão)
+DEDUP_WAIT_TIMEOUT = 300 # Segundos de espera pela avaliação do representante, se ainda estiver em andamento
+MINHASH_PERMUTATIONS = 128 # Tamanho da assinatura MinHash (erro da similaridade estimada ~ 1/sqrt(128))
+SHINGLE_SIZE = 3 # Palavras por shingle
+OLLAMA_EMBED_MODEL = "nomic-embed-text" # Modelo de embeddings do Ollama (método "ollama")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"\w+")
+
+def signature_text(record: dict) -> str:
+    """
+    Texto comparado: descrição completa e localização, sem acentos, em minúsculas e sem pontuação.
+    """
+    description = record.get("descricao_completa") or ""
+    if description.startswith("Não encontrad"):
+        description = ""
+    location = record.get("localizacao_detalhada") or ""
+    if not location or location.startswith("Não encontrad"):
+        location = record.get("localidade_pagina_principal") or ""
+    text = unicodedata.normalize("NFKD", f"{description}\n{location}".lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(_WORD_RE.findall(text))
+
+def record_price(record: dict) -> float:
+    """
+    Preço atual do imóvel em número (NaN se não informado), comparado com o do representante do grupo.
+    """
+    price = parse_brl_price(record.get("preco"))
+    return float("nan") if price is None else price
+
+def index_path_for(db_name: str) -> str:
+    """
+    Arquivo do índice, ao lado do banco: "data/imoveis.db" -> "data/imoveis_quase_duplicados.npz".
+    """
+    return f"{os.path.splitext(db_name)[0]}_quase_duplicados.npz"
+
+# --- Assinaturas ---
+class MinHashSigner:
+    """
+    Assinatura MinHash dos shingles de palavras do texto: a fração de posições iguais entre
+    duas assinaturas estima a similaridade de Jaccard entre os conjuntos de shingles.
+    """
+
+    dtype = "uint32"
+
+    def __init__(self, num_perm: int = MINHASH_PERMUTATIONS, shingle_size: int = SHINGLE_SIZE, seed: int = 1):
+        self.shingle_size = shingle_size
+        generator = np.random.default_rng(seed)
+        # a, b < 2^32: (a * h + b) cabe em 64 bits para hashes h de 32 bits
+        self.a = generator.integers(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self.b = generator.integers(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def sign(self, text: str):
+        words = text.split()
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)} if words else set()
+        if not shingles:
+            return None
+        hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64,
+                             count=len(shingles))
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def similarities(matrix, vector):
+        return (matrix == vector).mean(axis=1)
+
+class OllamaEmbeddingSigner:
+    """
+    Embedding do texto pelo endpoint /api/embed do Ollama, normalizado e guardado em float16
+    (metade do espaço do float32); a similaridade é o cosseno.
+    """
+
+    dtype = "float16"
+
+    def __init__(self, api_url: str, model: str = OLLAMA_EMBED_MODEL, timeout: float = 60):
+        # Mesmo servidor do /api/generate
+        self.url = f"{api_url.rsplit('/api/', 1)[0]}/api/embed"
+        self.model = model
+        self.timeout = timeout
+
+    def sign(self, text: str):
+        try:
+            response = requests.post(self.url, json={"model": self.model, "input": text}, timeout=self.timeout)
+            response.raise_for_status()
+            vector = np.asarray(response.json()["embeddings"][0], dtype=np.float32)
+        except (requests.exceptions.RequestException, KeyError, IndexError, ValueError) as e:
+            print(f"  > Erro ao calcular o embedding no Ollama: {e}. Imóvel não será comparado.")
+            return None
+        norm = np.linalg.norm(vector)
+        return (vector / norm).astype(np.float16) if norm else None
+
+    @staticmethod
+    def similarities(matrix, vector):
+        return matrix.astype(np.float32) @ vector.astype(np.float32)
+
+# --- Índice de quase-duplicatas ---
+class NearDuplicateIndex:
+    """
+    Índice das assinaturas dos imóveis já avaliados, em uma matriz NumPy gravada em `index_path`
+    (ao lado do banco), para reconhecer o mesmo imóvel anunciado mais de uma vez (1º e 2º leilão,
+    novo número de leilão, outra categoria) e reaproveitar a avaliação em vez de chamar a LLM.
+
+    Cada imóvel pertence a um grupo cujo representante é o primeiro avaliado; um imóvel com
+    similaridade >= `threshold` com algum imóvel do índice, e com o preço igual ao do representante
+    (diferença relativa de até `price_tolerance`; sem preço, só com outro sem preço), recebe a avaliação do representante do
+    grupo (a desta execução ou, de execuções anteriores, a gravada na tabela `imoveis` pelos mesmos
+    modelos e com a versão atual do prompt), marcada com "duplicate_of" (link do representante) e
+    "similarity", gravados nas colunas `duplicata_de` e `similaridade_duplicata`.
+
+    Uso, por várias threads ao mesmo tempo:
+        reused, claim = index.claim(record, models=(modelo,))
+        if reused is None:
+            evaluation = ... (avalia na LLM)
+            index.resolve(claim, evaluation)
+    """
+
+    def __init__(self, db_name: str, method: str = DEDUP_METHOD, threshold: float = None, index_path: str = None,
+                 api_url: str = None, embed_model: str = OLLAMA_EMBED_MODEL, price_tolerance: float = DEDUP_PRICE_TOLERANCE):
+        if np is None:
+            raise RuntimeError("A detecção de quase-duplicatas precisa do pacote 'numpy'.")
+        if method == "minhash":
+            self.signer = MinHashSigner()
+        elif method == "ollama":
+            self.signer = OllamaEmbeddingSigner(api_url or OLLAMA_API_URL, embed_model)
+        else:
+            raise ValueError(f"Método de detecção de quase-duplicatas desconhecido: '{method}'.")
+        self.db_name = db_name
+        self.method = method
+        self.threshold = DEDUP_THRESHOLDS[method] if threshold is None else threshold
+        self.price_tolerance = price_tolerance
+        self.index_path = index_path or index_path_for(db_name)
+        self.stats = {"reused": 0, "indexed": 0}
+        self._lock = threading.Lock()
+        self._keys, self._links, self._representatives, self._prices = [], [], [], []
+        self._rows_by_key = {}
+        self._vectors = None
+        self._count = 0
+        self._pending = {} # linha do representante -> threading.Event, enquanto a avaliação está em andamento
+        self._evaluations = {} # linha do representante -> avaliação feita nesta execução
+        self._load()
+
+    # --- Persistência ---
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        with np.load(self.index_path, allow_pickle=False) as data:
+            if str(data["method"]) != self.method:
+                print(f"Índice de quase-duplicatas '{self.index_path}' é do método '{data['method']}'. Começando um novo.")
+                return
+            self._keys = data["keys"].tolist()
+            self._links = data["links"].tolist()
+            self._representatives = data["representatives"].tolist()
+            self._vectors = data["vectors"].copy()
+            # Índices gravados antes do preço: sem preço, nenhum imóvel novo (com preço) reaproveita essas avaliações
+            self._prices = data["prices"].tolist() if "prices" in data.files else [float("nan")] * len(self._keys)
+        self._count = len(self._keys)
+        self._rows_by_key = {key: row for row, key in enumerate(self._keys)}
+        print(f"Índice de quase-duplicatas: {self._count} imóveis carregados de '{self.index_path}'.")
+
+    def save(self):
+        """
+        Grava o índice de forma atômica. Linhas descartadas (avaliação que falhou) não são gravadas.
+        """
+        with self._lock:
+            rows = [row for row in range(self._count) if self._representatives[row] >= 0]
+            renumbered = {row: new_row for new_row, row in enumerate(rows)}
+            representatives = [renumbered.get(self._representatives[row], new_row) for new_row, row in enumerate(rows)]
+            vectors = self._vectors[rows] if rows else np.empty((0, 0), dtype=self.signer.dtype)
+            directory = os.path.dirname(self.index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, method=np.array(self.method), keys=np.array([self._keys[row] for row in rows], dtype=str),
+                         links=np.array([self._links[row] for row in rows], dtype=str),
+                         representatives=np.array(representatives, dtype=np.int32), vectors=vectors,
+                         prices=np.array([self._prices[row] for row in rows], dtype=np.float64))
+            os.replace(tmp_path, self.index_path)
+
+    # --- Índice em memória ---
+    def _add_row(self, key: str, link: str, vector, price: float, representative: int = None) -> int:
+        row = self._rows_by_key.get(key)
+        if row is None:
+            row = self._count
+            if self._vectors is None or len(self._vectors) == 0:
+                self._vectors = np.empty((64, len(vector)), dtype=vector.dtype)
+            elif row >= len(self._vectors):
+                # Capacidade dobrada: inserir n linhas custa O(n) no total
+                self._vectors = np.concatenate([self._vectors, np.empty_like(self._vectors)])
+            self._keys.append(key)
+            self._links.append(link)
+            self._representatives.append(row)
+            self._prices.append(price)
+            self._rows_by_key[key] = row
+            self._count += 1
+        self._vectors[row] = vector
+        self._links[row] = link
+        self._prices[row] = price
+        self._representatives[row] = row if representative is None else representative
+        return row
+
+    def _best_match(self, vector, price: float, exclude_row: int = None) -> tuple:
+        if not self._count:
+            return None, 0.0
+        similarities = self.signer.similarities(self._vectors[:self._count], vector)
+        representatives = np.asarray(self._representatives)
+        valid = representatives >= 0
+        # Só grupos cujo representante tem o mesmo preço (a avaliação reaproveitada é a dele)
+        representative_prices = np.asarray(self._prices, dtype=np.float64)[np.where(valid, representatives, 0)]
+        if np.isnan(price):
+            same_price = np.isnan(representative_prices)
+        else:
+            same_price = np.abs(representative_prices - price) <= self.price_tolerance * np.maximum(np.abs(price), 1.0)
+        similarities[~(valid & same_price)] = -1.0
+        if exclude_row is not None:
+            similarities[exclude_row] = -1.0
+        row = int(similarities.argmax())
+        return row, float(similarities[row])
+
+    def _stored_evaluation(self, representative: int, models: tuple = None) -> dict:
+        # Avaliação de um representante de outra execução: a gravada na tabela `imoveis`, desde que feita
+        # com a versão atual do prompt e (se informados) por um dos `models`
+        query = ("SELECT pontuacao_ollama, pontos_positivos, pontos_negativos, modelo_avaliacao, pontuacao_triagem, "
+                 "pontuacao_modelo_grande FROM imoveis WHERE link_detalhes = ? AND NOT descartado_prefiltro AND versao_prompt = ?")
+        params = [self._links[representative], PROMPT_VERSION]
+        if models:
+            query += f" AND modelo_avaliacao IN ({', '.join('?' * len(models))})"
+            params += list(models)
+        conn = sqlite3.connect(f"file:{self.db_name}?mode=ro", uri=True)
+        try:
+            row = conn.execute(query, params).fetchone()
+        except sqlite3.Error:
+            row = None
+        finally:
+            conn.close()
+        if row is None or row[0] is None:
+            return None
+        return {"score": row[0], "positives": row[1], "negatives": row[2], "model": row[3],
+                "screening_score": row[4], "full_score": row[5]}
+
+    def claim(self, record: dict, models: tuple = None) -> tuple:
+        """
+        Procura o imóvel no índice. Retorna (avaliação reaproveitada, None) se ele é quase-duplicata de
+        um imóvel já avaliado, ou (None, claim) se deve ser avaliado; nesse caso, o chamador deve
+        chamar `resolve(claim, avaliação)` ao terminar (e as quase-duplicatas dele esperam por ela).
+        Imóveis sem link ou com pouco texto retornam (None, None) e não entram no índice.
+        Avaliações gravadas em execuções anteriores só são reaproveitadas se feitas por um dos
+        `models` (None: qualquer modelo).
+        """
+        key = link_key(record.get("link_detalhes"))
+        price = record_price(record)
+        text = signature_text(record)
+        if not key or len(text) < DEDUP_MIN_CHARS:
+            return None, None
+        vector = self.signer.sign(text)
+        if vector is None:
+            return None, None
+
+        with self._lock:
+            own_row = self._rows_by_key.get(key)
+            row, similarity = self._best_match(vector, price, exclude_row=own_row)
+            # O próprio imóvel é o representante do grupo encontrado: é reavaliado como representante
+            if row is None or similarity < self.threshold or self._representatives[row] == own_row:
+                new_row = self._add_row(key, record.get("link_detalhes"), vector, price)
+                self._pending[new_row] = threading.Event()
+                return None, new_row
+            representative = self._representatives[row]
+            event = self._pending.get(representative)
+        if event is not None:
+            event.wait(DEDUP_WAIT_TIMEOUT)
+
+        with self._lock:
+            evaluation = self._evaluations.get(representative)
+            representative_link = self._links[representative]
+        if evaluation is None:
+            evaluation = self._stored_evaluation(representative, models)
+        with self._lock:
+            if evaluation is None:
+                # Representante sem avaliação válida: este imóvel é avaliado e passa a representar o grupo
+                new_row = self._add_row(key, record.get("link_detalhes"), vector, price)
+                self._pending[new_row] = threading.Event()
+                return None, new_row
+            self._add_row(key, record.get("link_detalhes"), vector, price, representative)
+            self.stats["reused"] += 1
+        log(f"  > '{record.get('titulo')}' é o mesmo imóvel de {representative_link} "
+            f"(similaridade {similarity:.2f}). Reutilizando a avaliação: Pontuação: {evaluation['score']}/10.")
+        return {"score": evaluation["score"], "positives": evaluation["positives"], "negatives": evaluation["negatives"],
+                "model": evaluation.get("model"), "screening_score": evaluation.get("screening_score"),
+                "full_score": evaluation.get("full_score"), "duplicate_of": representative_link,
+                "similarity": round(similarity, 4)}, None
+
+    def resolve(self, claim: int, evaluation: dict):
+        """
+        Registra a avaliação do imóvel reivindicado em `claim`; se ela falhou, o imóvel sai do índice.
+        """
+        if claim is None:
+            return
+        with self._lock:
+            if evaluation is None or evaluation.get("failed"):
+                self._representatives[claim] = -1
+            else:
+                self._evaluations[claim] = evaluation
+                self.stats["indexed"] += 1
+            event = self._pending.pop(claim, None)
+        if event is not None:
+            event.set()
+
+    def summary(self) -> str:
+        return (f"Quase-duplicatas ({self.method}): {self.stats['reused']} avaliações reaproveitadas, "
+                f"{self.stats['indexed']} imóveis novos no índice ({self._count} no total).")
+
+    def close(self):
+        self.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def open_near_duplicate_index(db_name: str, method: str = DEDUP_METHOD, api_url: str = None) -> NearDuplicateIndex:
+    """
+    Abre o índice de quase-duplicatas do banco, ou retorna None se `method` for None ou o NumPy não estiver instalado.
+    """
+    if not method:
+        return None
+    if np is None:
+        print("Pacote 'numpy' não instalado. Detecção de quase-duplicatas desativada.")
+        return None
+    return NearDuplicateIndex(db_name, method=method, api_url=api_url)
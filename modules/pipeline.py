@@ -0,0 +1,335 @@
+# pipeline.py
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .crawl_state import CRAWL_STATE_DB, CrawlState, link_key
+from .eval_cache import EvaluationCache
+from .evaluator import CASCADE_MARGIN, OllamaEvaluationPool, uncertainty_band
+from .fetcher import Fetcher
+from .frontier import FRONTIER_DB, Frontier, crawl_with_workers
+from .metrics import format_latencies, log, metrics, record_run
+from .near_duplicates import open_near_duplicate_index
+from .processor import PropertyWriter, is_interesting, prefilter_record, prefilter_rejection, setup_database
+from .raw_store import category_output_file, iter_records, legacy_output_file, migrate_legacy_store
+from .scrapper import scrap_items
+
+# --- Configurações ---
+EVAL_WORKERS = 4 # Máximo de threads avaliando imóveis com o Ollama em paralelo (a concorrência efetiva é adaptativa)
+QUEUE_SIZE = 32 # Capacidade de cada fila entre os estágios (controla a contrapressão)
+CATEGORY_WORKERS = 3 # Categorias raspadas ao mesmo tempo (todas dividem o mesmo limite de requisições por segundo)
+PROGRESS_INTERVAL = 2.0 # Segundos entre as chamadas de `progress_callback`
+
+_END = object() # Marcador de fim de fila
+# Prioridades na fila de avaliação: os priorizados pelo pré-filtro saem primeiro e o fim de fila por último
+_PRIORITY = {"fast_track": 0, "evaluate": 1, "reject": 1}
+_END_PRIORITY = 2
+
+def _put(q: queue.Queue, item, stop_event: threading.Event) -> bool:
+    """
+    Coloca o item na fila, bloqueando enquanto ela estiver cheia (contrapressão).
+    Retorna False se o pipeline foi interrompido durante a espera.
+    """
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+# --- Pipeline scraping -> avaliação -> banco de dados ---
+def run_pipeline(urls: dict, card_container_class: str, summary_class: str, output_file: str, db_name: str,
+                 score_threshold: int, eval_workers: int = EVAL_WORKERS, queue_size: int = QUEUE_SIZE,
+                 time_delay: float = 1.5, max_workers: int = 1, requests_per_second: float = None,
+                 incremental: bool = False, state_db: str = CRAWL_STATE_DB, use_cache: bool = True,
+                 ollama_api_url: str = None, use_prefilter: bool = True, parser: str = None,
+                 http_cache_dir: str = None, replay: bool = False, category_workers: int = CATEGORY_WORKERS,
+                 progress_callback=None, dedup_method: str = "minhash", ollama_model: str = None,
+                 screening_model: str = None, cascade_margin: int = CASCADE_MARGIN, crawl_processes: int = 0,
+                 frontier_db: str = FRONTIER_DB) -> dict:
+    """
+    Raspa as categorias de `urls` e avalia/grava os imóveis à medida que são raspados.
+
+    As categorias são raspadas em paralelo (até `category_workers` ao mesmo tempo) por um único
+    Fetcher, de modo que o limite de `requests_per_second` vale para o site como um todo; os itens
+    de cada categoria vão para o seu próprio JSONL (raw_store.category_output_file(`output_file`, categoria))
+    e levam o campo "categoria", gravado na coluna de mesmo nome. O arquivo antigo, anterior à divisão
+    por categoria (`output_file` com extensão .json), é migrado uma única vez para o JSONL "legado"
+    (raw_store.migrate_legacy_store), cujos itens contam como conhecidos no crawl incremental. Com `crawl_processes` > 0, o scraping
+    é feito por esse número de processos que dividem a fila durável `frontier_db` (ver frontier.py):
+    o limite de taxa continua global e uma execução interrompida é retomada de onde parou: cada item
+    só é dado como lido na fila (e lembrado no crawl incremental) depois de gravado no banco.
+
+    Os três estágios rodam em paralelo, ligados por filas limitadas:
+    scraping (uma thread por categoria) -> avaliação com o Ollama (`eval_workers` threads) -> gravação no banco (1 thread,
+    em lotes por um PropertyWriter; todas as avaliações são gravadas e o limiar vale na consulta).
+    As chamadas ao Ollama passam por um OllamaEvaluationPool, que ajusta a concorrência efetiva
+    à latência e à taxa de erros observadas; antes delas, o pré-filtro de regras descarta os
+    imóveis obviamente fora do perfil sem chamar a LLM e passa os priorizados ("fast_track") à frente
+    dos que aguardam na fila de avaliação, e imóveis quase idênticos a um já avaliado
+    (`dedup_method`: "minhash", "ollama" ou None; ver near_duplicates.py) reaproveitam a avaliação dele.
+    Com `screening_model`, a avaliação é uma cascata: o modelo pequeno avalia todos os imóveis e só
+    os de nota a até `cascade_margin` pontos do limiar vão para `ollama_model` (ver evaluator.uncertainty_band).
+    Quando uma fila enche, o estágio anterior espera, de modo que o tempo total é ditado
+    pelo estágio mais lento e não pela soma dos estágios. Cada imóvel (pelo link de detalhes)
+    é avaliado no máximo uma vez por execução, mesmo que apareça em mais de uma categoria, apenas os itens raspados nesta execução entram
+    no pipeline e avaliações já guardadas no cache (`use_cache`) são reaproveitadas.
+    Ctrl+C ou um erro em qualquer estágio encerram todos os estágios de forma limpa.
+
+    `progress_callback`, se informado, é chamado a cada PROGRESS_INTERVAL segundos (e ao final) com
+    os contadores da execução mais 'pages_done', 'pages_total', 'categories_started' e 'categories_total';
+    se ele retornar False, o pipeline é encerrado como no Ctrl+C.
+    Ao final, o resumo da execução e o tempo gasto em cada etapa vão para a tabela
+    `metricas_execucoes` e para o log de métricas (ver metrics.record_run).
+
+    Returns:
+        dict: Contadores da execução ('scraped', 'duplicates', 'prefiltered', 'fast_tracked', 'evaluated', 'stored',
+        'saved', 'errors').
+        'stored' conta todas as avaliações gravadas; 'saved', as com pontuação >= `score_threshold`.
+    """
+    migrate_legacy_store(output_file)
+    if incremental:
+        with CrawlState(state_db) as crawl_state:
+            crawl_state.remember(iter_records(legacy_output_file(output_file)))
+
+    # Fila com prioridade: entradas (prioridade, ordem de chegada, item, decisão do pré-filtro)
+    scraped_queue = queue.PriorityQueue(maxsize=queue_size)
+    arrival = itertools.count()
+    evaluated_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+    stats = {"scraped": 0, "duplicates": 0, "prefiltered": 0, "fast_tracked": 0, "evaluated": 0, "stored": 0, "saved": 0, "errors": 0}
+    stats_lock = threading.Lock()
+    workers_alive = [eval_workers]
+
+    def count(key: str):
+        with stats_lock:
+            stats[key] += 1
+
+    seen_links = set()
+    pages = {} # categoria -> (página principal atual, total de páginas)
+
+    def progress() -> dict:
+        with stats_lock:
+            return {**stats, "pages_done": sum(done for done, _ in pages.values()),
+                    "pages_total": sum(total for _, total in pages.values()),
+                    "categories_started": len(pages), "categories_total": len(urls)}
+
+    def forward(item: dict) -> bool:
+        """
+        Passa o item raspado para a avaliação; retorna False se o pipeline foi interrompido.
+        """
+        if stop_event.is_set():
+            return False
+        # Um imóvel listado em mais de uma categoria é avaliado uma única vez
+        key = link_key(item.get("link_detalhes"))
+        with stats_lock:
+            duplicate = bool(key) and key in seen_links
+            seen_links.add(key)
+        if duplicate:
+            count("duplicates")
+            return True
+        count("scraped")
+        decision = prefilter_record(item) if use_prefilter else {"action": "evaluate"}
+        if decision["action"] == "fast_track":
+            count("fast_tracked")
+        return _put(scraped_queue, (_PRIORITY[decision["action"]], next(arrival), item, decision), stop_event)
+
+    def scrape_category(category: str, base_url: str):
+        if stop_event.is_set():
+            return
+        print(f"\n=== Raspando categoria '{category}' ===")
+
+        def page_done(page: int, total_pages: int):
+            with stats_lock:
+                pages[category] = (page, total_pages)
+
+        items = scrap_items(base_url, card_container_class, summary_class, category_output_file(output_file, category),
+                            time_delay=time_delay, incremental=incremental, category=category, state_db=state_db,
+                            db_name=db_name, parser=parser, fetcher=fetcher, on_page=page_done)
+        try:
+            for item in items:
+                if not forward(item):
+                    return
+        except Exception as e:
+            # Uma categoria com erro não interrompe as demais
+            log(f"Erro ao raspar a categoria '{category}': {e}.")
+            count("errors")
+        finally:
+            items.close()
+            # Categoria encerrada (inclusive antes da última página, no crawl incremental): nada mais a raspar
+            with stats_lock:
+                done, _ = pages.get(category, (0, 0))
+                pages[category] = (done, done)
+
+    def scrape_with_processes():
+        def listing_progress(progress: dict):
+            with stats_lock:
+                pages.update(progress)
+
+        items = crawl_with_workers(urls, card_container_class, summary_class, output_file, processes=crawl_processes,
+                                   frontier_db=frontier_db, time_delay=time_delay, max_workers=max_workers,
+                                   requests_per_second=requests_per_second, incremental=incremental,
+                                   state_db=state_db, db_name=db_name, parser=parser, http_cache_dir=http_cache_dir,
+                                   replay=replay, stop_event=stop_event, on_progress=listing_progress)
+        try:
+            for item in items:
+                if not forward(item):
+                    return
+        finally:
+            items.close()
+
+    def scrape_stage():
+        try:
+            if crawl_processes:
+                scrape_with_processes()
+                return
+            with ThreadPoolExecutor(max_workers=max(1, category_workers), thread_name_prefix="pipeline-categoria") as executor:
+                futures = [executor.submit(scrape_category, category, base_url) for category, base_url in urls.items()]
+                for future in futures:
+                    future.result()
+        except Exception as e:
+            log(f"Erro no estágio de scraping: {e}. Encerrando o pipeline.")
+            count("errors")
+            stop_event.set()
+        finally:
+            for _ in range(eval_workers):
+                _put(scraped_queue, (_END_PRIORITY, next(arrival), _END, None), stop_event)
+
+    def eval_stage():
+        try:
+            while not stop_event.is_set():
+                try:
+                    _, _, item, decision = scraped_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is _END:
+                    break
+                if decision["action"] == "reject":
+                    log(f"  > Imóvel '{item.get('titulo', 'N/A')}' descartado pelo pré-filtro: {'; '.join(decision['reasons'])}.")
+                    evaluation_results = prefilter_rejection(decision)
+                    count("prefiltered")
+                else:
+                    evaluation_results = pool.evaluate(item)
+                    count("evaluated")
+                if not _put(evaluated_queue, (item, evaluation_results), stop_event):
+                    break
+        except Exception as e:
+            log(f"Erro no estágio de avaliação: {e}. Encerrando o pipeline.")
+            count("errors")
+            stop_event.set()
+        finally:
+            # O último avaliador a terminar avisa o estágio de gravação
+            with stats_lock:
+                workers_alive[0] -= 1
+                last_worker = workers_alive[0] == 0
+            if last_worker:
+                _put(evaluated_queue, _END, stop_event)
+
+    def write_stage():
+        # As conexões do PropertyWriter, da fila e do índice de conhecidos são criadas e usadas apenas nesta thread
+        frontier = Frontier(frontier_db) if crawl_processes else None
+        crawl_state = CrawlState(state_db) if crawl_processes and incremental else None
+
+        def acknowledge(items: list):
+            # Com processos de crawl: o item só sai da fila depois de gravado (ou de a avaliação falhar)
+            if frontier is None:
+                return
+            fetched = frontier.mark_consumed([item.get("link_detalhes") for item in items])
+            if crawl_state is not None:
+                crawl_state.remember(fetched)
+
+        writer = PropertyWriter(db_name, on_flush=acknowledge)
+        try:
+            while True:
+                try:
+                    entry = evaluated_queue.get(timeout=0.5)
+                except queue.Empty:
+                    writer.flush_if_due()
+                    if stop_event.is_set():
+                        break
+                    continue
+                if entry is _END:
+                    break
+                item, evaluation_results = entry
+                if writer.add(item, evaluation_results):
+                    count("stored")
+                    if is_interesting(evaluation_results, score_threshold):
+                        count("saved")
+                else:
+                    acknowledge([item])
+        except Exception as e:
+            log(f"Erro no estágio de gravação: {e}. Encerrando o pipeline.")
+            count("errors")
+            stop_event.set()
+        finally:
+            writer.close()
+            if frontier is not None:
+                frontier.close()
+            if crawl_state is not None:
+                crawl_state.close()
+
+    setup_database(db_name, score_threshold)
+    cache = EvaluationCache(db_name) if use_cache else None
+    dedup_index = open_near_duplicate_index(db_name, dedup_method, api_url=ollama_api_url)
+    pool = OllamaEvaluationPool(max_workers=eval_workers, model=ollama_model, api_url=ollama_api_url, cache=cache,
+                                dedup_index=dedup_index, screening_model=screening_model,
+                                escalation_band=uncertainty_band(score_threshold, cascade_margin))
+    if requests_per_second is None and time_delay > 0:
+        requests_per_second = 1.0 / time_delay
+    # Um único cliente HTTP para todas as categorias: conexões, cache e limite de taxa compartilhados.
+    # Com processos de crawl, cada processo tem o seu (ver frontier.crawl_worker)
+    fetcher = None if crawl_processes else Fetcher(max_workers=max_workers, requests_per_second=requests_per_second,
+                                                   cache_dir=http_cache_dir, replay=replay)
+    metrics.reset()
+    start_time = time.perf_counter()
+    threads = [threading.Thread(target=scrape_stage, name="pipeline-scraper", daemon=True)]
+    threads += [threading.Thread(target=eval_stage, name=f"pipeline-avaliador-{i}", daemon=True) for i in range(eval_workers)]
+    threads.append(threading.Thread(target=write_stage, name="pipeline-gravador", daemon=True))
+    for thread in threads:
+        thread.start()
+
+    last_progress = time.monotonic()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+                if progress_callback is not None and time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    if progress_callback(progress()) is False and not stop_event.is_set():
+                        print("\nCancelamento solicitado. Encerrando o pipeline...")
+                        stop_event.set()
+    except KeyboardInterrupt:
+        print("\nInterrompido pelo usuário. Encerrando o pipeline...")
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+
+    if fetcher is not None:
+        fetcher.close()
+    if progress_callback is not None:
+        progress_callback(progress())
+    print(pool.summary())
+    if cache is not None:
+        cache.close()
+    if dedup_index is not None:
+        print(dedup_index.summary())
+        dedup_index.close()
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\nPipeline concluído em {elapsed:.1f}s. Raspados {stats['scraped']} itens "
+          f"({stats['duplicates']} duplicados ignorados), {stats['prefiltered']} descartados pelo pré-filtro "
+          f"(chamadas à LLM economizadas), {stats['fast_tracked']} priorizados, avaliados {stats['evaluated']}, "
+          f"gravadas {stats['stored']} avaliações, {stats['saved']} com pontuação >= {score_threshold}. "
+          f"Erros: {stats['errors']}.")
+    if metrics.enabled:
+        snapshot = metrics.snapshot()
+        print(format_latencies(snapshot))
+        skipped = stats["duplicates"] + stats["prefiltered"] + snapshot["counters"].get("items_skipped_unchanged", 0)
+        record_run(db_name, "pipeline", {
+            "seen": stats["scraped"] + stats["duplicates"], "skipped": skipped, "evaluated": stats["evaluated"],
+            "saved": stats["stored"], "errors": stats["errors"] + pool.stats["failures"],
+        }, elapsed)
+    return stats
@@ -1,224 +1,556 @@
 # processor.py
 import json
+import re
 import sqlite3
 import os 
 import requests # Para fazer requisições HTTP para a API do Ollama
-import time # Para um pequeno atraso entre as chamadas da LLM
+import time
+
+from .data_menager import (NORMALIZED_COLUMNS, create_properties_table, migrate_database, normalize_property, parse_brl_price,
+                           record_category)
+from .eval_cache import EvaluationCache, make_cache_key
+from .metrics import log, metrics, record_run
+from .prompts import (OLLAMA_STREAM, PROMPT_VERSION, build_generate_payload, build_prompt, build_prompt_fields,
+                      estimate_tokens, read_streamed_json)
+from .raw_store import RAW_JSONL_FILE, iter_unique_records, migrate_legacy_json
 
 # --- Configurações ---
-INPUT_RAW_JSON_FILE = "data/leiloes_raspados_raw.json" # Arquivo JSON gerado pelo scraper
+INPUT_RAW_JSON_FILE = RAW_JSONL_FILE # Arquivo JSONL gerado pelo scraper
 DB_NAME = "data/imoveis_interessantes_mistral.db" # Nome do arquivo do banco de dados SQLite
 OLLAMA_API_URL = "http://localhost:11434/api/generate" # URL da API do Ollama (ajuste se for diferente)
-OLLAMA_MODEL = "llama3.2" # O modelo Ollama que você está usando (ex: llama3, mistral, etc.)
 SCORE_THRESHOLD = 7 # Pontuação mínima para salvar o imóvel no banco de dados
+# O modelo do Ollama não tem padrão aqui: é o OLLAMA_MODEL de configs.py (ver resolve_model)
+
+class OllamaResponseError(ValueError):
+    """
+    O Ollama respondeu, mas com um JSON inválido ou uma pontuação fora de 0 a 10.
+    """
+
+def resolve_model(model: str = None) -> str:
+    """
+    Modelo do Ollama a usar: `model` ou, se não informado, o OLLAMA_MODEL de configs.py.
+    """
+    if model:
+        return model
+    try:
+        from configs import OLLAMA_MODEL
+    except ImportError:
+        raise ValueError("Modelo do Ollama não informado e configs.py não encontrado (rode a partir da raiz do projeto).") from None
+    return OLLAMA_MODEL
+
+DEFAULT_EVALUATION = {"score": 0, "positives": "Erro na avaliação", "negatives": "Erro na avaliação", "failed": True}
+
+# --- Cache de avaliações ---
+def lookup_cached_evaluation(cache: EvaluationCache, property_data: dict, model: str):
+    """
+    Procura a avaliação do imóvel no cache. Retorna (chave, avaliação ou None).
+    """
+    if cache is None:
+        return None, None
+    cache_key = make_cache_key(build_prompt_fields(property_data), model, PROMPT_VERSION)
+    cached_results = cache.get(cache_key)
+    if cached_results is not None:
+        log(f"  > Reutilizando avaliação em cache para '{property_data.get('titulo')}': Pontuação: {cached_results['score']}/10.")
+    return cache_key, cached_results
+
+# --- Chamada ao Ollama ---
+def request_ollama_evaluation(property_data: dict, model: str = None, api_url: str = None, timeout: float = 250,
+                              stream: bool = OLLAMA_STREAM) -> dict:
+    """
+    Faz uma única chamada ao Ollama para avaliar o imóvel, sem tratar erros.
+
+    O prompt leva só os campos relevantes, dentro do orçamento de tokens (modules/prompts.py);
+    a resposta é pedida em JSON, com keep_alive e num_predict. Com `stream`, a leitura para
+    assim que o objeto JSON da resposta está completo.
+
+    Returns:
+        dict: Um dicionário com 'score' (int), 'positives' (str), 'negatives' (str),
+              'prompt_tokens' e 'completion_tokens' (int).
+
+    Raises:
+        requests.exceptions.RequestException: Falha de rede, timeout ou status HTTP de erro.
+        OllamaResponseError: Resposta com JSON inválido ou pontuação inválida.
+    """
+    model = resolve_model(model)
+    prompt_text = build_prompt(property_data)
+    payload = build_generate_payload(prompt_text, model, stream=stream)
+    headers = {"Content-Type": "application/json"}
+
+    metrics.count("llm_calls")
+    with metrics.timer("llm_call"):
+        try:
+            response = requests.post(api_url or OLLAMA_API_URL, json=payload, headers=headers, timeout=timeout, stream=stream)
+            try:
+                response.raise_for_status() 
+                if stream:
+                    response_json_content, final_chunk, chunks = read_streamed_json(response.iter_lines())
+                else:
+                    final_chunk = response.json()
+                    response_json_content = final_chunk.get("response", "")
+                    chunks = None
+            finally:
+                # Fechar a conexão no meio do streaming interrompe a geração no servidor
+                response.close()
+        except requests.exceptions.RequestException:
+            metrics.count("llm_errors")
+            raise
+    response_json_content = response_json_content.strip()
+
+    # Contagem de tokens informada pelo Ollama (no último chunk); estimada se a leitura parou antes
+    prompt_tokens = final_chunk.get("prompt_eval_count") or estimate_tokens(prompt_text)
+    completion_tokens = final_chunk.get("eval_count") or chunks or estimate_tokens(response_json_content)
+    
+    # Tenta parsear a resposta como JSON
+    try:
+        llm_output = json.loads(response_json_content)
+    except json.JSONDecodeError:
+        metrics.count("llm_json_errors")
+        raise OllamaResponseError(f"Ollama retornou JSON inválido: '{response_json_content}'")
+    if not isinstance(llm_output, dict):
+        metrics.count("llm_json_errors")
+        raise OllamaResponseError(f"Ollama retornou JSON inválido: '{response_json_content}'")
+
+    score = llm_output.get("score")
+    positives = llm_output.get("positives", "N/A")
+    negatives = llm_output.get("negatives", "N/A")
+
+    # Valida a pontuação
+    if not (isinstance(score, int) and 0 <= score <= 10):
+        metrics.count("llm_invalid_scores")
+        raise OllamaResponseError(f"Ollama retornou pontuação inválida: '{score}'")
+
+    metrics.count("llm_prompt_tokens", prompt_tokens)
+    metrics.count("llm_completion_tokens", completion_tokens)
+    return {"score": score, "positives": positives, "negatives": negatives,
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
 
 # --- Função para Avaliar Imóvel com Ollama ---
-def evaluate_property_with_ollama(property_data: dict) -> dict:
+def evaluate_property_with_ollama(property_data: dict, cache: EvaluationCache = None, model: str = None,
+                                  api_url: str = None, timeout: float = 250) -> dict:
     """
     Avalia um imóvel usando um modelo do Ollama, retornando pontuação, 
     pontos positivos e negativos.
 
     Args:
         property_data (dict): Dicionário contendo todos os dados do imóvel.
+        cache (EvaluationCache): Cache persistente de avaliações. Se o mesmo conteúdo já foi
+            avaliado pelo mesmo modelo e versão de prompt, a avaliação guardada é reutilizada.
+        model (str): Modelo do Ollama (padrão: OLLAMA_MODEL de configs.py).
+        api_url (str): Endpoint /api/generate (padrão: OLLAMA_API_URL).
+        timeout (float): Timeout da requisição, em segundos.
 
     Returns:
         dict: Um dicionário com 'score' (int), 'positives' (str) e 'negatives' (str).
               Retorna valores padrão (0, "Erro", "Erro") em caso de falha.
     """
+    model = resolve_model(model)
+    cache_key, cached_results = lookup_cached_evaluation(cache, property_data, model)
+    if cached_results is not None:
+        return cached_results
+
     print(f"  > Avaliando imóvel '{property_data.get('titulo')}' com Ollama...")
 
-    # Prepara o prompt para o Ollama
-    # Agora pedimos um JSON para facilitar a extração dos dados
-    prompt_text = f"""
-    Com base nos dados do seguinte imóvel de leilão, avalie sua atratividade e oportunidade de investimento em uma escala de 0 a 10, onde 0 é "nada interessante" e 10 é "extremamente interessante".
+    try:
+        evaluation_results = request_ollama_evaluation(property_data, model=model, api_url=api_url, timeout=timeout)
+    except OllamaResponseError as e:
+        print(f"  > {e}. Retornando padrão.")
+        return dict(DEFAULT_EVALUATION)
+    except requests.exceptions.RequestException as e:
+        print(f"  > Erro ao chamar a API do Ollama: {e}. Retornando padrão.")
+        return dict(DEFAULT_EVALUATION)
+    except Exception as e:
+        print(f"  > Ocorreu um erro inesperado na avaliação do Ollama: {e}. Retornando padrão.")
+        return dict(DEFAULT_EVALUATION)
+
+    print(f"  > Avaliação do Ollama para '{property_data.get('titulo')}': Pontuação: {evaluation_results['score']}/10 "
+          f"({evaluation_results['prompt_tokens']} tokens de prompt, {evaluation_results['completion_tokens']} de resposta).")
+    if cache is not None:
+        cache.put(cache_key, model, PROMPT_VERSION, evaluation_results)
+    return evaluation_results
+
+# --- Pré-filtro por regras (antes da LLM) ---
+PREFILTER_BATCH_SIZE = 256 # Registros pré-filtrados por lote
+PREFILTER_RULES = {
+    "require_price": True, # Rejeita registros cujo preço não pôde ser lido
+    "min_description_chars": 40, # Rejeita descrições ausentes ("Não encontrada") ou curtas demais
+    # Padrões (regex, sem diferenciar maiúsculas) que rejeitam o imóvel se aparecerem no título ou na descrição.
+    # Ocupação e direitos (possessórios, aquisitivos) ficam para a LLM: aparecem em boa parte dos editais
+    # ("Ocupado. Desocupação por conta do adquirente") e não tornam o imóvel desinteressante por si só.
+    "reject_patterns": {
+        "nua-propriedade": r"\bnua[\s-]propriedade\b",
+    },
+    "max_debt": None, # Rejeita se a descrição menciona dívida/débito do imóvel acima deste valor (R$); None desativa
+    "max_debt_ratio": 2.0, # ... ou acima desta fração do preço
+    # Preço máximo por categoria (prefixo da categoria do registro). Bem acima do valor_max das URLS de busca:
+    # só descarta anúncios muito fora da faixa procurada
+    "price_ceilings": {
+        "casas": 10000000.0,
+        "apartamentos": 10000000.0,
+        "terrenos": 10000000.0,
+    },
+    # Padrões que colocam o imóvel no início da fila de avaliação
+    "fast_track_patterns": {
+        "desocupado": r"\bdesocupad[oa]\b|\bn[ãa]o\s+(?:est[áa]\s+)?ocupad[oa]\b",
+        "aceita FGTS": r"\bfgts\b",
+        "aceita financiamento": r"\bfinanciamento\b",
+    },
+}
 
-    Considere os seguintes critérios:
-    - Preço: Um preço baixo em relação às características do imóvel é um ponto positivo.
-    - Descrição Completa: Clareza, detalhamento e ausência de problemas graves (dívidas excessivas, problemas estruturais) são positivos.
-    - Localização Detalhada: Precisão e potencial de valorização da área são importantes.
-    - Condições de Pagamento: Flexibilidade nas condições é um ponto positivo.
+# "Débito desta ação" é o valor executado no processo, quitado com o produto do leilão: não conta como dívida do imóvel
+_DEBT_RE = re.compile(r"\b(?:d[ée]bitos?|d[íi]vidas?)\b(?!\s+desta\s+a[çc][ãa]o)[^\n]{0,120}?R\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{1,2})?|\d+(?:,\d{1,2})?)",
+                      re.IGNORECASE)
+# Débitos tributários (IPTU, dívida ativa) sub-rogam-se no preço da arrematação (CTN, art. 130): também não contam
+_TAX_DEBT_RE = re.compile(r"tribut[áa]ri|fisca|\biptu\b|d[íi]vida\s+ativa", re.IGNORECASE)
 
-    Dados do Imóvel:
-    {json.dumps(property_data, ensure_ascii=False, indent=2)}
+def _compile_patterns(patterns: dict):
+    """
+    Junta os padrões nomeados em uma única regex com grupos nomeados, para uma só passada por texto.
+    """
+    if not patterns:
+        return None, {}
+    group_names = {f"p{i}": name for i, name in enumerate(patterns)}
+    combined = "|".join(f"(?P<p{i}>{pattern})" for i, pattern in enumerate(patterns.values()))
+    return re.compile(combined, re.IGNORECASE), group_names
+
+def _matched_names(compiled, group_names: dict, text: str) -> list:
+    if compiled is None:
+        return []
+    names = []
+    for match in compiled.finditer(text):
+        name = group_names[match.lastgroup]
+        if name not in names:
+            names.append(name)
+    return names
 
-    Responda APENAS com um objeto JSON no seguinte formato:
-    {{
-      "score": <número inteiro de 0 a 10>,
-      "positives": "<Pontos positivos do imóvel em uma frase, separado por vírgulas se houver mais de um.>",
-      "negatives": "<Pontos negativos do imóvel em uma frase, separado por vírgulas se houver mais de um.>"
-    }}
+def prefilter_records(records: list, rules: dict = None) -> list:
     """
+    Aplica regras baratas (preço, palavras-chave, dívidas e tetos de preço) a um lote de registros,
+    antes de qualquer chamada à LLM. As regex de cada grupo são compiladas uma única vez por lote.
 
-    default_response = {"score": 0, "positives": "Erro na avaliação", "negatives": "Erro na avaliação"}
+    Returns:
+        list: Uma decisão por registro, na mesma ordem: dict com 'action' ("reject",
+              "fast_track" ou "evaluate"), 'reasons' (lista de motivos) e 'price' (float ou None).
+    """
+    rules = PREFILTER_RULES if rules is None else rules
+    reject_re, reject_names = _compile_patterns(rules.get("reject_patterns"))
+    fast_re, fast_names = _compile_patterns(rules.get("fast_track_patterns"))
+    min_description_chars = rules.get("min_description_chars", 0)
+    max_debt = rules.get("max_debt")
+    max_debt_ratio = rules.get("max_debt_ratio")
+    price_ceilings = rules.get("price_ceilings") or {}
 
-    try:
-        payload = {
-            "model": OLLAMA_MODEL,
-            "prompt": prompt_text,
-            "stream": False, 
-            "options": {
-                "temperature": 0.2, # Um pouco mais de variação, mas ainda controlada
-                "top_k": 40,
-                "top_p": 0.9,
-            }
-        }
-        headers = {"Content-Type": "application/json"}
-        
-        response = requests.post(OLLAMA_API_URL, json=payload, headers=headers, timeout=250) # Aumentei o timeout
-        response.raise_for_status() 
-        
-        response_json_content = response.json().get("response", "").strip()
-        
-        # Tenta parsear a resposta como JSON
-        try:
-            llm_output = json.loads(response_json_content)
-            
-            score = llm_output.get("score")
-            positives = llm_output.get("positives", "N/A")
-            negatives = llm_output.get("negatives", "N/A")
-
-            # Valida a pontuação
-            if isinstance(score, int) and 0 <= score <= 10:
-                print(f"  > Avaliação do Ollama para '{property_data.get('titulo')}': Pontuação: {score}/10.")
-                return {"score": score, "positives": positives, "negatives": negatives}
-            else:
-                print(f"  > Ollama retornou pontuação inválida: '{score}'. Retornando 0.")
-                return default_response
-
-        except json.JSONDecodeError:
-            print(f"  > Ollama retornou JSON inválido: '{response_json_content}'. Retornando padrão.")
-            return default_response
-            
-    except requests.exceptions.RequestException as e:
-        print(f"  > Erro ao chamar a API do Ollama: {e}. Retornando padrão.")
-        return default_response
-    except Exception as e:
-        print(f"  > Ocorreu um erro inesperado na avaliação do Ollama: {e}. Retornando padrão.")
-        return default_response
-    
-    # --- Lógica de simulação alternativa se o Ollama não estiver configurado ---
-    # Esta parte será executada se a chamada real ao Ollama falhar ou estiver comentada.
-    # Você pode remover esta simulação quando a integração real estiver funcionando.
-    # print("  > Usando lógica de simulação para a avaliação do Ollama.")
-    # if "descricao_completa" in property_data and len(property_data["descricao_completa"]) > 200:
-    #     try:
-    #         price_str = property_data.get("preco", "R$ 0,00").replace("R$", "").replace(".", "").replace(",", ".").strip()
-    #         price_value = float(price_str)
-    #         if price_value < 500000:
-    #             return 8 # Exemplo de pontuação alta
-    #         elif price_value < 1000000:
-    #             return 6 # Exemplo de pontuação média
-    #     except ValueError:
-    #         pass
-    # return 3 # Pontuação baixa para outros casos na simulação
+    decisions = []
+    for record in records:
+        reasons = []
+        price = parse_brl_price(record.get("preco"))
+        description = record.get("descricao_completa") or ""
+        if description.startswith("Não encontrad"):
+            description = ""
+        text = f"{record.get('titulo') or ''}\n{description}"
+
+        if rules.get("require_price") and price is None:
+            reasons.append("preço não reconhecido")
+        if len(description) < min_description_chars:
+            reasons.append("descrição ausente ou curta demais")
+        reasons.extend(_matched_names(reject_re, reject_names, text))
+
+        if max_debt is not None or max_debt_ratio is not None:
+            debts = [parse_brl_price(f"R$ {match.group(1)}") for match in _DEBT_RE.finditer(description)
+                     if not _TAX_DEBT_RE.search(match.group(0))]
+            largest_debt = max(debts, default=0.0)
+            if max_debt is not None and largest_debt > max_debt:
+                reasons.append(f"dívida de R$ {largest_debt:,.2f} mencionada na descrição")
+            elif max_debt_ratio is not None and price and largest_debt > price * max_debt_ratio:
+                reasons.append(f"dívida de R$ {largest_debt:,.2f} acima de {max_debt_ratio:.0%} do preço")
+
+        category = record_category(record)
+        if price is not None and category:
+            for ceiling_category, ceiling in price_ceilings.items():
+                if category.startswith(ceiling_category) and price > ceiling:
+                    reasons.append(f"preço acima do teto de R$ {ceiling:,.2f} para {ceiling_category}")
+                    break
+
+        if reasons:
+            decisions.append({"action": "reject", "reasons": reasons, "price": price})
+            continue
+        fast_track_reasons = _matched_names(fast_re, fast_names, text)
+        decisions.append({"action": "fast_track" if fast_track_reasons else "evaluate",
+                          "reasons": fast_track_reasons, "price": price})
+    return decisions
+
+def prefilter_record(record: dict, rules: dict = None) -> dict:
+    return prefilter_records([record], rules)[0]
+
+def prefilter_rejection(decision: dict) -> dict:
+    """
+    Avaliação registrada para um imóvel rejeitado pelo pré-filtro (sem chamada à LLM): sem nota,
+    com o motivo gravado em `motivo_descarte` e `descartado_prefiltro` = 1.
+    """
+    return {"score": None, "positives": None, "negatives": None, "prefiltered": True,
+            "prefilter_reason": "; ".join(decision["reasons"])}
+
+def is_interesting(evaluation_results: dict, score_threshold: int) -> bool:
+    """
+    Indica se a avaliação atinge o limiar (rejeições do pré-filtro não têm nota e nunca atingem).
+    """
+    return evaluation_results.get("score") is not None and evaluation_results["score"] >= score_threshold
 
 # --- Configuração do Banco de Dados SQLite ---
-def setup_database(db_name: str):
+def setup_database(db_name: str, score_threshold: int = SCORE_THRESHOLD):
+    """
+    Cria a tabela `imoveis` (todas as avaliações) e a view `imoveis_interessantes`
+    (avaliações com pontuação >= score_threshold), e ativa o modo WAL.
+    """
     conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS imoveis (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            titulo TEXT,
-            preco TEXT,
-            localidade_pagina_principal TEXT,
-            numero_leilao TEXT,
-            link_detalhes TEXT UNIQUE, 
-            localizacao_detalhada TEXT,
-            vara TEXT,
-            forum TEXT,
-            leiloeiro TEXT,
-            descricao_completa TEXT,
-            condicoes_pagamento TEXT,
-            pontuacao_ollama INTEGER, 
-            pontos_positivos TEXT,     -- Nova coluna
-            pontos_negativos TEXT,    -- Nova coluna
-            data_avaliacao TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    # WAL: leitores (o visualizador) não bloqueiam o gravador, e vice-versa
+    cursor.execute("PRAGMA journal_mode=WAL").fetchone()
+    create_properties_table(conn)
+    # Colunas normalizadas (preços numéricos, cidade/UF, data do leilão) e índices: ver data_menager.py
+    migrate_database(conn)
+    # O limiar é um filtro de consulta: a view é recriada com o limiar atual
+    cursor.execute("DROP VIEW IF EXISTS imoveis_interessantes")
+    cursor.execute(f"CREATE VIEW imoveis_interessantes AS SELECT * FROM imoveis WHERE pontuacao_ollama >= {int(score_threshold)}")
     conn.commit()
     conn.close()
     print(f"Banco de dados '{db_name}' configurado com sucesso.")
 
-def insert_property_into_db(db_name: str, property_data: dict, evaluation_results: dict):
-    conn = sqlite3.connect(db_name)
-    cursor = conn.cursor()
-    try:
-        cursor.execute('''
-            INSERT OR IGNORE INTO imoveis (
-                titulo, preco, localidade_pagina_principal, numero_leilao, link_detalhes,
-                localizacao_detalhada, vara, forum, leiloeiro, descricao_completa, condicoes_pagamento,
-                pontuacao_ollama, pontos_positivos, pontos_negativos
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            property_data.get("titulo"),
-            property_data.get("preco"),
-            property_data.get("localidade_pagina_principal"),
-            property_data.get("numero_leilao"),
-            property_data.get("link_detalhes"),
-            property_data.get("localizacao_detalhada"),
-            property_data.get("vara"),
-            property_data.get("forum"),
-            property_data.get("leiloeiro"),
-            property_data.get("descricao_completa"),
-            property_data.get("condicoes_pagamento"),
+_PROPERTY_COLUMNS = (
+    "titulo", "preco", "localidade_pagina_principal", "numero_leilao", "link_detalhes",
+    "localizacao_detalhada", "vara", "forum", "leiloeiro", "descricao_completa", "condicoes_pagamento",
+)
+_UPSERT_COLUMNS = _PROPERTY_COLUMNS + tuple(NORMALIZED_COLUMNS) + ("categoria",)
+# `data_inclusao` só é gravada na primeira vez (não está no DO UPDATE): fixa o período dos agregados (aggregates.PERIOD_SQL)
+_UPSERT_SQL = f'''
+    INSERT INTO imoveis (
+        {", ".join(_UPSERT_COLUMNS)}, pontuacao_ollama, pontos_positivos, pontos_negativos,
+        duplicata_de, similaridade_duplicata, pontuacao_triagem, pontuacao_modelo_grande, modelo_avaliacao,
+        descartado_prefiltro, motivo_descarte, versao_prompt, data_inclusao
+    ) VALUES ({", ".join("?" * (len(_UPSERT_COLUMNS) + 11))}, CURRENT_TIMESTAMP)
+    ON CONFLICT(link_detalhes) DO UPDATE SET
+        {", ".join(f"{column} = excluded.{column}" for column in _UPSERT_COLUMNS if column != "link_detalhes")},
+        pontuacao_ollama = excluded.pontuacao_ollama,
+        pontos_positivos = excluded.pontos_positivos,
+        pontos_negativos = excluded.pontos_negativos,
+        duplicata_de = excluded.duplicata_de,
+        similaridade_duplicata = excluded.similaridade_duplicata,
+        pontuacao_triagem = excluded.pontuacao_triagem,
+        pontuacao_modelo_grande = excluded.pontuacao_modelo_grande,
+        modelo_avaliacao = excluded.modelo_avaliacao,
+        descartado_prefiltro = excluded.descartado_prefiltro,
+        motivo_descarte = excluded.motivo_descarte,
+        versao_prompt = excluded.versao_prompt,
+        data_avaliacao = CURRENT_TIMESTAMP
+'''
+
+# --- Gravação em lote no banco ---
+class PropertyWriter:
+    """
+    Grava as avaliações na tabela `imoveis` por uma única conexão em modo WAL, acumulando
+    as linhas e gravando-as com `executemany` em uma transação quando o lote atinge
+    `batch_size` linhas ou quando `flush_interval` segundos se passaram desde a última gravação.
+
+    Todas as avaliações são gravadas (upsert pelo link de detalhes), inclusive as abaixo do
+    limiar, para que mudar o limiar não exija reavaliar os imóveis. Avaliações que falharam
+    (sem resposta válida do Ollama) não são gravadas.
+
+    `on_flush`, se informado, é chamado com os imóveis (dicionários passados a `add`) de cada lote
+    logo após o commit da transação; um lote que falha ao ser gravado não é repassado.
+    """
+
+    def __init__(self, db_name: str, batch_size: int = 100, flush_interval: float = 5.0, on_flush=None):
+        self.db_name = db_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.rows_written = 0
+        self._pending = []
+        self._pending_items = []
+        self._last_flush = time.monotonic()
+        self.conn = sqlite3.connect(db_name)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+    def add(self, property_data: dict, evaluation_results: dict) -> bool:
+        """
+        Enfileira a avaliação para gravação. Retorna False se ela foi descartada por ter falhado.
+        """
+        if evaluation_results.get("failed"):
+            log(f"  > Avaliação de '{property_data.get('titulo')}' falhou. Não será gravada.")
+            return False
+        normalized = normalize_property(property_data)
+        self._pending.append(tuple(property_data.get(column) for column in _PROPERTY_COLUMNS) +
+                             tuple(normalized[column] for column in NORMALIZED_COLUMNS) + (
+            record_category(property_data),
             evaluation_results.get("score"),
             evaluation_results.get("positives"),
-            evaluation_results.get("negatives")
+            evaluation_results.get("negatives"),
+            # Avaliação reaproveitada de uma quase-duplicata: link do representante e similaridade
+            evaluation_results.get("duplicate_of"),
+            evaluation_results.get("similarity"),
+            # Cascata de modelos: nota de cada nível e o modelo da nota final
+            evaluation_results.get("screening_score"),
+            evaluation_results.get("full_score"),
+            evaluation_results.get("model"),
+            # Rejeição do pré-filtro: sem nota, com o motivo
+            int(bool(evaluation_results.get("prefiltered"))),
+            evaluation_results.get("prefilter_reason"),
+            # Versão do prompt das avaliações da LLM (as do cache e das quase-duplicatas também são da versão atual)
+            PROMPT_VERSION if evaluation_results.get("score") is not None else None,
         ))
-        conn.commit()
-        if cursor.rowcount > 0:
-            print(f"  > Imóvel '{property_data.get('titulo')}' (Pontuação: {evaluation_results.get('score')}) inserido no banco de dados.")
-        else:
-            print(f"  > Imóvel '{property_data.get('titulo')}' (Pontuação: {evaluation_results.get('score')}) já existe no banco de dados (ignorando).")
-    except sqlite3.Error as e:
-        print(f"Erro ao inserir imóvel '{property_data.get('titulo')}' no DB: {e}")
-    finally:
-        conn.close()
-
-def process_and_save_data(input_json_file: str, db_name: str, score_threshold: int):
-    print(f"Iniciando o processamento de dados do arquivo '{input_json_file}'...")
-    print(f"Apenas imóveis com pontuação Ollama >= {score_threshold} serão salvos.")
+        self._pending_items.append(property_data)
+        self.flush_if_due()
+        return True
+
+    def flush_if_due(self):
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        items, self._pending_items = self._pending_items, []
+        try:
+            with metrics.timer("db_write"), self.conn:
+                self.conn.executemany(_UPSERT_SQL, rows)
+            self.rows_written += len(rows)
+            metrics.count("db_rows_written", len(rows))
+            log(f"  > {len(rows)} avaliações gravadas em '{self.db_name}'.")
+        except sqlite3.Error as e:
+            metrics.count("db_errors")
+            log(f"Erro ao gravar {len(rows)} avaliações no DB: {e}")
+            return
+        if self.on_flush is not None:
+            self.on_flush(items)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def insert_property_into_db(db_name: str, property_data: dict, evaluation_results: dict):
+    """
+    Grava (ou atualiza) uma única avaliação. Para muitas avaliações, use PropertyWriter.
+    """
+    with PropertyWriter(db_name, batch_size=1) as writer:
+        writer.add(property_data, evaluation_results)
+
+def _batched(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def process_and_save_data(input_json_file, db_name: str, score_threshold: int, use_cache: bool = True,
+                          workers: int = None, api_url: str = None, use_prefilter: bool = True,
+                          dedup_method: str = "minhash", model: str = None, screening_model: str = None,
+                          cascade_margin: int = None):
+    """
+    Avalia com o Ollama todos os imóveis de `input_json_file` (um arquivo JSONL ou uma lista deles, por
+    exemplo os JSONL de cada categoria) e grava todas as avaliações em `db_name` (em lotes, por um
+    PropertyWriter). `score_threshold` define a view `imoveis_interessantes`.
+
+    Os arquivos são lidos em uma única passada pela união sem repetições (pelo link de detalhes;
+    vale o registro mais recente), então cada imóvel é avaliado uma vez só.
+
+    Antes da LLM, cada lote passa pelo pré-filtro de regras (`prefilter_records`): os rejeitados
+    não chegam ao modelo e os prioritários são avaliados primeiro. As avaliações rodam em paralelo
+    em um OllamaEvaluationPool com até `workers` chamadas simultâneas (concorrência adaptativa,
+    timeouts e novas tentativas com backoff); com `dedup_method` ("minhash", "ollama" ou None), as
+    quase-duplicatas de imóveis já avaliados reaproveitam a avaliação (ver near_duplicates.py).
+    Com `screening_model`, só as notas da triagem a até `cascade_margin` (padrão: CASCADE_MARGIN)
+    pontos do limiar são reavaliadas por `model` (cascata de modelos, ver evaluator.OllamaEvaluationPool).
+    """
+    # Import local: o módulo evaluator depende das funções de chamada ao Ollama deste módulo
+    from .evaluator import CASCADE_MARGIN, OLLAMA_MAX_WORKERS, OllamaEvaluationPool, uncertainty_band
+    from .near_duplicates import open_near_duplicate_index
+
+    input_files = [input_json_file] if isinstance(input_json_file, str) else list(input_json_file)
+    print(f"Iniciando o processamento de dados de {', '.join(repr(path) for path in input_files)}...")
+    print(f"Todas as avaliações serão salvas; imóveis com pontuação Ollama >= {score_threshold} são os interessantes.")
     
-    if not os.path.exists(input_json_file):
-        print(f"Erro: Arquivo '{input_json_file}' não encontrado. Execute o scraper primeiro.")
+    input_files = [path for path in input_files if os.path.exists(path) or migrate_legacy_json(path)]
+    if not input_files:
+        print("Erro: Nenhum arquivo de entrada encontrado. Execute o scraper primeiro.")
         return
 
-    setup_database(db_name)
+    setup_database(db_name, score_threshold)
+    cache = EvaluationCache(db_name) if use_cache else None
+    writer = PropertyWriter(db_name)
+    dedup_index = open_near_duplicate_index(db_name, dedup_method, api_url=api_url)
+    metrics.reset()
+    start_time = time.perf_counter()
 
-    try:
-        with open(input_json_file, 'r', encoding='utf-8') as f:
-            all_raw_data = json.load(f)
-        print(f"Carregados {len(all_raw_data)} imóveis para avaliação.")
-    except json.JSONDecodeError:
-        print(f"Erro ao decodificar JSON de '{input_json_file}'. O arquivo pode estar corrompido ou vazio.")
-        return
-    except Exception as e:
-        print(f"Erro ao ler o arquivo JSON: {e}")
-        return
+    # Os registros são lidos um a um dos arquivos JSONL, sem carregá-los inteiros em memória
+    all_raw_data = iter_unique_records(input_files)
 
+    total_read = 0
     total_evaluated = 0
+    total_stored = 0
     total_interesting_saved = 0
+    total_prefiltered = 0
+    total_fast_tracked = 0
+
+    def save_evaluation(item_data: dict, evaluation_results: dict):
+        nonlocal total_stored, total_interesting_saved
+        if writer.add(item_data, evaluation_results):
+            total_stored += 1
+            if is_interesting(evaluation_results, score_threshold):
+                total_interesting_saved += 1
+
+    escalation_band = uncertainty_band(score_threshold, CASCADE_MARGIN if cascade_margin is None else cascade_margin)
+    with OllamaEvaluationPool(max_workers=workers or OLLAMA_MAX_WORKERS, model=model, api_url=api_url, cache=cache,
+                              dedup_index=dedup_index, screening_model=screening_model,
+                              escalation_band=escalation_band) as pool:
+        for batch in _batched(all_raw_data, PREFILTER_BATCH_SIZE):
+            total_read += len(batch)
+            # --- PRÉ-FILTRO POR REGRAS ---
+            decisions = prefilter_records(batch) if use_prefilter else [{"action": "evaluate"}] * len(batch)
+            fast_track, candidates = [], []
+            for item_data, decision in zip(batch, decisions):
+                if decision["action"] == "reject":
+                    total_prefiltered += 1
+                    print(f"  > Imóvel '{item_data.get('titulo', 'N/A')}' descartado pelo pré-filtro: {'; '.join(decision['reasons'])}.")
+                    save_evaluation(item_data, prefilter_rejection(decision))
+                elif decision["action"] == "fast_track":
+                    fast_track.append(item_data)
+                else:
+                    candidates.append(item_data)
+            total_fast_tracked += len(fast_track)
 
-    for item_data in all_raw_data:
-        total_evaluated += 1
-        
-        # --- AVALIAÇÃO COM OLLAMA ---
-        # A função agora retorna um dicionário com score, positives e negatives
-        evaluation_results = evaluate_property_with_ollama(item_data)
-        
-        if evaluation_results["score"] >= score_threshold:
-            insert_property_into_db(db_name, item_data, evaluation_results)
-            total_interesting_saved += 1
-        else:
-            print(f"  > Imóvel '{item_data.get('titulo', 'N/A')}' pontuação {evaluation_results['score']}/10, abaixo do limiar de {score_threshold}. Ignorando.")
-            # Opcional: Você pode salvar os pontos negativos/positivos de *todos* os imóveis
-            # em um log separado, mesmo os não interessantes, para análise futura.
-            
-        time.sleep(1.0) # Aumentei o atraso para dar tempo ao Ollama e evitar erros
+            # --- AVALIAÇÃO COM OLLAMA ---
+            # O pool devolve dicionários com score, positives e negatives (prioritários primeiro)
+            for item_data, evaluation_results in pool.map(fast_track + candidates):
+                total_evaluated += 1
+                save_evaluation(item_data, evaluation_results)
 
     print(f"\nProcessamento concluído. Avaliados {total_evaluated} imóveis.")
-    print(f"Total de {total_interesting_saved} imóveis considerados interessantes (pontuação >= {score_threshold}) e salvos em '{db_name}'.")
+    if use_prefilter:
+        print(f"Pré-filtro: {total_prefiltered} imóveis descartados sem chamar a LLM ({total_prefiltered} chamadas economizadas), {total_fast_tracked} priorizados.")
+    print(pool.summary())
+    writer.close()
+    if cache is not None:
+        cache.close()
+    if dedup_index is not None:
+        print(dedup_index.summary())
+        dedup_index.close()
+    print(f"Total de {total_stored} avaliações salvas em '{db_name}', {total_interesting_saved} delas interessantes "
+          f"(pontuação >= {score_threshold}, view 'imoveis_interessantes').")
+    record_run(db_name, "processamento", {
+        "seen": total_read, "skipped": total_prefiltered, "evaluated": total_evaluated,
+        "saved": total_stored, "errors": pool.stats["failures"],
+    }, time.perf_counter() - start_time)
 
 if __name__ == "__main__":
     process_and_save_data(INPUT_RAW_JSON_FILE, DB_NAME, SCORE_THRESHOLD)
\ No newline at end of file
@@ -0,0 +1,172 @@
+# prompts.py
+import json
+import re
+
+# --- Configurações ---
+PROMPT_VERSION = "2" # Incrementar sempre que o texto do prompt mudar (invalida o cache de avaliações)
+PROMPT_TOKEN_BUDGET = 900 # Orçamento (aproximado) de tokens para os dados do imóvel no prompt
+CHARS_PER_TOKEN = 4 # Estimativa de caracteres por token, usada quando o Ollama não informa a contagem
+# Campos enviados ao modelo e a fração do orçamento que cada campo longo pode ocupar
+PROMPT_FIELDS = ("titulo", "preco", "localidade_pagina_principal", "localizacao_detalhada", "leiloeiro",
+                 "descricao_completa", "condicoes_pagamento")
+LONG_FIELD_SHARES = {"descricao_completa": 0.7, "condicoes_pagamento": 0.3}
+OLLAMA_KEEP_ALIVE = "30m" # Mantém o modelo carregado na GPU entre as chamadas
+OLLAMA_NUM_PREDICT = 200 # Máximo de tokens gerados na resposta
+OLLAMA_STREAM = True # Lê a resposta em streaming e encerra assim que o objeto JSON estiver completo
+OLLAMA_STRUCTURED_OUTPUT = False # Envia o JSON Schema em "format" (Ollama >= 0.5); senão usa "format": "json"
+
+EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer", "minimum": 0, "maximum": 10},
+        "positives": {"type": "string"},
+        "negatives": {"type": "string"},
+    },
+    "required": ["score", "positives", "negatives"],
+}
+
+# Trechos das condições de pagamento que interessam à avaliação (o restante do edital é padrão)
+_PAYMENT_KEYWORDS_RE = re.compile(
+    r"parcel|à vista|a vista|entrada|fgts|financ|desconto|%|comiss[ãa]o|cau[çc][ãa]o|d[ée]bito|iptu|condom[íi]nio",
+    re.IGNORECASE,
+)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.;!?])\s+|\n+")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Valores que o scraper grava quando um campo não existe na página
+_PLACEHOLDERS = {"Não encontrada", "Não encontrado", "Não encontradas", "Título não encontrado",
+                 "Preço não encontrado", "Localidade (principal) não encontrada"}
+
+PROMPT_TEMPLATE = """Avalie a atratividade deste imóvel de leilão como investimento, de 0 ("nada interessante") a 10 ("extremamente interessante").
+Critérios: preço baixo para as características; descrição clara e sem problemas graves (dívidas excessivas, problemas estruturais); localização precisa e com potencial de valorização; condições de pagamento flexíveis.
+Imóvel: {property_json}
+Responda APENAS com JSON: {{"score": <inteiro 0-10>, "positives": "<pontos positivos em uma frase>", "negatives": "<pontos negativos em uma frase>"}}"""
+
+# --- Estimativa e corte de tokens ---
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def collapse_whitespace(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text or "").strip()
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Corta o texto para caber em `max_tokens` (estimados), na última palavra inteira, com reticências.
+    """
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0]
+    return cut + "…"
+
+def summarize_payment_conditions(text: str, max_tokens: int) -> str:
+    """
+    Resumo extrativo das condições de pagamento: mantém, na ordem original, as frases que
+    falam de parcelamento, entrada, FGTS, financiamento, descontos, comissão e débitos.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    relevant = [s for s in _SENTENCE_SPLIT_RE.split(text) if _PAYMENT_KEYWORDS_RE.search(s)]
+    return truncate_to_tokens(" ".join(relevant) or text, max_tokens)
+
+# --- Montagem do prompt ---
+def build_prompt_fields(property_data: dict, token_budget: int = PROMPT_TOKEN_BUDGET) -> dict:
+    """
+    Campos do imóvel efetivamente enviados no prompt (e que definem a chave do cache):
+    apenas PROMPT_FIELDS, sem valores "Não encontrado", com espaços colapsados e os campos
+    longos cortados (ou resumidos) para caber em `token_budget`.
+    """
+    fields = {}
+    for name in PROMPT_FIELDS:
+        value = collapse_whitespace(str(property_data.get(name) or ""))
+        if value and value not in _PLACEHOLDERS:
+            fields[name] = value
+
+    short_tokens = sum(estimate_tokens(v) for k, v in fields.items() if k not in LONG_FIELD_SHARES)
+    long_budget = max(0, token_budget - short_tokens)
+    for name, share in LONG_FIELD_SHARES.items():
+        if name not in fields:
+            continue
+        field_budget = int(long_budget * share)
+        if name == "condicoes_pagamento":
+            fields[name] = summarize_payment_conditions(fields[name], field_budget)
+        else:
+            fields[name] = truncate_to_tokens(fields[name], field_budget)
+    return fields
+
+def build_prompt(property_data: dict, token_budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    property_json = json.dumps(build_prompt_fields(property_data, token_budget), ensure_ascii=False, separators=(",", ":"))
+    return PROMPT_TEMPLATE.format(property_json=property_json)
+
+def build_generate_payload(prompt: str, model: str, stream: bool = OLLAMA_STREAM, keep_alive: str = OLLAMA_KEEP_ALIVE,
+                           num_predict: int = OLLAMA_NUM_PREDICT, structured: bool = OLLAMA_STRUCTURED_OUTPUT) -> dict:
+    """
+    Corpo da requisição para /api/generate, com saída em JSON, keep_alive e limite de tokens gerados.
+    """
+    return {
+        "model": model,
+        "prompt": prompt,
+        "stream": stream,
+        "format": EVALUATION_SCHEMA if structured else "json",
+        "keep_alive": keep_alive,
+        "options": {
+            "temperature": 0.2, # Um pouco mais de variação, mas ainda controlada
+            "top_k": 40,
+            "top_p": 0.9,
+            "num_predict": num_predict,
+        }
+    }
+
+# --- Leitura da resposta em streaming ---
+def complete_json_object_end(text: str) -> int:
+    """
+    Retorna a posição logo após o primeiro objeto JSON completo em `text` (chaves balanceadas,
+    ignorando chaves dentro de strings), ou -1 se o objeto ainda não terminou.
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    started = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+            started = True
+        elif char == "}" and started:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
+def read_streamed_json(lines) -> tuple:
+    """
+    Consome as linhas NDJSON de /api/generate com stream=True, acumulando o campo "response",
+    e para assim que houver um objeto JSON completo (sem esperar o fim da geração).
+
+    Returns:
+        tuple: (texto do objeto JSON, último chunk recebido, número de chunks de resposta).
+    """
+    text = ""
+    last_chunk = {}
+    chunks = 0
+    for line in lines:
+        if not line:
+            continue
+        last_chunk = json.loads(line)
+        piece = last_chunk.get("response", "")
+        if piece:
+            chunks += 1
+            text += piece
+            end = complete_json_object_end(text)
+            if end != -1:
+                return text[:end], last_chunk, chunks
+        if last_chunk.get("done"):
+            break
+    return text, last_chunk, chunks
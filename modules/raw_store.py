@@ -0,0 +1,174 @@
+# raw_store.py
+import json
+import os
+import re
+import sys
+
+from .crawl_state import link_key
+
+# --- Configurações ---
+RAW_JSONL_FILE = "data/leiloes_raspados_raw.jsonl" # Arquivo JSONL (um registro por linha) gerado pelo scraper
+LEGACY_JSON_FILE = "data/leiloes_raspados_raw.json" # Formato antigo: uma única lista JSON
+LEGACY_CATEGORY = "legado" # "Categoria" do JSONL que recebe o arquivo antigo, anterior à divisão por categoria
+
+# --- Armazenamento append-only dos registros brutos ---
+class RawStore:
+    """
+    Armazena os registros raspados em JSON Lines, acrescentando um registro por
+    linha. Cada registro é gravado em disco (flush + fsync) antes de `append`
+    retornar, de modo que uma interrupção perde no máximo a linha em escrita.
+    """
+
+    def __init__(self, path: str = RAW_JSONL_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        migrate_legacy_json(path)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def append(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __iter__(self):
+        return iter_records(self.path)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_records(path: str):
+    """
+    Lê os registros de forma preguiçosa, um por vez, com memória constante.
+
+    Linhas corrompidas (por exemplo, a última linha de uma execução interrompida)
+    são ignoradas com um aviso. Arquivos no formato antigo (uma lista JSON) também
+    são aceitos, mas precisam ser carregados inteiros.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        first_char = f.read(1)
+        while first_char and first_char.isspace():
+            first_char = f.read(1)
+        f.seek(0)
+        if first_char == "[":
+            yield from json.load(f)
+            return
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"  > Linha {line_number} de '{path}' está corrompida. Ignorando.")
+
+def count_records(path: str) -> int:
+    return sum(1 for _ in iter_records(path))
+
+def category_output_file(path: str, category: str) -> str:
+    """
+    Arquivo JSONL de uma categoria: "data/leiloes.jsonl" -> "data/leiloes_casas.jsonl".
+    """
+    root, ext = os.path.splitext(path)
+    slug = re.sub(r"[^\w-]+", "-", category).strip("-").lower()
+    return f"{root}_{slug}{ext or '.jsonl'}"
+
+def iter_unique_records(paths: list):
+    """
+    União dos registros dos arquivos, sem repetir imóveis (pelo link de detalhes, sem a query string).
+    Quando um imóvel aparece mais de uma vez, vale o último registro (o mais recente); são duas
+    leituras dos arquivos, e só os links ficam em memória. Registros sem link saem todos.
+    """
+    last_position = {}
+    position = 0
+    for path in paths:
+        for record in iter_records(path):
+            key = link_key(record.get("link_detalhes"))
+            if key:
+                last_position[key] = position
+            position += 1
+    position = 0
+    for path in paths:
+        for record in iter_records(path):
+            key = link_key(record.get("link_detalhes"))
+            if not key or last_position.get(key, position) == position:
+                yield record
+            position += 1
+
+# --- Migração do formato antigo ---
+def migrate_json_to_jsonl(json_path: str, jsonl_path: str) -> int:
+    """
+    Converte um arquivo no formato antigo (lista JSON) para JSON Lines.
+    Escreve em um arquivo temporário e o renomeia ao final, para não deixar
+    um JSONL pela metade em caso de falha. Retorna o número de registros migrados.
+    """
+    with open(json_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    tmp_path = f"{jsonl_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, jsonl_path)
+    return len(records)
+
+def migrate_legacy_json(jsonl_path: str, json_path: str = None) -> int:
+    """
+    Migração única: se o JSONL ainda não existe mas o arquivo antigo (mesmo nome
+    com extensão .json) existe, converte-o. Retorna o número de registros migrados.
+    """
+    if json_path is None:
+        root, ext = os.path.splitext(jsonl_path)
+        if ext != ".jsonl":
+            return 0
+        json_path = f"{root}.json"
+    if os.path.exists(jsonl_path) or not os.path.exists(json_path):
+        return 0
+    try:
+        migrated = migrate_json_to_jsonl(json_path, jsonl_path)
+    except json.JSONDecodeError:
+        print(f"Erro ao decodificar JSON de '{json_path}'. Migração para '{jsonl_path}' ignorada.")
+        return 0
+    print(f"Migrados {migrated} itens de '{json_path}' para '{jsonl_path}'.")
+    return migrated
+
+def legacy_output_file(output_file: str) -> str:
+    """
+    JSONL dos registros do formato antigo: "data/leiloes.jsonl" -> "data/leiloes_legado.jsonl".
+    """
+    return category_output_file(output_file, LEGACY_CATEGORY)
+
+def migrate_legacy_store(output_file: str, json_path: str = None) -> int:
+    """
+    Migração única do arquivo antigo de `output_file` (mesmo nome com extensão .json, ex.:
+    "data/leiloes_raspados_raw.json"), que tem os itens de todas as categorias, para o JSONL
+    "legado" (ver legacy_output_file). Os JSONL por categoria têm outros nomes, então
+    `migrate_legacy_json` nunca encontraria esse arquivo. Retorna o número de registros migrados.
+    """
+    if json_path is None:
+        json_path = f"{os.path.splitext(output_file)[0]}.json"
+    return migrate_legacy_json(legacy_output_file(output_file), json_path)
+
+
+if __name__ == "__main__":
+    # Uso: python -m modules.raw_store [arquivo.json] [arquivo.jsonl]
+    source = sys.argv[1] if len(sys.argv) > 1 else LEGACY_JSON_FILE
+    target = sys.argv[2] if len(sys.argv) > 2 else RAW_JSONL_FILE
+    if os.path.exists(target):
+        print(f"'{target}' já existe. Nada a migrar.")
+    else:
+        migrate_legacy_json(target, source)
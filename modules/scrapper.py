@@ -1,14 +1,24 @@
 from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
 import requests
-import re 
-import json
+import httpx
 import time
 
+from .crawl_state import CRAWL_STATE_DB, CrawlState
+from .extractor import _default_details, extract_card, get_backend, total_pages_from_text
+from .fetcher import Fetcher
+from .metrics import log, metrics
+from .raw_store import RAW_JSONL_FILE, RawStore, iter_records
+
 URL_BASE = "https://www.megaleiloes.com.br/Pesquisa?tov=igbr&valor_max=5000000&tipo%5B0%5D=1&tipo%5B1%5D=2&pagina="
 
 CARD_CONTAINER_CLASS = "card-content"
 SUMMARY_CLASS = "summary" 
-OUTPUT_JSON_FILE = "data/leiloes_raspados_raw.json" # Nome do arquivo JSON de saída
+OUTPUT_JSON_FILE = RAW_JSONL_FILE # Nome do arquivo JSONL de saída
+LISTING_CACHE_TTL = 0 # Páginas principais mudam a cada novo leilão: com cache HTTP, são sempre revalidadas
 
 # --- Funções Auxiliares ---
 def get_total_pages(soup: BeautifulSoup, summary_class: str) -> int:
@@ -17,192 +27,285 @@ def get_total_pages(soup: BeautifulSoup, summary_class: str) -> int:
     """
     summary_element = soup.find("div", class_=summary_class)
     if summary_element:
-        summary_text = summary_element.text.strip()
-        match = re.search(r'Página \d+ de (\d+)', summary_text)
-        if match:
-            return int(match.group(1)) 
+        return total_pages_from_text(summary_element.text.strip())
     return 1 
 
+def parse_auction_card(card) -> dict:
+    """
+    Extrai os campos de um card de leilão (elemento do BeautifulSoup) da página principal.
+    """
+    return extract_card(get_backend("html.parser"), card)
+
+def parse_description_page(html: str, parser: str = None) -> dict:
+    """
+    Extrai os detalhes de um leilão a partir do HTML da página de descrição, com o parser
+    escolhido (ver extractor.get_backend). Campos ausentes mantêm os valores padrão
+    ("Não encontrada"/"Não encontrado").
+    """
+    return get_backend(parser).parse_details(html)
+
 # --- Função para raspar a página de descrição do leilão ---
-def scrap_description_page(description_url: str, title: str, time_delay:int) -> dict:
+def scrap_description_page(description_url: str, title: str, time_delay:int, fetcher: Fetcher = None,
+                           parser: str = None) -> dict:
     """
     Visita a página de detalhes de um leilão e extrai informações adicionais.
     Retorna um dicionário com os detalhes extraídos.
+
+    Se um `fetcher` for informado, a requisição usa o seu pool de conexões e o seu
+    limitador de taxa por host no lugar do atraso fixo de `time_delay`.
     """
-    details = {
-        "localizacao_detalhada": "Não encontrada",
-        "vara": "Não encontrada",
-        "forum": "Não encontrado",
-        "leiloeiro": "Não encontrado",
-        "descricao_completa": "Não encontrada",
-        "condicoes_pagamento": "Não encontradas"
-    }
+    details, _ = _scrap_description_page(description_url, title, time_delay, fetcher, parser)
+    return details
+
+def _scrap_description_page(description_url: str, title: str, time_delay: int, fetcher: Fetcher = None,
+                            parser: str = None) -> tuple:
+    # (detalhes, True se a página foi baixada e interpretada); em caso de falha, os detalhes são os padrões
+    details = _default_details()
 
     if not description_url or description_url == "Link não encontrado":
-        print(f"  > Link de detalhes não disponível para o leilão '{title}'.")
-        return details
+        log(f"  > Link de detalhes não disponível para o leilão '{title}'.")
+        return details, False
 
-    print(f"  > Visitando página de detalhes para '{title}': {description_url}")
-    
-    time.sleep(time_delay) # Atraso de 1.5 segundo entre as requisições de detalhes (ajustado um pouco)
+    log(f"  > Visitando página de detalhes para '{title}': {description_url}")
 
     try:
-        response = requests.get(description_url)
-        response.raise_for_status()
-
-        soup_details = BeautifulSoup(response.text, "html.parser")
-
-        # --- Extração de Detalhes da Página de Detalhes ---
-        # Localização Detalhada
-        locality_elem = soup_details.select_one("div.locality div.value") 
-        if locality_elem:
-            details["localizacao_detalhada"] = locality_elem.get_text(strip=True)
-
-        # Vara (Jurisdição)
-        vara_elem = soup_details.select_one("div.jurisdiction div.value")
-        if vara_elem:
-            details["vara"] = vara_elem.get_text(strip=True)
-
-        # Forum
-        forum_elem = soup_details.select_one("div.forum div.value")
-        if forum_elem:
-            details["forum"] = forum_elem.get_text(strip=True)
-
-        # Leiloeiro
-        leiloeiro_elem = soup_details.select_one("div.author div.value")
-        if leiloeiro_elem:
-            details["leiloeiro"] = leiloeiro_elem.get_text(strip=True)
-
-        # Descrição Completa (conteúdo dentro de div#tab-description div.content)
-        description_content_elem = soup_details.select_one("div#tab-description div.content")
-        if description_content_elem:
-            details["descricao_completa"] = description_content_elem.get_text(separator="\n", strip=True)
-
-        # Condições de Pagamento (conteúdo dentro de div#tab-contract div.content)
-        # Note que div#tab-contract também tem a classe 'tab-pane'
-        payment_conditions_content_elem = soup_details.select_one("div#tab-contract div.content")
-        if payment_conditions_content_elem:
-            details["condicoes_pagamento"] = payment_conditions_content_elem.get_text(separator="\n", strip=True)
-
-    except requests.exceptions.RequestException as e:
-        print(f"  > Erro ao fazer a requisição para a página de detalhes de '{title}': {e}") 
+        if fetcher is not None:
+            html = fetcher.get_text(description_url)
+        else:
+            time.sleep(time_delay) # Atraso de 1.5 segundo entre as requisições de detalhes (ajustado um pouco)
+            response = requests.get(description_url)
+            response.raise_for_status()
+            html = response.text
+
+        with metrics.timer("parse_details"):
+            details = parse_description_page(html, parser)
+        metrics.count("detail_pages")
+        return details, True
+
+    except (requests.exceptions.RequestException, httpx.HTTPError) as e:
+        metrics.count("scrape_errors")
+        log(f"  > Erro ao fazer a requisição para a página de detalhes de '{title}': {e}") 
     except Exception as e:
-        print(f"  > Ocorreu um erro inesperado ao raspar detalhes de '{title}': {e}")
+        metrics.count("scrape_errors")
+        log(f"  > Ocorreu um erro inesperado ao raspar detalhes de '{title}': {e}")
     
-    return details 
+    return details, False
+
+def _fetch_listing_page(fetcher: Fetcher, page_url: str):
+    """
+    Baixa uma página principal, devolvendo (html, erro) para que falhas em
+    requisições paralelas sejam tratadas na ordem das páginas.
+    """
+    try:
+        return fetcher.get_text(page_url, ttl=LISTING_CACHE_TTL), None
+    except Exception as e:
+        return None, e
+
+def _prefetch_listing_pages(executor: ThreadPoolExecutor, fetcher: Fetcher, page_urls: list, lookahead: int):
+    """
+    Baixa as páginas principais em paralelo, no máximo `lookahead` à frente da página
+    sendo processada, e as devolve na ordem original.
+    """
+    pending = deque()
+    urls = iter(page_urls)
+    for url in islice(urls, max(1, lookahead)):
+        pending.append(executor.submit(_fetch_listing_page, fetcher, url))
+    while pending:
+        result = pending.popleft().result()
+        for url in islice(urls, 1):
+            pending.append(executor.submit(_fetch_listing_page, fetcher, url))
+        yield result
 
 # --- Função principal de scraping ---
-def run_scrap(base_url: str, card_container_class: str, summary_class: str, output_file: str, time_delay:float = 1.5):
-    all_extracted_data = [] 
+def scrap_items(base_url: str, card_container_class: str, summary_class: str, output_file: str, time_delay:float = 1.5,
+                max_workers: int = 1, requests_per_second: float = None,
+                incremental: bool = False, category: str = None, state_db: str = CRAWL_STATE_DB, db_name: str = None,
+                parser: str = None, http_cache_dir: str = None, replay: bool = False, fetcher: Fetcher = None,
+                on_page=None):
+    """
+    Raspa todas as páginas principais de uma categoria e as páginas de detalhes de cada card,
+    gravando cada item no arquivo JSONL e devolvendo-o (gerador) assim que é raspado.
+
+    Args:
+        max_workers (int): Número de requisições simultâneas. Com valor maior que 1, as páginas
+            principais 2..N e as páginas de detalhes são baixadas em paralelo.
+        requests_per_second (float): Limite de requisições por segundo por host. Se omitido,
+            usa 1 / time_delay, equivalente ao atraso fixo anterior.
+        incremental (bool): Ativa o crawl incremental: retoma a categoria do último checkpoint,
+            não visita a página de detalhes de cards já conhecidos com preço e número inalterados
+            e para a paginação na primeira página que só tem itens conhecidos.
+        category (str): Nome da categoria usado no checkpoint (padrão: base_url).
+        state_db (str): Banco SQLite com os checkpoints e o índice de leilões conhecidos.
+        db_name (str): Banco principal cujos imóveis também alimentam o índice de conhecidos.
+        parser (str): Parser de HTML ("selectolax", "lxml", "html.parser" ou "auto"; padrão:
+            extractor.PARSER_BACKEND). Todos produzem os mesmos itens.
+        http_cache_dir (str): Diretório do cache de respostas HTTP (ver http_cache.HttpCache).
+            Páginas de detalhes dentro do TTL não são baixadas de novo; as demais são revalidadas.
+        replay (bool): Roda o scraping só com as respostas do cache, sem acessar a rede
+            (execuções determinísticas para depuração e testes).
+        fetcher (Fetcher): Cliente HTTP compartilhado com outras raspagens (categorias em paralelo
+            sob um mesmo limite de taxa). Se omitido, um Fetcher próprio é criado com `max_workers`,
+            `requests_per_second`, `http_cache_dir` e `replay`, e fechado ao final.
+        on_page (callable): Chamada como on_page(página, total de páginas) a cada página principal
+            concluída (acompanhamento do progresso).
+
+    Com `category`, cada item leva o campo "categoria".
+    A ordem dos itens salvos é sempre a ordem das páginas e dos cards no site.
+    Se o consumidor parar de iterar, o scraping é interrompido e as conexões são fechadas.
+    """
+    category_name = category
     current_page = 1
     total_pages = 1 
+    total_saved = 0
+    total_skipped = 0
+
+    # Os itens são acrescentados ao arquivo JSONL um a um; nada do que já foi raspado é carregado em memória
+    raw_store = RawStore(output_file)
+    log(f"Acrescentando novos itens a '{output_file}'.")
+
+    # Crawl incremental: índice de itens conhecidos e retomada a partir do checkpoint da categoria
+    crawl_state = None
+    if incremental:
+        category = category or base_url
+        crawl_state = CrawlState(state_db)
+        crawl_state.remember(iter_records(output_file))
+        if db_name:
+            crawl_state.seed_from_db(db_name)
+        current_page = crawl_state.start_page(category)
+        total_pages = current_page
+        if current_page > 1:
+            log(f"Retomando a categoria '{category}' a partir da página {current_page} (checkpoint).")
+
+    backend = get_backend(parser)
+    log(f"Parser de HTML: {backend.name}.")
 
-    # Tenta carregar dados existentes do arquivo JSON
     try:
-        with open(output_file, 'r', encoding='utf-8') as f:
-            all_extracted_data = json.load(f)
-        print(f"Carregados {len(all_extracted_data)} itens existentes de '{output_file}'.")
-    except FileNotFoundError:
-        print(f"Arquivo '{output_file}' não encontrado. Começando um novo arquivo.")
-    except json.JSONDecodeError:
-        print(f"Erro ao decodificar JSON de '{output_file}'. O arquivo pode estar corrompido ou vazio. Começando um novo arquivo.")
-        all_extracted_data = [] # Reinicia se o JSON estiver corrompido
-
-    # Otimização: se já carregamos dados, podemos tentar continuar da última página raspada
-    if all_extracted_data:
-        # A URL que você forneceu termina com "&pagina=", então podemos extrair a última página
-        # do último link de detalhes raspado, se disponível
-        last_item_link = all_extracted_data[-1].get("link_detalhes")
-        if last_item_link:
-            match = re.search(r'&pagina=(\d+)', last_item_link)
-            if match:
-                # Tentamos retomar da página seguinte à última raspada
-                # (ou da mesma página se o último item foi o primeiro daquela página)
-                # No entanto, essa lógica pode ser falha se a ordem dos itens mudar ou se a página
-                # estiver cheia e não houver um item raspado correspondente à última página.
-                # Para simplificar e garantir a continuidade do fluxo de paginação,
-                # vamos manter o `current_page = 1` e confiar no filtro de dados duplicados
-                # se você precisar dele (não implementado aqui, mas é uma consideração).
-                pass # Nenhuma ação aqui, a página começa em 1
-
-    while current_page <= total_pages:
-        page_url = f"{base_url}{current_page}"
-        print(f"\nRaspando página principal: {page_url}")
-
-        try:
-            response = requests.get(page_url)
-            response.raise_for_status()
+        if requests_per_second is None and time_delay > 0:
+            requests_per_second = 1.0 / time_delay
 
-            main_page_soup = BeautifulSoup(response.text, "html.parser")
+        if fetcher is not None:
+            shared_fetcher = nullcontext(fetcher) # Fechado por quem o criou
+        else:
+            shared_fetcher = Fetcher(max_workers=max_workers, requests_per_second=requests_per_second,
+                                     cache_dir=http_cache_dir, replay=replay)
+        with raw_store, shared_fetcher as fetcher, ThreadPoolExecutor(max_workers=fetcher.max_workers) as executor:
 
-            if current_page == 1:
-                total_pages = get_total_pages(main_page_soup, summary_class)
-                print(f"Total de páginas a raspar: {total_pages}\n")
-                if total_pages == 1: 
-                     print("Atenção: Apenas uma página principal encontrada, verificando se há conteúdo.")
+            def fetch_details(card_data: dict) -> tuple:
+                return _scrap_description_page(description_url=card_data["link_detalhes"], title=card_data["titulo"],
+                                              time_delay=time_delay, fetcher=fetcher, parser=backend.name)
 
-            auction_cards = main_page_soup.find_all("div", class_=card_container_class)
+            # A primeira página é baixada sozinha para descobrir o total de páginas;
+            # as seguintes são baixadas em paralelo e consumidas em ordem.
+            first_page = current_page
+            listing_pages = iter([_fetch_listing_page(fetcher, f"{base_url}{first_page}")])
 
-            if not auction_cards:
-                print(f"Nenhum card com a classe '{card_container_class}' encontrado na página {current_page}. Parando o scraping.")
-                break 
+            while current_page <= total_pages:
+                page_url = f"{base_url}{current_page}"
+                log(f"\nRaspando página principal: {page_url}")
 
-            current_page_data = [] 
+                try:
+                    html, error = next(listing_pages)
+                    if error is not None:
+                        raise error
 
-            for card in auction_cards:
-                name_tag = card.select_one("a.card-title") 
-                price_tag = card.select_one("div.card-price")
-                locality_tag_main = card.select_one("a.card-locality") # Localidade da página principal
-                number_tag = card.select_one("div.card-number")
+                    with metrics.timer("parse_listing"):
+                        page_total, cards_data = backend.parse_listing(html, card_container_class, summary_class)
+                    metrics.count("listing_pages")
+                    metrics.count("items_seen", len(cards_data))
 
-                name = name_tag.text.strip() if name_tag else "Título não encontrado"
-                price = price_tag.text.strip() if price_tag else "Preço não encontrado"
-                # Usar a localidade da página principal aqui, a detalhada virá do scrap_description_page
-                locality_main = locality_tag_main.text.strip() if locality_tag_main else "Localidade (principal) não encontrada"
-                auction_number = number_tag.text.strip() if number_tag else "Número do leilão não encontrado"
-                title_link = name_tag.get('href') if name_tag else "Link não encontrado"
+                    if current_page == first_page:
+                        total_pages = page_total
+                        log(f"Total de páginas a raspar: {total_pages}\n")
+                        if total_pages == 1: 
+                             log("Atenção: Apenas uma página principal encontrada, verificando se há conteúdo.")
+                        next_urls = [f"{base_url}{page}" for page in range(first_page + 1, total_pages + 1)]
+                        listing_pages = _prefetch_listing_pages(executor, fetcher, next_urls, fetcher.max_workers)
 
-                print(f"--- Processando Item: '{name}' (Página {current_page}) ---")
-                
-                # Chamando a função de scraping da página de detalhes
-                additional_details = scrap_description_page(description_url=title_link, title=name, time_delay=time_delay)
-                
-                # Combinar os dados da página principal com os da página de detalhes
-                combined_data = {
-                    "titulo": name,
-                    "preco": price,
-                    "localidade_pagina_principal": locality_main, # Para diferenciar da detalhada
-                    "numero_leilao": auction_number,
-                    "link_detalhes": title_link,
-                    **additional_details 
-                }
-                current_page_data.append(combined_data) 
+                    if not cards_data:
+                        log(f"Nenhum card com a classe '{card_container_class}' encontrado na página {current_page}. Parando o scraping.")
+                        break 
+
+                    if crawl_state is not None:
+                        new_cards = [card_data for card_data in cards_data if not crawl_state.is_unchanged(card_data)]
+                        skipped = len(cards_data) - len(new_cards)
+                        total_skipped += skipped
+                        metrics.count("items_skipped_unchanged", skipped)
+                        if skipped:
+                            log(f"{skipped} itens já conhecidos e inalterados na página {current_page}. Pulando suas páginas de detalhes.")
+                    else:
+                        new_cards = cards_data
+                    for card_data in new_cards:
+                        log(f"--- Processando Item: '{card_data['titulo']}' (Página {current_page}) ---")
+
+                    # Chamando a função de scraping da página de detalhes (em paralelo, preservando a ordem dos cards)
+                    current_page_data = [] 
+                    fetched_data = [] # Só os itens com a página de detalhes obtida entram no índice de conhecidos
+                    for card_data, (additional_details, fetched) in zip(new_cards, executor.map(fetch_details, new_cards)):
+                        # Combinar os dados da página principal com os da página de detalhes e gravar no arquivo JSONL
+                        combined_data = {**card_data, **additional_details}
+                        if category_name:
+                            combined_data["categoria"] = category_name
+                        raw_store.append(combined_data)
+                        current_page_data.append(combined_data)
+                        if fetched:
+                            fetched_data.append(combined_data)
+                        yield combined_data
+
+                    total_saved += len(current_page_data)
+                    log(f"Salvos {len(current_page_data)} novos itens da página {current_page}. Total acumulado nesta execução: {total_saved} itens em '{output_file}'.")
+                    if on_page is not None:
+                        on_page(current_page, total_pages)
+
+                    if crawl_state is not None:
+                        # Um item cuja página de detalhes falhou fica com os detalhes padrão: não sendo lembrado,
+                        # é visitado de novo na próxima execução incremental
+                        crawl_state.remember(fetched_data)
+                        if not new_cards:
+                            log(f"A página {current_page} só tem itens conhecidos e inalterados. Encerrando o crawl incremental.")
+                            crawl_state.save_checkpoint(category, 1, total_pages, completed=True)
+                            break
+                        crawl_state.save_checkpoint(category, current_page + 1, total_pages, completed=current_page >= total_pages)
                 
-            # Salvar dados desta página na lista geral e então no arquivo JSON
-            all_extracted_data.extend(current_page_data) 
-            
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(all_extracted_data, f, ensure_ascii=False, indent=4)
-            print(f"Salvos {len(current_page_data)} novos itens da página {current_page}. Total acumulado: {len(all_extracted_data)} itens em '{output_file}'.")
-            
-            current_page += 1 
-
-        except requests.exceptions.RequestException as e:
-            print(f"Erro ao fazer a requisição na página {current_page}: {e}. Parando o scraping.")
-            break 
-        except Exception as e:
-            print(f"Ocorreu um erro inesperado na página {current_page}: {e}. Parando o scraping.")
-            break 
+                    current_page += 1 
+
+                except (requests.exceptions.RequestException, httpx.HTTPError) as e:
+                    metrics.count("scrape_errors")
+                    log(f"Erro ao fazer a requisição na página {current_page}: {e}. Parando o scraping.")
+                    break 
+                except Exception as e:
+                    metrics.count("scrape_errors")
+                    log(f"Ocorreu um erro inesperado na página {current_page}: {e}. Parando o scraping.")
+                    break 
+
+            # Ao interromper o scraping, descarta as páginas principais ainda pendentes
+            executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        if crawl_state is not None:
+            crawl_state.close()
+
+    if crawl_state is not None:
+        log(f"\nCrawl incremental: {total_skipped} itens conhecidos e inalterados não foram visitados novamente.")
     
-    print(f"\nProcesso de scraping concluído. Total final de {len(all_extracted_data)} itens raspados de {total_pages} páginas.")
-    # Garante que o arquivo final está atualizado, mesmo se houve um break
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(all_extracted_data, f, ensure_ascii=False, indent=4)
-    print(f"Todos os dados finais salvos em '{output_file}'.")
+    log(f"\nProcesso de scraping concluído. Total de {total_saved} novos itens raspados de {total_pages} páginas, salvos em '{output_file}'.")
+
+
+def run_scrap(base_url: str, card_container_class: str, summary_class: str, output_file: str, time_delay:float = 1.5,
+              max_workers: int = 1, requests_per_second: float = None,
+              incremental: bool = False, category: str = None, state_db: str = CRAWL_STATE_DB, db_name: str = None,
+              parser: str = None, http_cache_dir: str = None, replay: bool = False, fetcher: Fetcher = None):
+    """
+    Executa o scraping completo de uma categoria, salvando os itens em `output_file`.
+    Os parâmetros são os mesmos de `scrap_items`.
+    """
+    for _ in scrap_items(base_url, card_container_class, summary_class, output_file, time_delay=time_delay,
+                         max_workers=max_workers, requests_per_second=requests_per_second,
+                         incremental=incremental, category=category, state_db=state_db, db_name=db_name,
+                         parser=parser, http_cache_dir=http_cache_dir, replay=replay, fetcher=fetcher):
+        pass
 
 
 if __name__ == "__main__":
     run_scrap(base_url=URL_BASE, 
               card_container_class=CARD_CONTAINER_CLASS,
               summary_class=SUMMARY_CLASS,
-              output_file=OUTPUT_JSON_FILE)
\ No newline at end of file
+              output_file=OUTPUT_JSON_FILE)
@@ -0,0 +1,240 @@
+# viewer.py
+import math
+import time
+
+import streamlit as st
+
+from .aggregates import price_bucket_label
+from .jobs import ACTIVE_STATUSES, JobAlreadyRunningError, JobStore, start_refresh_job
+from .viewer_data import (PAGE_SIZE, db_version, load_aggregate_summary, load_aggregate_timeline, load_category_counts,
+                          load_city_counts, load_histogram, load_property_details, load_property_page, prepare_database,
+                          search_properties)
+
+# --- Configurações ---
+JOB_POLL_INTERVAL = 5 # Segundos entre as consultas ao progresso de uma atualização em andamento
+# Agrupamentos da seção de análises (rótulo -> dimensão das tabelas de agregados)
+ANALYTICS_DIMENSIONS = {"UF": "uf", "Cidade": "cidade", "Leiloeiro": "leiloeiro", "Fórum": "forum"}
+
+# st.fragment (Streamlit >= 1.37) reexecuta só o painel de progresso; sem ele, o progresso é atualizado a cada interação
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+# --- Consultas em cache ---
+# As migrações do banco rodam uma vez por processo do Streamlit, antes da primeira consulta
+@st.cache_resource(show_spinner=False)
+def prepared_database(db_name: str) -> bool:
+    return prepare_database(db_name)
+
+
+# `version` (db_version) faz parte da chave do cache: qualquer gravação no banco invalida os resultados
+@st.cache_data(show_spinner=False)
+def cached_category_counts(db_name: str, min_score: int, version: tuple) -> list:
+    return load_category_counts(db_name, min_score)
+
+@st.cache_data(show_spinner=False)
+def cached_city_counts(db_name: str, min_score: int, category: str, version: tuple) -> list:
+    return load_city_counts(db_name, min_score, category)
+
+@st.cache_data(show_spinner=False)
+def cached_property_page(db_name: str, min_score: int, category: str, city: str, page: int, version: tuple) -> list:
+    return load_property_page(db_name, min_score, city, page, category=category)
+
+@st.cache_data(show_spinner=False, max_entries=200)
+def cached_search(db_name: str, text: str, min_score: int, category: str, version: tuple) -> list:
+    return search_properties(db_name, text, min_score, category=category)
+
+@st.cache_data(show_spinner=False, max_entries=1000)
+def cached_property_details(db_name: str, property_id: int, version: tuple) -> dict:
+    return load_property_details(db_name, property_id)
+
+@st.cache_data(show_spinner=False)
+def cached_aggregate_summary(db_name: str, dimension: str, version: tuple) -> list:
+    return load_aggregate_summary(db_name, dimension)
+
+@st.cache_data(show_spinner=False, max_entries=200)
+def cached_aggregate_timeline(db_name: str, dimension: str, key: str, version: tuple) -> list:
+    return load_aggregate_timeline(db_name, dimension, key)
+
+@st.cache_data(show_spinner=False, max_entries=200)
+def cached_histogram(db_name: str, dimension: str, key: str, metric: str, version: tuple) -> list:
+    return load_histogram(db_name, dimension, key, metric)
+
+# --- Visualizador ---
+def _render_card(db_name: str, row: dict, version: tuple):
+    st.subheader(row['titulo'])
+    st.markdown(f"**Preço:** {row['preco']}")
+    st.markdown(f"**Localização:** {row['localizacao_detalhada']}")
+    st.markdown(f"**Leiloeiro:** {row['leiloeiro']}")
+    st.markdown(f"**Pontuação:** {row['pontuacao_ollama']}/10")
+    if row.get('trecho'):
+        st.markdown(f"> {' '.join(row['trecho'].split())}")
+    st.markdown(f"[🔗 Link para o leilão]({row['link_detalhes']})")
+    # O Streamlit não avisa quando um expander é aberto: o toggle carrega os campos longos sob demanda
+    if st.toggle("📝 Ver descrição e avaliação", key=f"detalhes_{row['id']}"):
+        detalhes = cached_property_details(db_name, row['id'], version)
+        with st.expander("📝 Descrição completa", expanded=True):
+            st.write(detalhes['descricao_completa'])
+        with st.expander("✅ Pontos Positivos", expanded=True):
+            st.write(detalhes['pontos_positivos'])
+        with st.expander("⚠️ Pontos Negativos", expanded=True):
+            st.write(detalhes['pontos_negativos'])
+    st.divider()
+
+# --- Atualização em segundo plano ---
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}min" if hours else f"{minutes}min{seconds:02d}s"
+
+def _render_job_status(db_name: str, was_running: bool):
+    with JobStore(db_name) as store:
+        job = store.latest()
+        if job is None:
+            return
+        running = job["status"] in ACTIVE_STATUSES
+        if was_running and not running:
+            # A atualização terminou: recarrega a página inteira (botão, filtros e cards com os dados novos)
+            st.rerun()
+        if not running:
+            concluido = time.strftime("%d/%m/%Y %H:%M", time.localtime(job["concluido_em"] or job["atualizado_em"]))
+            st.caption(f"Última atualização ({concluido}): {job['status']}. {job['mensagem'] or ''}")
+            return
+
+        texto = (f"Atualização {job['id']} {job['status']}: {job['paginas_concluidas']}/{job['paginas_total']} páginas, "
+                 f"{job['itens_raspados']} itens raspados, {job['itens_avaliados']} avaliados, "
+                 f"{job['itens_gravados']} gravados, {job['erros']} erros.")
+        st.progress(job["progresso"] or 0.0, text=texto)
+        if job["eta_s"]:
+            st.caption(f"Tempo restante estimado: {_format_duration(job['eta_s'])}. Os dados já gravados podem ser consultados abaixo.")
+        if job["cancelar"]:
+            st.caption("Cancelamento solicitado; a atualização termina o que está em andamento e para.")
+        elif st.button("⏹️ Cancelar atualização", key=f"cancelar_{job['id']}"):
+            store.request_cancel(job["id"])
+
+def render_refresh_panel(db_name: str, job_params: dict):
+    """
+    Botão que inicia a atualização (scraping e avaliação) em um processo separado e o progresso dela,
+    consultado a cada JOB_POLL_INTERVAL segundos. A sessão continua livre enquanto a atualização roda,
+    e recarregar a página não interrompe nem duplica a execução.
+    """
+    with JobStore(db_name) as store:
+        job = store.latest()
+    running = job is not None and job["status"] in ACTIVE_STATUSES
+
+    if st.button("🔄 Atualizar Dados (Rodar Scraper)", disabled=running):
+        try:
+            start_refresh_job(db_name, job_params)
+            st.rerun() # Redesenha com o botão desativado e o progresso da nova atualização
+        except JobAlreadyRunningError as e:
+            st.warning(str(e))
+
+    if _fragment is not None:
+        _fragment(run_every=JOB_POLL_INTERVAL if running else None)(_render_job_status)(db_name, running)
+    else:
+        _render_job_status(db_name, running)
+
+# --- Análises ---
+def _format_brl(value: float) -> str:
+    if value is None:
+        return "-"
+    return f"R$ {value:,.0f}".replace(",", ".")
+
+def render_analytics(db_name: str):
+    """
+    Quantidades, preços e pontuações por UF, cidade, leiloeiro e fórum, com a evolução mensal e os
+    histogramas de preço e pontuação. Lê só as tabelas de agregados (ver aggregates.py), mantidas
+    a cada gravação: o tempo de carga não cresce com o número de imóveis.
+    """
+    # Antes de qualquer consulta: o painel é desenhado antes do visualizador, inclusive com o banco ainda vazio
+    prepared = prepared_database(db_name)
+    version = db_version(db_name)
+    with st.expander("📊 Análises"):
+        if not prepared:
+            st.info("Sem dados para as análises: o banco não pôde ser atualizado para a versão atual.")
+            return
+        agrupamento = st.radio("Agrupar por:", list(ANALYTICS_DIMENSIONS), horizontal=True)
+        dimensao = ANALYTICS_DIMENSIONS[agrupamento]
+        resumo = cached_aggregate_summary(db_name, dimensao, version)
+        if not resumo:
+            st.info("Nenhum imóvel avaliado ainda.")
+            return
+        st.dataframe([{
+            agrupamento: row["chave"] or "(não informado)",
+            "Imóveis": row["quantidade"],
+            "Preço médio": _format_brl(row["preco_medio"]),
+            "Preço mínimo": _format_brl(row["preco_minimo"]),
+            "Preço máximo": _format_brl(row["preco_maximo"]),
+            "Pontuação média": round(row["pontuacao_media"], 1) if row["pontuacao_media"] is not None else None,
+        } for row in resumo], hide_index=True)
+
+        # "Todos" usa a dimensão "total" (uma única chave, vazia)
+        chaves = {"Todos": ("total", "")}
+        chaves.update({f"{row['chave'] or '(não informado)'} ({row['quantidade']})": (dimensao, row["chave"]) for row in resumo})
+        dimensao_grafico, chave = chaves[st.selectbox("Detalhar:", list(chaves))]
+
+        evolucao = cached_aggregate_timeline(db_name, dimensao_grafico, chave, version)
+        st.caption("Imóveis por mês do 1º leilão (ou da avaliação, sem data do leilão)")
+        st.bar_chart({"Mês": [row["periodo"] or "sem data" for row in evolucao],
+                      "Imóveis": [row["quantidade"] for row in evolucao]}, x="Mês", y="Imóveis")
+        coluna_preco, coluna_pontuacao = st.columns(2)
+        with coluna_preco:
+            st.caption("Faixas de preço")
+            faixas = cached_histogram(db_name, dimensao_grafico, chave, "preco", version)
+            # O prefixo numérico mantém as faixas na ordem no eixo do gráfico
+            st.bar_chart({"Faixa": [f"{faixa:02d}. {price_bucket_label(faixa)}" for faixa, _ in faixas],
+                          "Imóveis": [quantidade for _, quantidade in faixas]}, x="Faixa", y="Imóveis")
+        with coluna_pontuacao:
+            st.caption("Pontuações")
+            notas = cached_histogram(db_name, dimensao_grafico, chave, "pontuacao", version)
+            st.bar_chart({"Pontuação": [nota for nota, _ in notas],
+                          "Imóveis": [quantidade for _, quantidade in notas]}, x="Pontuação", y="Imóveis")
+
+def render_viewer(db_name: str, default_min_score: int = 7):
+    """
+    Filtros (pontuação mínima, categoria e cidade) ou busca textual, paginação e cards dos imóveis. Só a página
+    atual é lida do banco, e a descrição e os pontos positivos/negativos só quando o card é expandido.
+    """
+    if not prepared_database(db_name):
+        st.error(f"O banco '{db_name}' é de uma versão anterior e não pôde ser atualizado (verifique a permissão de escrita).")
+        return
+    version = db_version(db_name)
+
+    # Todas as avaliações ficam no banco: o limiar é aplicado na consulta
+    pontuacao_minima = st.slider("Pontuação mínima:", 0, 10, default_min_score)
+
+    # Categoria (casas, apartamentos, terrenos...): "Todas" não filtra
+    categorias = {"Todas": None}
+    categorias.update({f"{categoria} ({quantidade})": categoria
+                       for categoria, quantidade in cached_category_counts(db_name, pontuacao_minima, version) if categoria})
+    categoria = categorias[st.selectbox("Categoria:", list(categorias))]
+
+    # Busca textual (FTS5) na descrição, condições de pagamento, localização e pontos da LLM
+    busca = st.text_input("🔎 Buscar (ex.: desocupado, FGTS, \"rua das flores\", financ*):").strip()
+    if busca:
+        resultados = cached_search(db_name, busca, pontuacao_minima, categoria, version)
+        st.caption(f"{len(resultados)} resultado(s), do mais relevante para o menos.")
+        for row in resultados:
+            _render_card(db_name, row, version)
+        return
+
+    # Contagem de imóveis por cidade
+    contagem = dict(cached_city_counts(db_name, pontuacao_minima, categoria, version))
+    if not contagem:
+        st.info("Nenhum imóvel com essa pontuação.")
+        return
+
+    # Gerar opções com quantidade (rótulo -> cidade)
+    opcoes = {f"{cidade} ({quantidade})": cidade for cidade, quantidade in contagem.items()}
+
+    # Selectbox
+    cidade_selecionada = st.selectbox("Selecione a cidade:", list(opcoes))
+
+    # Extrair cidade
+    cidade = opcoes[cidade_selecionada]
+
+    # Paginação
+    total_paginas = max(1, math.ceil(contagem[cidade] / PAGE_SIZE))
+    pagina = st.number_input(f"Página (de {total_paginas}):", min_value=1, max_value=total_paginas, value=1) if total_paginas > 1 else 1
+
+    # Mostrar cards
+    for row in cached_property_page(db_name, pontuacao_minima, categoria, cidade, pagina, version):
+        _render_card(db_name, row, version)
@@ -0,0 +1,242 @@
+# viewer_data.py
+import os
+import re
+import sqlite3
+
+from .data_menager import FTS_COLUMNS, SCHEMA_VERSION, ensure_schema, schema_version
+
+# --- Configurações ---
+PAGE_SIZE = 20 # Cards por página no visualizador
+# Colunas exibidas nos cards; os campos longos são carregados à parte, só quando abertos
+CARD_COLUMNS = ("id", "titulo", "preco", "localizacao_detalhada", "leiloeiro", "link_detalhes", "pontuacao_ollama")
+DETAIL_COLUMNS = ("descricao_completa", "pontos_positivos", "pontos_negativos")
+SEARCH_LIMIT = 50 # Máximo de resultados da busca textual
+# Pesos do bm25 por coluna do imoveis_fts (descrição, condições, localização, pontos positivos, negativos)
+SEARCH_WEIGHTS = (2.0, 1.0, 3.0, 1.0, 1.0)
+AGGREGATE_LIMIT = 50 # Máximo de chaves (cidades, leiloeiros...) na tabela de análises
+AGGREGATE_COLUMNS = ("chave", "quantidade", "preco_medio", "preco_minimo", "preco_maximo",
+                     "pontuacao_media", "pontuacao_minima", "pontuacao_maxima")
+
+_SEARCH_TERM_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+# --- Acesso ao banco para o visualizador ---
+def db_version(db_name: str) -> tuple:
+    """
+    Identifica o estado atual do banco pelas datas de modificação do arquivo e do WAL.
+    Muda sempre que o banco é gravado; usado como chave dos caches do visualizador.
+    """
+    version = []
+    for path in (db_name, f"{db_name}-wal"):
+        try:
+            stat = os.stat(path)
+            version.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            version.append(None)
+    return tuple(version)
+
+def prepare_database(db_name: str) -> bool:
+    """
+    Garante que o banco tenha o esquema atual antes das consultas somente leitura: um banco criado
+    por uma versão anterior do projeto (ou ainda vazio) é migrado uma vez, por uma conexão de escrita.
+    Retorna False se o banco não pôde ser migrado (ex.: arquivo sem permissão de escrita).
+    """
+    if schema_version(db_name) == SCHEMA_VERSION:
+        return True
+    try:
+        ensure_schema(db_name)
+    except sqlite3.Error as e:
+        print(f"Não foi possível migrar o banco '{db_name}' para o visualizador: {e}")
+        return False
+    return True
+
+def _connect(db_name: str) -> sqlite3.Connection:
+    # Somente leitura: o visualizador nunca bloqueia o gravador
+    return sqlite3.connect(f"file:{db_name}?mode=ro", uri=True)
+
+def load_category_counts(db_name: str, min_score: int) -> list:
+    """
+    Categorias com o número de imóveis com pontuação >= min_score, em ordem alfabética.
+    """
+    conn = _connect(db_name)
+    try:
+        return conn.execute('''
+            SELECT categoria, COUNT(*) FROM imoveis
+            WHERE pontuacao_ollama >= ?
+            GROUP BY categoria
+            ORDER BY categoria
+        ''', (min_score,)).fetchall()
+    finally:
+        conn.close()
+
+def load_city_counts(db_name: str, min_score: int, category: str = None) -> list:
+    """
+    Cidades (localidade da página principal) com o número de imóveis com pontuação >= min_score
+    (da categoria, se informada), em ordem alfabética.
+    """
+    conn = _connect(db_name)
+    try:
+        return conn.execute('''
+            SELECT localidade_pagina_principal, COUNT(*) FROM imoveis
+            WHERE pontuacao_ollama >= ? AND (? IS NULL OR categoria = ?)
+            GROUP BY localidade_pagina_principal
+            ORDER BY localidade_pagina_principal
+        ''', (min_score, category, category)).fetchall()
+    finally:
+        conn.close()
+
+def load_property_page(db_name: str, min_score: int, city: str, page: int = 1, page_size: int = PAGE_SIZE,
+                       category: str = None) -> list:
+    """
+    Uma página de cards (dicionários com CARD_COLUMNS) da cidade (e da categoria, se informada),
+    dos mais bem pontuados para os menos.
+    """
+    conn = _connect(db_name)
+    try:
+        rows = conn.execute(f'''
+            SELECT {", ".join(CARD_COLUMNS)} FROM imoveis
+            WHERE pontuacao_ollama >= ? AND localidade_pagina_principal IS ? AND (? IS NULL OR categoria = ?)
+            ORDER BY pontuacao_ollama DESC, id
+            LIMIT ? OFFSET ?
+        ''', (min_score, city, category, category, page_size, (max(page, 1) - 1) * page_size)).fetchall()
+    finally:
+        conn.close()
+    return [dict(zip(CARD_COLUMNS, row)) for row in rows]
+
+def load_property_details(db_name: str, property_id: int) -> dict:
+    """
+    Campos longos (descrição e pontos positivos/negativos) de um imóvel.
+    """
+    conn = _connect(db_name)
+    try:
+        row = conn.execute(f"SELECT {', '.join(DETAIL_COLUMNS)} FROM imoveis WHERE id = ?", (property_id,)).fetchone()
+    finally:
+        conn.close()
+    return dict(zip(DETAIL_COLUMNS, row)) if row else dict.fromkeys(DETAIL_COLUMNS)
+
+# --- Busca textual (FTS5) ---
+def _search_terms(text: str) -> list:
+    # Pares (termo, busca por prefixo) do texto digitado
+    terms = []
+    for phrase, word in _SEARCH_TERM_RE.findall(text or ""):
+        term = phrase or word
+        prefix = not phrase and term.endswith("*")
+        term = term.rstrip("*")
+        if term:
+            terms.append((term, prefix))
+    return terms
+
+def build_fts_query(text: str) -> str:
+    """
+    Converte o texto digitado em uma consulta FTS5 segura: cada palavra (ou "frase entre aspas")
+    vira um termo obrigatório; uma palavra terminada em * busca por prefixo ("financ*").
+    """
+    terms = []
+    for term, prefix in _search_terms(text):
+        term = term.replace('"', '""')
+        terms.append(f'"{term}"*' if prefix else f'"{term}"')
+    return " ".join(terms)
+
+def _search_properties_like(conn: sqlite3.Connection, text: str, min_score: int, limit: int, category: str) -> list:
+    # Sem o índice FTS5 (banco não migrado ou SQLite sem FTS5): cada termo deve aparecer em algum dos
+    # campos de texto (LIKE, sem ranking nem trecho destacado), dos mais bem pontuados para os menos
+    document = " || ' ' || ".join(f"COALESCE({column}, '')" for column in FTS_COLUMNS)
+    terms = _search_terms(text)
+    conditions = " AND ".join(f"({document}) LIKE ? ESCAPE '\\'" for _ in terms)
+    patterns = ["%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%" for term, _ in terms]
+    # Um banco anterior à migração 4 não tem a coluna `categoria`: a busca vale para todas
+    has_category = any(row[1] == "categoria" for row in conn.execute("PRAGMA table_info(imoveis)"))
+    category_filter = "AND (? IS NULL OR categoria = ?)" if has_category else ""
+    return conn.execute(f'''
+        SELECT {", ".join(CARD_COLUMNS)}, NULL FROM imoveis
+        WHERE {conditions} AND pontuacao_ollama >= ? {category_filter}
+        ORDER BY pontuacao_ollama DESC, id
+        LIMIT ?
+    ''', (*patterns, min_score, *((category, category) if has_category else ()), limit)).fetchall()
+
+def search_properties(db_name: str, text: str, min_score: int, limit: int = SEARCH_LIMIT, category: str = None) -> list:
+    """
+    Imóveis com pontuação >= min_score (da categoria, se informada) que contêm os termos buscados,
+    do mais relevante (bm25) para o menos, com um trecho destacado ("trecho") do campo onde foram encontrados.
+    """
+    query = build_fts_query(text)
+    if not query:
+        return []
+    columns = ", ".join(f"imoveis.{column}" for column in CARD_COLUMNS)
+    weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+    conn = _connect(db_name)
+    try:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'imoveis_fts'").fetchone():
+            rows = _search_properties_like(conn, text, min_score, limit, category)
+        else:
+            rows = conn.execute(f'''
+                SELECT {columns}, snippet(imoveis_fts, -1, '**', '**', '…', 16) FROM imoveis_fts
+                JOIN imoveis ON imoveis.id = imoveis_fts.rowid
+                WHERE imoveis_fts MATCH ? AND imoveis.pontuacao_ollama >= ? AND (? IS NULL OR imoveis.categoria = ?)
+                ORDER BY bm25(imoveis_fts, {weights})
+                LIMIT ?
+            ''', (query, min_score, category, category, limit)).fetchall()
+    finally:
+        conn.close()
+    return [dict(zip(CARD_COLUMNS + ("trecho",), row)) for row in rows]
+
+# --- Agregados (tabelas mantidas por triggers, ver aggregates.py) ---
+def _has_table(conn: sqlite3.Connection, table: str) -> bool:
+    # Banco anterior à migração 7 (e que não pôde ser migrado): sem agregados, as análises ficam vazias
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+def load_aggregate_summary(db_name: str, dimension: str, limit: int = AGGREGATE_LIMIT) -> list:
+    """
+    Chaves da dimensão ("uf", "cidade", "leiloeiro", "forum" ou "total") com mais imóveis, somando todos
+    os meses: dicionários com chave, quantidade, preço médio/mínimo/máximo e pontuação média/mínima/máxima.
+    """
+    conn = _connect(db_name)
+    try:
+        if not _has_table(conn, "agregados_imoveis"):
+            return []
+        rows = conn.execute('''
+            SELECT chave, SUM(quantidade),
+                   SUM(soma_preco) / NULLIF(SUM(quantidade_preco), 0), MIN(min_preco), MAX(max_preco),
+                   SUM(soma_pontuacao) / NULLIF(SUM(quantidade_pontuacao), 0), MIN(min_pontuacao), MAX(max_pontuacao)
+            FROM agregados_imoveis WHERE dimensao = ?
+            GROUP BY chave
+            ORDER BY 2 DESC, chave
+            LIMIT ?
+        ''', (dimension, limit)).fetchall()
+    finally:
+        conn.close()
+    return [dict(zip(AGGREGATE_COLUMNS, row)) for row in rows]
+
+def load_aggregate_timeline(db_name: str, dimension: str, key: str) -> list:
+    """
+    Quantidade de imóveis, preço médio e pontuação média da chave por mês (do 1º leilão), em ordem cronológica.
+    """
+    conn = _connect(db_name)
+    try:
+        if not _has_table(conn, "agregados_imoveis"):
+            return []
+        rows = conn.execute('''
+            SELECT periodo, quantidade, soma_preco / NULLIF(quantidade_preco, 0), soma_pontuacao / NULLIF(quantidade_pontuacao, 0)
+            FROM agregados_imoveis WHERE dimensao = ? AND chave = ?
+            ORDER BY periodo
+        ''', (dimension, key)).fetchall()
+    finally:
+        conn.close()
+    return [dict(zip(("periodo", "quantidade", "preco_medio", "pontuacao_media"), row)) for row in rows]
+
+def load_histogram(db_name: str, dimension: str, key: str, metric: str) -> list:
+    """
+    Pares (faixa, quantidade) do histograma da chave, somando todos os meses. `metric` é "preco"
+    (faixas de aggregates.PRICE_BUCKET_EDGES) ou "pontuacao" (faixa = a própria pontuação).
+    """
+    conn = _connect(db_name)
+    try:
+        if not _has_table(conn, "agregados_histograma"):
+            return []
+        return conn.execute('''
+            SELECT faixa, SUM(quantidade) FROM agregados_histograma
+            WHERE dimensao = ? AND chave = ? AND metrica = ?
+            GROUP BY faixa
+            ORDER BY faixa
+        ''', (dimension, key, metric)).fetchall()
+    finally:
+        conn.close()
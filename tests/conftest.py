@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# Permite importar `modules` e `benchmarks` rodando `python -m pytest` a partir da raiz do projeto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,49 @@
+# test_aggregates.py
+import sqlite3
+
+import pytest
+
+from modules.aggregates import rebuild_aggregates
+from modules.processor import PropertyWriter, setup_database
+
+RECORD = {"titulo": "Casa com 3 quartos", "preco": "R$ 250.000,00", "localidade_pagina_principal": "Campinas, SP",
+          "link_detalhes": "https://exemplo.com/imoveis/casas/sp/campinas/casa-1",
+          "descricao_completa": "Casa com 3 quartos e quintal, sem data de leilão no edital."}
+
+def write(db_name: str, score: int):
+    with PropertyWriter(db_name, batch_size=1) as writer:
+        writer.add(RECORD, {"score": score, "positives": "", "negatives": ""})
+
+def aggregates(conn: sqlite3.Connection) -> tuple:
+    return (conn.execute("SELECT * FROM agregados_imoveis ORDER BY 1, 2, 3").fetchall(),
+            conn.execute("SELECT * FROM agregados_histograma ORDER BY 1, 2, 3, 4, 5").fetchall())
+
+@pytest.fixture
+def db_name(tmp_path):
+    db_name = str(tmp_path / "imoveis.db")
+    setup_database(db_name)
+    write(db_name, 6)
+    with sqlite3.connect(db_name) as conn:
+        # Imóvel gravado em um mês anterior, sem data do leilão
+        conn.execute("UPDATE imoveis SET data_inclusao = '2020-01-15 10:00:00', data_avaliacao = '2020-01-15 10:00:00'")
+    conn.close()
+    return db_name
+
+def test_reevaluation_keeps_the_period(db_name):
+    write(db_name, 8)
+    conn = sqlite3.connect(db_name)
+    assert conn.execute("SELECT periodo, quantidade, soma_pontuacao FROM agregados_imoveis WHERE dimensao = 'total'").fetchall() == [("2020-01", 1, 8.0)]
+    # Os agregados mantidos pelos triggers são os mesmos de um recálculo do zero
+    maintained = aggregates(conn)
+    rebuild_aggregates(conn)
+    assert aggregates(conn) == maintained
+    conn.close()
+
+def test_unchanged_reevaluation_does_not_touch_aggregates(db_name):
+    conn = sqlite3.connect(db_name)
+    conn.execute("UPDATE agregados_imoveis SET quantidade = 99")
+    conn.commit()
+    write(db_name, 6)
+    # Nenhuma coluna agregada mudou: o trigger de UPDATE não reescreveu os agregados
+    assert conn.execute("SELECT DISTINCT quantidade FROM agregados_imoveis").fetchall() == [(99,)]
+    conn.close()
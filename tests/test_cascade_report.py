@@ -0,0 +1,16 @@
+# test_cascade_report.py
+import sqlite3
+
+from modules.cascade_report import load_calibration_sample
+from modules.data_menager import ensure_schema
+
+def test_calibration_sample_uses_only_the_large_model(tmp_path):
+    db_name = str(tmp_path / "imoveis.db")
+    ensure_schema(db_name)
+    with sqlite3.connect(db_name) as conn:
+        conn.executemany("INSERT INTO imoveis (link_detalhes, pontuacao_ollama, modelo_avaliacao) VALUES (?, ?, ?)",
+                         [("grande", 8, "modelo-grande"), ("triagem", 3, "modelo-pequeno"), ("antigo", 5, None)])
+    conn.close()
+    assert [row["link_detalhes"] for row in load_calibration_sample(db_name, model="modelo-grande")] == ["grande"]
+    # Sem modelo (reavaliação com rescore): qualquer avaliação do banco
+    assert len(load_calibration_sample(db_name, model=None)) == 3
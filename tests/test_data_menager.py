@@ -0,0 +1,93 @@
+# test_data_menager.py
+import sqlite3
+
+import pytest
+
+from modules import data_menager
+from modules.data_menager import (SCHEMA_VERSION, auction_prices_from_rule, create_properties_table, migrate_database,
+                                  record_category)
+
+def test_failed_migration_is_rolled_back(tmp_path, monkeypatch):
+    def failing_migration(conn):
+        conn.execute("ALTER TABLE imoveis ADD COLUMN descartado_prefiltro INTEGER NOT NULL DEFAULT 0")
+        raise sqlite3.OperationalError("falha no meio da migração")
+
+    conn = sqlite3.connect(str(tmp_path / "imoveis.db"))
+    create_properties_table(conn)
+    conn.execute("INSERT INTO imoveis (link_detalhes, pontos_negativos) VALUES ('a', 'Pré-filtro: sem preço')")
+    conn.commit()
+    failing_index = data_menager.MIGRATIONS.index(data_menager._migration_8_prefilter_rejections)
+    monkeypatch.setattr(data_menager, "MIGRATIONS", data_menager.MIGRATIONS[:failing_index] + [failing_migration])
+    with pytest.raises(sqlite3.OperationalError):
+        migrate_database(conn)
+    # As migrações anteriores ficam; a que falhou é desfeita por inteiro, com a versão
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == failing_index
+    assert "descartado_prefiltro" not in {row[1] for row in conn.execute("PRAGMA table_info(imoveis)")}
+
+    monkeypatch.undo()
+    assert migrate_database(conn) == SCHEMA_VERSION
+    assert conn.execute("SELECT descartado_prefiltro, motivo_descarte FROM imoveis").fetchone() == (1, "sem preço")
+    conn.close()
+
+def test_migrate_keeps_caller_isolation_level(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "imoveis.db"))
+    create_properties_table(conn)
+    assert migrate_database(conn) == SCHEMA_VERSION
+    assert conn.isolation_level == ""
+    assert migrate_database(conn) == SCHEMA_VERSION
+    conn.close()
+
+def test_category_from_link_uses_urls_key(tmp_path):
+    link = "https://www.megaleiloes.com.br/imoveis/terrenos-e-lotes/sp/campinas/lote-1"
+    assert record_category({"link_detalhes": link}) == "terrenos"
+    assert record_category({"link_detalhes": link, "categoria": "terrenos"}) == "terrenos"
+    # Segmento que nenhuma URL de configs.URLS usa: fica o próprio segmento
+    assert record_category({"link_detalhes": "https://exemplo.com/imoveis/imoveis-rurais/sp/x/y"}) == "imoveis-rurais"
+
+    conn = sqlite3.connect(str(tmp_path / "imoveis.db"))
+    create_properties_table(conn)
+    conn.execute("INSERT INTO imoveis (link_detalhes) VALUES (?)", (link,))
+    conn.commit()
+    migrate_database(conn)
+    assert conn.execute("SELECT categoria FROM imoveis").fetchone() == ("terrenos",)
+    conn.close()
+
+def test_category_segments_are_mapped_on_existing_databases(tmp_path, monkeypatch):
+    conn = sqlite3.connect(str(tmp_path / "imoveis.db"))
+    create_properties_table(conn)
+    conn.execute("INSERT INTO imoveis (link_detalhes) VALUES ('https://exemplo.com/imoveis/terrenos-e-lotes/sp/x/y')")
+    conn.commit()
+    # Banco migrado antes da correspondência com configs.URLS: categoria gravada com o segmento do link
+    category_index = data_menager.MIGRATIONS.index(data_menager._migration_9_category_keys)
+    monkeypatch.setattr(data_menager, "MIGRATIONS", data_menager.MIGRATIONS[:category_index])
+    monkeypatch.setattr(data_menager, "SCHEMA_VERSION", category_index)
+    monkeypatch.setattr(data_menager, "category_segments", dict)
+    migrate_database(conn)
+    assert conn.execute("SELECT categoria FROM imoveis").fetchone() == ("terrenos-e-lotes",)
+    monkeypatch.undo()
+    assert migrate_database(conn) == SCHEMA_VERSION
+    assert conn.execute("SELECT categoria FROM imoveis").fetchone() == ("terrenos",)
+    conn.close()
+
+EDITAL = ("o 1º Leilão terá início no dia 02/06/2025 às 16:30 h e se encerrará dia 05/06/2025 às 16:30 h, onde somente "
+          "serão aceitos lances iguais ou superiores ao valor da avaliação; não havendo lance, seguir-se-á sem interrupção "
+          "o 2º Leilão, que terá início no dia 05/06/2025 às 16:31 h e se encerrará no dia 25/06/2025 às 16:30 h, onde "
+          "serão aceitos lances com no mínimo 50% (cinquenta por cento) do valor da avaliação.")
+
+def test_auction_prices_from_rule():
+    # Lido durante o 1º leilão: o preço é o do 1º; o do 2º é a porcentagem dele
+    assert auction_prices_from_rule(EDITAL, 200000.0, "2025-06-03 12:00:00") == (200000.0, 100000.0)
+    # Lido durante o 2º leilão (16:31 em Brasília = 19:31 UTC)
+    assert auction_prices_from_rule(EDITAL, 100000.0, "2025-06-05 19:40:00") == (200000.0, 100000.0)
+    assert auction_prices_from_rule(EDITAL, 200000.0, "2025-06-05 19:00:00") == (200000.0, 100000.0)
+    assert auction_prices_from_rule("Sem regra de leilão.", 100000.0, "2025-06-05 19:40:00") == (None, None)
+
+def test_auction_prices_are_filled_for_existing_rows(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "imoveis.db"))
+    create_properties_table(conn)
+    conn.execute("INSERT INTO imoveis (link_detalhes, preco, descricao_completa, data_avaliacao) VALUES (?, ?, ?, ?)",
+                 ("https://exemplo.com/imoveis/casas/sp/x/y", "R$ 130.000,00", EDITAL, "2025-06-25 14:30:41"))
+    conn.commit()
+    migrate_database(conn)
+    assert conn.execute("SELECT preco_primeiro_leilao, preco_segundo_leilao FROM imoveis").fetchone() == (260000.0, 130000.0)
+    conn.close()
@@ -0,0 +1,156 @@
+# test_evaluator.py
+import sqlite3
+
+import pytest
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from modules import eval_cache
+from modules.eval_cache import EvaluationCache, make_cache_key
+from modules.evaluator import AdaptiveConcurrencyLimiter, OllamaEvaluationPool
+from modules.prompts import PROMPT_VERSION, build_prompt_fields
+
+RECORD = {
+    "titulo": "Casa com 3 quartos",
+    "preco": "R$ 250.000,00",
+    "localidade_pagina_principal": "Campinas, SP",
+    "link_detalhes": "https://exemplo.com/imoveis/casas/sp/campinas/casa-1",
+    "descricao_completa": "Casa com 3 quartos, 2 vagas de garagem e quintal. Imóvel desocupado.",
+    "condicoes_pagamento": "À vista ou parcelado em 30 vezes.",
+}
+
+@pytest.fixture
+def fake_ollama():
+    with FakeOllamaServer(latency=0.0) as server:
+        yield server
+
+def make_pool(server: FakeOllamaServer, **kwargs) -> OllamaEvaluationPool:
+    kwargs.setdefault("max_workers", 2)
+    return OllamaEvaluationPool(model="modelo-teste", api_url=server.url, retry_backoff=0.0, timeout=10, **kwargs)
+
+# --- AdaptiveConcurrencyLimiter (AIMD) ---
+def test_limiter_grows_while_latency_is_stable():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=4)
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release(0.1, success=True)
+    assert int(limiter.limit) == 4
+    assert limiter.in_flight == 0
+
+def test_limiter_halves_on_error():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=8, initial_limit=8)
+    limiter.acquire()
+    limiter.release(success=False)
+    assert limiter.limit == 4
+    assert limiter.error_rate > 0
+
+def test_limiter_backs_off_when_latency_grows():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=8, initial_limit=8, latency_tolerance=2.0)
+    limiter.acquire()
+    limiter.release(0.1, success=True)
+    start_limit = limiter.limit
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(5.0, success=True)
+    assert limiter.limit < start_limit
+    assert limiter.limit >= limiter.min_limit
+
+# --- OllamaEvaluationPool contra o Ollama falso ---
+def test_pool_evaluates_with_fake_server(fake_ollama):
+    with make_pool(fake_ollama) as pool:
+        evaluation = pool.evaluate(RECORD)
+    assert not evaluation.get("failed")
+    assert 0 <= evaluation["score"] <= 10
+    assert evaluation["model"] == "modelo-teste"
+    assert pool.stats["calls"] == 1 and pool.stats["retries"] == 0
+    assert fake_ollama.calls == 1
+
+def test_pool_map_keeps_input_order(fake_ollama):
+    records = [{**RECORD, "titulo": f"Casa {i}", "link_detalhes": f"https://exemplo.com/{i}"} for i in range(6)]
+    with make_pool(fake_ollama) as pool:
+        results = list(pool.map(records))
+    assert [record["titulo"] for record, _ in results] == [record["titulo"] for record in records]
+    assert all(not evaluation.get("failed") for _, evaluation in results)
+
+def test_pool_retries_server_errors_until_success():
+    # Com a semente fixa, algumas chamadas falham (HTTP 500) antes de uma resposta válida
+    with FakeOllamaServer(latency=0.0, error_rate=0.5, seed=3) as server, make_pool(server, max_retries=10) as pool:
+        evaluations = [pool.evaluate({**RECORD, "titulo": f"Casa {i}"}) for i in range(5)]
+    assert all(not evaluation.get("failed") for evaluation in evaluations)
+    assert pool.stats["retries"] > 0
+    assert pool.stats["failures"] == 0
+
+def test_pool_gives_up_after_max_retries():
+    with FakeOllamaServer(latency=0.0, error_rate=1.0) as server, make_pool(server, max_retries=2) as pool:
+        evaluation = pool.evaluate(RECORD)
+        limit_after_errors = pool.limiter.limit
+    assert evaluation["failed"]
+    assert server.calls == 3
+    assert pool.stats["retries"] == 2 and pool.stats["failures"] == 1
+    assert limit_after_errors == pool.limiter.min_limit
+
+def test_pool_treats_invalid_json_as_failed_attempt():
+    with FakeOllamaServer(latency=0.0, invalid_rate=1.0) as server, make_pool(server, max_retries=1) as pool:
+        initial_limit = pool.limiter.limit
+        evaluation = pool.evaluate(RECORD)
+    assert evaluation["failed"]
+    assert server.calls == 2
+    # O servidor respondeu: resposta inválida não reduz a concorrência como um erro de rede
+    assert pool.limiter.limit >= initial_limit
+
+# --- Cache de avaliações ---
+def test_cache_key_depends_on_model_and_prompt_version():
+    fields = build_prompt_fields(RECORD)
+    key = make_cache_key(fields, "modelo-a", "v1")
+    assert key == make_cache_key(dict(fields), "modelo-a", "v1")
+    assert key != make_cache_key(fields, "modelo-b", "v1")
+    assert key != make_cache_key(fields, "modelo-a", "v2")
+    assert key != make_cache_key({**fields, "preco": "R$ 1,00"}, "modelo-a", "v1")
+
+def test_pool_reuses_cached_evaluation(fake_ollama, tmp_path):
+    db_name = str(tmp_path / "cache.db")
+    with EvaluationCache(db_name) as cache, make_pool(fake_ollama, cache=cache) as pool:
+        first = pool.evaluate(RECORD)
+        second = pool.evaluate(RECORD)
+    assert fake_ollama.calls == 1
+    assert second["cached"] and second["score"] == first["score"]
+    assert pool.stats["cached"] == 1
+
+    # O cache persiste entre execuções; mudar o preço (campo do prompt) muda a chave
+    with EvaluationCache(db_name) as cache, make_pool(fake_ollama, cache=cache) as pool:
+        assert pool.evaluate(RECORD)["cached"]
+        assert not pool.evaluate({**RECORD, "preco": "R$ 100.000,00"}).get("cached")
+    assert fake_ollama.calls == 2
+
+def test_cache_invalidation_and_eviction(tmp_path):
+    with EvaluationCache(str(tmp_path / "cache.db"), max_entries=2) as cache:
+        for i in range(3):
+            cache.put(f"chave-{i}", "modelo-a" if i else "modelo-antigo", PROMPT_VERSION, {"score": i, "positives": "", "negatives": ""})
+        assert cache.invalidate_stale("modelo-a", PROMPT_VERSION) == 1
+        assert cache.get("chave-0") is None
+        cache.put("chave-3", "modelo-a", PROMPT_VERSION, {"score": 3, "positives": "", "negatives": ""})
+        assert cache.evict() == 1
+        assert cache.get("chave-3")["score"] == 3
+
+def test_cache_hits_are_written_in_batch(tmp_path):
+    db_name = str(tmp_path / "cache.db")
+    with EvaluationCache(db_name) as cache:
+        cache.put("chave", "modelo-a", PROMPT_VERSION, {"score": 8, "positives": "", "negatives": ""})
+        cache.conn.execute("UPDATE avaliacoes_cache SET usado_em = '2000-01-01 00:00:00'")
+        cache.conn.commit()
+        assert cache.get("chave")["score"] == 8
+        # O acerto não grava no banco; o uso vai para usado_em no evict (e no close)
+        assert cache.conn.execute("SELECT usado_em FROM avaliacoes_cache").fetchone()[0] == "2000-01-01 00:00:00"
+        cache.evict()
+        assert cache.conn.execute("SELECT usado_em FROM avaliacoes_cache").fetchone()[0] > "2000-01-01 00:00:00"
+
+def test_locked_cache_does_not_stop_evaluation(fake_ollama, tmp_path, monkeypatch):
+    monkeypatch.setattr(eval_cache, "EVAL_CACHE_BUSY_TIMEOUT", 0.1)
+    db_name = str(tmp_path / "cache.db")
+    other = sqlite3.connect(db_name, isolation_level=None)
+    with EvaluationCache(db_name) as cache, make_pool(fake_ollama, cache=cache) as pool:
+        other.execute("BEGIN EXCLUSIVE")
+        assert pool.evaluate(RECORD)["score"] is not None
+        assert cache.errors == 2 # Leitura e gravação falharam: a avaliação seguiu sem o cache
+        other.execute("ROLLBACK")
+    other.close()
+    assert fake_ollama.calls == 1
@@ -0,0 +1,50 @@
+# test_frontier.py
+import pytest
+
+from modules.frontier import DETAILS, Frontier
+
+URLS = {"casas": "https://exemplo.com/imoveis/casas?pagina="}
+
+def card(index: int) -> dict:
+    return {"titulo": f"Casa {index}", "preco": "R$ 100.000,00",
+            "link_detalhes": f"https://exemplo.com/imoveis/casas/sp/campinas/casa-{index}"}
+
+@pytest.fixture
+def frontier(tmp_path):
+    """
+    Fila com a página 1 concluída e duas páginas de detalhes: a primeira raspada, a segunda desistida.
+    """
+    frontier = Frontier(str(tmp_path / "fronteira.db"), max_attempts=1, retry_delay=0)
+    frontier.seed(URLS)
+    listing = frontier.claim("teste")[0]
+    frontier.complete(listing["id"], "teste", [{"url": card(i)["link_detalhes"], "tipo": DETAILS, "categoria": "casas",
+                                                "pagina": 1, "dados": card(i)} for i in (1, 2)])
+    fetched, failed = frontier.claim("teste", limit=2)
+    frontier.complete(fetched["id"], "teste", result={**card(1), "descricao_completa": "Casa ampla", "categoria": "casas"})
+    frontier.fail(failed["id"], "teste", "Timeout")
+    yield frontier
+    frontier.close()
+
+def test_failed_details_are_delivered_with_default_fields(frontier):
+    records = [record for _, record in frontier.results()]
+    assert [record["titulo"] for record in records] == ["Casa 1", "Casa 2"]
+    assert records[0]["descricao_completa"] == "Casa ampla"
+    assert records[1]["descricao_completa"] == "Não encontrada"
+    assert records[1]["categoria"] == "casas"
+
+def test_delivered_items_are_delivered_again_on_resume(frontier):
+    for item_id, _ in frontier.results():
+        frontier.mark_delivered(item_id)
+    assert frontier.results() == []
+    # Execução interrompida antes da gravação: a próxima retoma e entrega os dois itens de novo
+    assert frontier.seed(URLS) is True
+    assert len(frontier.results()) == 2
+
+def test_consumed_items_are_not_delivered_again(frontier):
+    for item_id, _ in frontier.results():
+        frontier.mark_delivered(item_id)
+    fetched = frontier.mark_consumed([card(1)["link_detalhes"], card(2)["link_detalhes"]])
+    # Só o item com a página de detalhes obtida vai para o índice de conhecidos
+    assert [record["titulo"] for record in fetched] == ["Casa 1"]
+    assert frontier.seed(URLS) is False
+    assert frontier.results() == []
@@ -0,0 +1,94 @@
+# test_http_cache.py
+import os
+import time
+
+import pytest
+
+from benchmarks.fake_site import FakeAuctionSite
+from modules.fetcher import CacheMissError, Fetcher
+from modules.http_cache import HttpCache
+
+@pytest.fixture
+def site():
+    with FakeAuctionSite(pages=1, items_per_page=2, latency=0.0) as site:
+        yield site
+
+def detail_url(site: FakeAuctionSite, index: int = 0) -> str:
+    return f"{site.base_url}/imoveis/casas/lote-1-{index}"
+
+# --- Fetcher com cache ---
+def test_fresh_response_is_served_without_request(site, tmp_path):
+    with Fetcher(cache_dir=str(tmp_path)) as fetcher:
+        first = fetcher.get_text(detail_url(site))
+        second = fetcher.get_text(detail_url(site))
+        assert second == first
+        assert site.requests == 1
+        assert fetcher.cache.stats["fresh"] == 1
+
+def test_expired_response_is_revalidated_with_304(site, tmp_path):
+    with Fetcher(cache_dir=str(tmp_path)) as fetcher:
+        first = fetcher.get_text(detail_url(site))
+        assert fetcher.get_text(detail_url(site), ttl=0) == first
+        assert site.requests == 2
+        assert site.not_modified == 1
+        assert fetcher.cache.stats["revalidated"] == 1
+        # A revalidação renova a validade: a próxima leitura não vai ao site
+        fetcher.get_text(detail_url(site))
+        assert site.requests == 2
+
+def test_replay_reads_only_from_cache(site, tmp_path):
+    with Fetcher(cache_dir=str(tmp_path)) as fetcher:
+        recorded = fetcher.get_text(detail_url(site))
+    requests = site.requests
+    with Fetcher(cache_dir=str(tmp_path), replay=True) as fetcher:
+        assert fetcher.get_text(detail_url(site), ttl=0) == recorded
+        with pytest.raises(CacheMissError):
+            fetcher.get_text(detail_url(site, 1))
+    assert site.requests == requests
+
+def test_missing_body_is_a_cache_miss(site, tmp_path):
+    with Fetcher(cache_dir=str(tmp_path)) as fetcher:
+        expected = fetcher.get_text(detail_url(site))
+        entry = fetcher.cache.lookup(detail_url(site))
+        os.remove(fetcher.cache._object_path(entry["digest"]))
+        # Revalidação com 304, mas sem o corpo guardado: baixa de novo por completo
+        assert fetcher.get_text(detail_url(site), ttl=0) == expected
+        assert site.not_modified == 1
+        assert site.requests == 3
+        assert os.path.exists(fetcher.cache._object_path(entry["digest"]))
+        os.remove(fetcher.cache._object_path(entry["digest"]))
+        # Resposta ainda válida, mas sem o corpo: também é baixada de novo
+        assert fetcher.get_text(detail_url(site)) == expected
+        assert site.requests == 4
+
+def test_missing_body_in_replay_raises_cache_miss(site, tmp_path):
+    with Fetcher(cache_dir=str(tmp_path)) as fetcher:
+        fetcher.get_text(detail_url(site))
+        entry = fetcher.cache.lookup(detail_url(site))
+    os.remove(HttpCache(str(tmp_path))._object_path(entry["digest"]))
+    with Fetcher(cache_dir=str(tmp_path), replay=True) as fetcher:
+        with pytest.raises(CacheMissError):
+            fetcher.get_text(detail_url(site))
+
+# --- Descarte de respostas ---
+def test_evict_least_recently_used_over_max_bytes(tmp_path):
+    with HttpCache(str(tmp_path)) as cache:
+        cache.store("https://exemplo.com/a", b"a" * 100)
+        time.sleep(0.01)
+        cache.store("https://exemplo.com/b", b"b" * 100)
+        time.sleep(0.01)
+        cache.read(cache.lookup("https://exemplo.com/a"))
+        assert cache.evict(max_bytes=150) == 1
+        assert cache.lookup("https://exemplo.com/a") is not None
+        assert cache.lookup("https://exemplo.com/b") is None
+
+def test_evict_old_responses_and_keep_shared_bodies(tmp_path):
+    with HttpCache(str(tmp_path)) as cache:
+        cache.store("https://exemplo.com/antiga", b"mesmo corpo")
+        cache.conn.execute("UPDATE respostas SET validado_em = validado_em - 3600")
+        cache.store("https://exemplo.com/nova", b"mesmo corpo")
+        entry = cache.lookup("https://exemplo.com/nova")
+        assert cache.evict(max_age=60) == 1
+        assert cache.lookup("https://exemplo.com/antiga") is None
+        # O corpo continua no disco: outra URL aponta para ele
+        assert cache.read(entry) == "mesmo corpo"
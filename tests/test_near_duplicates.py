@@ -0,0 +1,85 @@
+# test_near_duplicates.py
+import sqlite3
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from modules.data_menager import ensure_schema
+from modules.near_duplicates import NearDuplicateIndex
+from modules.prompts import PROMPT_VERSION
+
+DESCRIPTION = ("Casa com 3 quartos, sendo 1 suíte, sala para dois ambientes, cozinha, área de serviço, "
+               "2 vagas de garagem e quintal nos fundos. Imóvel desocupado, matrícula 12.345 do 1º Cartório "
+               "de Registro de Imóveis de Campinas. Venda em leilão conforme edital.")
+EVALUATION = {"score": 8, "positives": "Desocupado", "negatives": "Nenhum", "model": "modelo-grande",
+              "screening_score": 6, "full_score": 8}
+
+def make_record(link: str, preco: str) -> dict:
+    return {"titulo": "Casa com 3 quartos", "preco": preco, "localidade_pagina_principal": "Campinas, SP",
+            "link_detalhes": f"https://exemplo.com/imoveis/casas/sp/campinas/{link}",
+            "descricao_completa": DESCRIPTION, "condicoes_pagamento": "À vista."}
+
+@pytest.fixture
+def index(tmp_path):
+    db_name = str(tmp_path / "imoveis.db")
+    ensure_schema(db_name)
+    index = NearDuplicateIndex(db_name, index_path=str(tmp_path / "indice.npz"))
+    record = make_record("casa-1", "R$ 250.000,00")
+    evaluation, claim = index.claim(record)
+    assert evaluation is None and claim is not None
+    index.resolve(claim, EVALUATION)
+    with sqlite3.connect(db_name) as conn:
+        conn.execute("INSERT INTO imoveis (link_detalhes, pontuacao_ollama, pontos_positivos, pontos_negativos, "
+                     "modelo_avaliacao, pontuacao_triagem, pontuacao_modelo_grande, versao_prompt) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                     (record["link_detalhes"], 8, "Desocupado", "Nenhum", "modelo-grande", 6, 8, PROMPT_VERSION))
+    conn.close()
+    return index
+
+def test_reuses_evaluation_at_same_price(index):
+    evaluation, claim = index.claim(make_record("casa-1-relistada", "R$ 250.000,00"))
+    assert claim is None
+    assert evaluation["score"] == 8
+    assert evaluation["duplicate_of"].endswith("/casa-1")
+
+def test_price_within_tolerance_reuses(index):
+    evaluation, _ = index.claim(make_record("casa-1-relistada", "R$ 249.000,00"))
+    assert evaluation is not None
+
+def test_different_price_is_evaluated_again(index):
+    evaluation, claim = index.claim(make_record("casa-1-2o-leilao", "R$ 1,00"))
+    assert evaluation is None and claim is not None
+    index.resolve(claim, {"score": 10, "positives": "Preço", "negatives": "Nenhum"})
+    # O novo preço passa a ter o próprio grupo
+    evaluation, _ = index.claim(make_record("casa-1-3o-leilao", "R$ 1,00"))
+    assert evaluation["score"] == 10
+    assert evaluation["duplicate_of"].endswith("/casa-1-2o-leilao")
+
+def test_missing_price_does_not_reuse_priced_evaluation(index):
+    evaluation, claim = index.claim(make_record("casa-1-sem-preco", ""))
+    assert evaluation is None and claim is not None
+
+def test_prices_survive_save_and_load(index):
+    index.save()
+    reloaded = NearDuplicateIndex(index.db_name, index_path=index.index_path)
+    assert reloaded.claim(make_record("casa-1-outra", "R$ 1,00"))[0] is None
+    assert reloaded.claim(make_record("casa-1-mais-uma", "R$ 250.000,00"))[0]["score"] == 8
+
+def test_reused_evaluation_keeps_model_and_cascade_scores(index):
+    evaluation, _ = index.claim(make_record("casa-1-relistada", "R$ 250.000,00"))
+    assert (evaluation["model"], evaluation["screening_score"], evaluation["full_score"]) == ("modelo-grande", 6, 8)
+    # Avaliação gravada em execução anterior: os mesmos campos, lidos da tabela `imoveis`
+    index.save()
+    reloaded = NearDuplicateIndex(index.db_name, index_path=index.index_path)
+    evaluation, _ = reloaded.claim(make_record("casa-1-outra", "R$ 250.000,00"), models=("modelo-grande",))
+    assert (evaluation["model"], evaluation["screening_score"], evaluation["full_score"]) == ("modelo-grande", 6, 8)
+
+def test_stored_evaluation_of_other_model_or_prompt_is_not_reused(index):
+    index.save()
+    reloaded = NearDuplicateIndex(index.db_name, index_path=index.index_path)
+    assert reloaded.claim(make_record("casa-1-outra", "R$ 250.000,00"), models=("outro-modelo",))[0] is None
+    with sqlite3.connect(index.db_name) as conn:
+        conn.execute("UPDATE imoveis SET versao_prompt = 'antiga'")
+    conn.close()
+    reloaded = NearDuplicateIndex(index.db_name, index_path=index.index_path)
+    assert reloaded.claim(make_record("casa-1-mais-uma", "R$ 250.000,00"))[0] is None
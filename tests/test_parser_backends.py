@@ -0,0 +1,45 @@
+# test_parser_backends.py
+import pytest
+
+from benchmarks.parser_backends import (CARD_CONTAINER_CLASS, DETAIL_FIXTURE, LISTING_FIXTURE, SUMMARY_CLASS,
+                                        reference_details, reference_listing)
+from modules.extractor import get_backend
+
+# Backend -> módulo que precisa estar instalado
+BACKEND_MODULES = {"selectolax": "selectolax.lexbor", "lxml": "lxml.html", "html.parser": "bs4"}
+
+def read_fixture(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+@pytest.fixture(params=list(BACKEND_MODULES))
+def backend(request):
+    pytest.importorskip(BACKEND_MODULES[request.param])
+    return get_backend(request.param)
+
+def test_listing_matches_reference(backend):
+    html = read_fixture(LISTING_FIXTURE)
+    total_pages, cards = backend.parse_listing(html, CARD_CONTAINER_CLASS, SUMMARY_CLASS)
+    expected_pages, expected_cards = reference_listing(html)
+    assert cards, "a página de exemplo deve ter cards"
+    assert total_pages == expected_pages
+    assert cards == expected_cards
+
+def test_details_match_reference(backend):
+    html = read_fixture(DETAIL_FIXTURE)
+    details = backend.parse_details(html)
+    for field, expected in reference_details(html).items():
+        assert details[field] == expected, field
+
+def test_installed_backends_agree():
+    listing_html, detail_html = read_fixture(LISTING_FIXTURE), read_fixture(DETAIL_FIXTURE)
+    results = {}
+    for name, module in BACKEND_MODULES.items():
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        backend = get_backend(name)
+        results[name] = (backend.parse_listing(listing_html, CARD_CONTAINER_CLASS, SUMMARY_CLASS),
+                         backend.parse_details(detail_html))
+    assert len(set(map(repr, results.values()))) == 1, list(results)
@@ -0,0 +1,60 @@
+# test_prefilter.py
+import os
+import sqlite3
+
+import pytest
+
+from modules.processor import prefilter_record, prefilter_records
+
+SHIPPED_DB = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "imoveis_interessantes_mistral.db")
+DESCRIPTION = ("Casa com 3 quartos, sala, cozinha e 2 vagas de garagem. Matrícula 12.345 do 1º Cartório de "
+               "Registro de Imóveis de Campinas. ")
+
+def make_record(extra: str = "", preco: str = "R$ 250.000,00", categoria: str = "casas") -> dict:
+    return {"titulo": "Casa com 3 quartos", "preco": preco, "categoria": categoria,
+            "link_detalhes": f"https://exemplo.com/imoveis/{categoria}/sp/campinas/casa-1",
+            "descricao_completa": DESCRIPTION + extra}
+
+# --- Imóveis bons não são descartados ---
+@pytest.mark.skipif(not os.path.exists(SHIPPED_DB), reason="banco de exemplo ausente")
+def test_default_rules_keep_known_good_rows():
+    conn = sqlite3.connect(f"file:{SHIPPED_DB}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = [dict(row) for row in conn.execute("SELECT * FROM imoveis WHERE pontuacao_ollama >= 7")]
+    finally:
+        conn.close()
+    assert rows
+    rejected = [(row["link_detalhes"], decision["reasons"])
+                for row, decision in zip(rows, prefilter_records(rows)) if decision["action"] == "reject"]
+    assert rejected == []
+
+@pytest.mark.parametrize("extra", [
+    "Ocupado. Desocupação por conta do adquirente.",
+    "Arrematação dos direitos aquisitivos sobre o imóvel, objeto de alienação fiduciária.",
+    "Débitos tributários junto à Prefeitura no valor de R$ 1.028.813,43, sub-rogados no preço.",
+    "Constam débitos de IPTU e condomínio de aproximadamente R$ 300.000,00.",
+    "Débito desta ação: R$ 900.000,00.",
+])
+def test_common_edital_text_is_not_rejected(extra):
+    assert prefilter_record(make_record(extra))["action"] != "reject"
+
+# --- Regras ---
+def test_obviously_out_records_are_rejected():
+    assert prefilter_record(make_record(preco="Não informado"))["action"] == "reject"
+    assert prefilter_record({**make_record(), "descricao_completa": "Não encontrada"})["action"] == "reject"
+    assert prefilter_record(make_record("Venda da nua-propriedade do imóvel."))["action"] == "reject"
+    assert prefilter_record(make_record("Débitos de condomínio de R$ 600.000,00."))["action"] == "reject"
+    assert prefilter_record(make_record(preco="R$ 12.000.000,00"))["action"] == "reject"
+
+def test_price_ceiling_matches_category_prefix():
+    decision = prefilter_record(make_record(preco="R$ 12.000.000,00", categoria="terrenos-e-lotes"))
+    assert decision["action"] == "reject"
+    assert prefilter_record(make_record(preco="R$ 12.000.000,00", categoria="imoveis-rurais"))["action"] != "reject"
+
+@pytest.mark.parametrize("extra", ["Imóvel desocupado.", "O imóvel não está ocupado.", "Aceita FGTS."])
+def test_fast_track(extra):
+    assert prefilter_record(make_record(extra))["action"] == "fast_track"
+
+def test_occupied_is_not_fast_tracked():
+    assert prefilter_record(make_record("Imóvel ocupado."))["action"] == "evaluate"
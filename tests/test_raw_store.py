@@ -0,0 +1,23 @@
+# test_raw_store.py
+import json
+
+from modules.raw_store import RawStore, iter_records, legacy_output_file, migrate_legacy_store
+
+RECORDS = [{"titulo": "Casa", "link_detalhes": "https://exemplo.com/imoveis/casas/1"},
+           {"titulo": "Apartamento", "link_detalhes": "https://exemplo.com/imoveis/apartamentos/2"}]
+
+def test_legacy_json_is_migrated_once_to_legacy_store(tmp_path):
+    output_file = str(tmp_path / "leiloes_raspados_raw.jsonl")
+    (tmp_path / "leiloes_raspados_raw.json").write_text(json.dumps(RECORDS), encoding="utf-8")
+    # O RawStore de uma categoria não enxerga o arquivo antigo (outro nome)
+    RawStore(str(tmp_path / "leiloes_raspados_raw_casas.jsonl")).close()
+
+    assert migrate_legacy_store(output_file) == 2
+    assert legacy_output_file(output_file) == str(tmp_path / "leiloes_raspados_raw_legado.jsonl")
+    assert list(iter_records(legacy_output_file(output_file))) == RECORDS
+    assert migrate_legacy_store(output_file) == 0
+
+def test_without_legacy_json_nothing_is_created(tmp_path):
+    output_file = str(tmp_path / "leiloes_raspados_raw.jsonl")
+    assert migrate_legacy_store(output_file) == 0
+    assert not (tmp_path / "leiloes_raspados_raw_legado.jsonl").exists()